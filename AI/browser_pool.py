@@ -0,0 +1,295 @@
+import os
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+
+
+"""
+BROWSER POOL DOCS:
+
+- Keeps headless browsers warm for the whole life of a worker instead of launching one per vendor
+- `BrowserPool` (Playwright, used by task_three) hands out an isolated browser context + page per check
+- `SeleniumDriverPool` (Selenium Chrome, used by task_four) hands out a whole driver per check
+- Both bound concurrency, recycle a browser after `max_uses` checks or when it crashes,
+  and block images, fonts and stylesheets so pages load faster
+
+Playwright objects belong to the event loop that created them. `run_async` runs coroutines on a
+long-lived background loop so callers outside asyncio (e.g. the pipeline threads) share one warm pool.
+A pool created on any other loop (e.g. a standalone `asyncio.run(task_three(...))`) closes its browser
+and stops Playwright when that loop finishes.
+Every check from every thread runs on that one loop, so coroutines must not block it: database, HTTP
+and parsing calls go through `asyncio.to_thread` (see task_three) and only browser I/O runs on the loop.
+
+Drivers returned to the Selenium pool have their cookies and local/session storage cleared, so one
+check never sees another's session.
+
+Settings (environment):
+
+- `browser_pool_size`: Pages/drivers open at the same time (default 4)
+- `browser_max_uses`: Checks per browser before it is replaced (default 50)
+"""
+
+BLOCKED_RESOURCE_TYPES = {"image", "font", "stylesheet", "media"}
+BLOCKED_URL_PATTERNS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+                        "*.css", "*.woff", "*.woff2", "*.ttf", "*.otf"]
+
+
+def _setting(key, default):
+    value = os.getenv(key)
+    return int(value) if value else default
+
+
+class BrowserPool:
+    """
+    Pool of Playwright Chromium browsers that hands out isolated pages.
+
+    Args:
+        max_pages (int, optional): Pages open at the same time across all browsers
+        max_uses (int, optional): Pages served by a browser before it is retired
+        block_resources (bool, optional): Abort image, font, stylesheet and media requests
+    """
+
+    def __init__(self, max_pages=None, max_uses=None, block_resources=True):
+        self.max_pages = max_pages or _setting("browser_pool_size", 4)
+        self.max_uses = max_uses or _setting("browser_max_uses", 50)
+        self.block_resources = block_resources
+        self._semaphore = asyncio.Semaphore(self.max_pages)
+        self._lock = asyncio.Lock()
+        self._playwright = None
+        self._current = None
+        self.launches = 0
+
+    async def _get_browser(self):
+        async with self._lock:
+            current = self._current
+            if current is None or not current["browser"].is_connected() or current["uses"] >= self.max_uses:
+                if current is not None:
+                    current["retired"] = True
+                    await self._close_if_idle(current)
+                if self._playwright is None:
+                    from playwright.async_api import async_playwright
+                    self._playwright = await async_playwright().start()
+                browser = await self._playwright.chromium.launch()
+                self.launches += 1
+                current = {"browser": browser, "uses": 0, "active": 0, "retired": False}
+                self._current = current
+            current["uses"] += 1
+            current["active"] += 1
+            return current
+
+    async def _close_if_idle(self, record):
+        if record["retired"] and record["active"] == 0:
+            try:
+                await record["browser"].close()
+            except Exception as e:
+                print(f"Error closing browser: {str(e)}")
+
+    async def _block(self, route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        Yields a new page in its own browser context. The context is closed afterwards.
+        A browser that disconnects while in use is retired and replaced on the next request.
+        """
+        async with self._semaphore:
+            record = await self._get_browser()
+            context = None
+            try:
+                context = await record["browser"].new_context()
+                if self.block_resources:
+                    await context.route("**/*", self._block)
+                yield await context.new_page()
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        print(f"Error closing browser context: {str(e)}")
+                async with self._lock:
+                    record["active"] -= 1
+                    if not record["browser"].is_connected():
+                        record["retired"] = True
+                        if self._current is record:
+                            self._current = None
+                    await self._close_if_idle(record)
+
+    async def close(self):
+        """Closes the current browser and stops Playwright."""
+        async with self._lock:
+            if self._current is not None:
+                self._current["retired"] = True
+                await self._close_if_idle(self._current)
+                self._current = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+_browser_pools = weakref.WeakKeyDictionary()
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+async def _close_when_cancelled(pool):
+    # asyncio.run cancels the tasks still pending on its loop before closing it
+    try:
+        await asyncio.Event().wait()
+    except asyncio.CancelledError:
+        await pool.close()
+        raise
+    finally:
+        # Drop the task (and through it the loop) so the closed loop's pool entry can be collected
+        pool._closer = None
+
+
+def get_browser_pool():
+    """
+    Returns the BrowserPool for the running event loop, creating it on first use.
+    The pool is closed when the loop's remaining tasks are cancelled (as asyncio.run does on exit).
+    Must be called from inside a coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _browser_pools:
+        pool = BrowserPool()
+        pool._closer = loop.create_task(_close_when_cancelled(pool))
+        _browser_pools[loop] = pool
+    return _browser_pools[loop]
+
+
+def run_async(coro):
+    """
+    Runs a coroutine on the shared background event loop and blocks until it finishes.
+    Browsers opened by the coroutine stay warm for the next call.
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="browser-pool-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop).result()
+
+
+class SeleniumDriverPool:
+    """
+    Pool of headless Selenium Chrome drivers.
+
+    Args:
+        max_drivers (int, optional): Drivers in use at the same time
+        max_uses (int, optional): Checks served by a driver before it is quit and replaced
+    """
+
+    def __init__(self, max_drivers=None, max_uses=None):
+        self.max_drivers = max_drivers or _setting("browser_pool_size", 4)
+        self.max_uses = max_uses or _setting("browser_max_uses", 50)
+        self._semaphore = threading.BoundedSemaphore(self.max_drivers)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._driver_path = None
+        self.launches = 0
+
+    def _create_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        # Resolve the chromedriver binary once per pool instead of once per vendor
+        with self._lock:
+            if self._driver_path is None:
+                self._driver_path = ChromeDriverManager().install()
+
+        chrome_options = webdriver.ChromeOptions()
+        chrome_options.add_argument('--headless')  # Run in headless mode
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+
+        driver = webdriver.Chrome(service=Service(self._driver_path), options=chrome_options)
+        driver.set_page_load_timeout(30)  # Set page load timeout
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            print(f"Could not block resources for Selenium driver: {str(e)}")
+        self.launches += 1
+        return {"driver": driver, "uses": 0}
+
+    @staticmethod
+    def _quit(record):
+        try:
+            record["driver"].quit()
+        except Exception as e:
+            print(f"Error quitting Selenium driver: {str(e)}")
+
+    @staticmethod
+    def _reset(record):
+        """
+        Clears cookies and web storage so the next check starts clean.
+        Returns False if the driver did not respond (crashed), so it should be quit.
+        """
+        driver = record["driver"]
+        try:
+            # delete_all_cookies only covers the current domain; the CDP command clears every domain
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except Exception:
+            pass
+        try:
+            driver.delete_all_cookies()
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            # Storage is not available on some pages (e.g. about:blank); only a dead driver fails below
+            pass
+        try:
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+    @contextmanager
+    def driver(self):
+        """
+        Yields a warm driver. Afterwards its cookies and storage are cleared and it goes back to
+        the pool unless it has crashed (stopped responding) or reached max_uses, in which case it is quit.
+        """
+        with self._semaphore:
+            with self._lock:
+                record = self._idle.pop() if self._idle else None
+            if record is None:
+                record = self._create_driver()
+
+            try:
+                yield record["driver"]
+            finally:
+                record["uses"] += 1
+                if record["uses"] < self.max_uses and self._reset(record):
+                    with self._lock:
+                        self._idle.append(record)
+                else:
+                    self._quit(record)
+
+    def close(self):
+        """Quits every idle driver."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for record in idle:
+            self._quit(record)
+
+
+_selenium_pool = None
+_selenium_pool_lock = threading.Lock()
+
+
+def get_selenium_pool():
+    """
+    Returns the process-wide SeleniumDriverPool, creating it on first use.
+    """
+    global _selenium_pool
+    with _selenium_pool_lock:
+        if _selenium_pool is None:
+            _selenium_pool = SeleniumDriverPool()
+        return _selenium_pool
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+
+"""
+RESPONSE CACHE DOCS:
+
+- Local SQLite file that stores responses from slow or metered upstream calls between runs
+- Entries are grouped by namespace (e.g. "perplexity") and keyed by a hash of everything that affects the response
+- Each entry has its own TTL; expired entries are treated as misses and removed lazily
+- The file is bounded by `max_entries`; the least recently used entries are evicted first
+- Hit/miss/eviction counters are kept per namespace and returned by `stats()`
+
+The file lives at `.cache/quickfi_cache.sqlite3` in the project root unless `cache_path` is set in the environment.
+Set `cache_disabled=true` to turn every lookup into a miss without writing anything.
+"""
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent.parent / ".cache" / "quickfi_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 50000
+
+
+def make_key(*parts):
+    """
+    Builds a stable cache key from the values that determine a response.
+
+    Args:
+        *parts: JSON-serializable values (model, prompts, parameters, ...)
+
+    Returns:
+        str: SHA-256 hex digest of the parts
+    """
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe, size-bounded TTL cache backed by a local SQLite file.
+
+    Args:
+        path (str or Path, optional): SQLite file location. Use ":memory:" for a throwaway cache
+        max_entries (int, optional): Total entries kept across all namespaces before LRU eviction
+        enabled (bool, optional): When False, get() always misses and set() does nothing
+    """
+
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, enabled=True):
+        self.path = str(path or DEFAULT_CACHE_PATH)
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {}
+
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries (last_access)")
+
+    def _count(self, namespace, counter, amount=1):
+        counters = self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "sets": 0, "evictions": 0})
+        counters[counter] += amount
+
+    def get(self, namespace, key, default=None):
+        """
+        Returns the cached value for a key, or `default` if it is missing or expired.
+        """
+        if not self.enabled:
+            return default
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+                self._count(namespace, "misses")
+                return default
+            self._conn.execute(
+                "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key)
+            )
+            self._count(namespace, "hits")
+        return json.loads(row[0])
+
+    def set(self, namespace, key, value, ttl):
+        """
+        Stores a JSON-serializable value for `ttl` seconds, evicting least recently used entries if the cache is full.
+        """
+        if not self.enabled or ttl <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, created_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), now, now + ttl, now)
+            )
+            self._count(namespace, "sets")
+            self._evict(namespace)
+
+    def _evict(self, namespace):
+        overflow = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+        overflow = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE rowid IN "
+                "(SELECT rowid FROM cache_entries ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._count(namespace, "evictions", overflow)
+
+    def delete(self, namespace, key):
+        """Removes a single entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def clear(self, namespace=None):
+        """Removes every entry, or every entry in one namespace."""
+        with self._lock:
+            if namespace is None:
+                self._conn.execute("DELETE FROM cache_entries")
+            else:
+                self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+
+    def stats(self):
+        """
+        Returns hit/miss counters per namespace since the cache was opened, plus the stored entry count.
+
+        Returns:
+            dict: {namespace: {"hits", "misses", "sets", "evictions", "hit_rate", "entries"}}
+        """
+        with self._lock:
+            entries = dict(self._conn.execute(
+                "SELECT namespace, COUNT(*) FROM cache_entries GROUP BY namespace"
+            ).fetchall())
+            result = {}
+            for namespace in set(entries) | set(self._stats):
+                counters = dict(self._stats.get(namespace, {"hits": 0, "misses": 0, "sets": 0, "evictions": 0}))
+                lookups = counters["hits"] + counters["misses"]
+                counters["hit_rate"] = round(counters["hits"] / lookups, 3) if lookups else 0.0
+                counters["entries"] = entries.get(namespace, 0)
+                result[namespace] = counters
+            return result
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Returns the process-wide ResponseCache, opening it on first use.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                path=os.getenv("cache_path") or None,
+                max_entries=int(os.getenv("cache_max_entries") or DEFAULT_MAX_ENTRIES),
+                enabled=(os.getenv("cache_disabled") or "").lower() not in ("1", "true", "yes")
+            )
+        return _cache
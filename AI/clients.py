@@ -0,0 +1,543 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from dotenv import load_dotenv
+load_dotenv()
+
+
+"""
+PROVIDER CLIENT DOCS:
+
+- One pooled, keep-alive `requests.Session` per upstream provider, shared by every task and thread
+- Every request gets the provider's connect/read timeouts, so a hung call can no longer pin a worker
+- 429 and 5xx responses (and connection errors/timeouts) are retried a bounded number of times
+  with exponential backoff and full jitter, honoring `Retry-After` when the provider sends one
+- POSTs are only retried when the provider cannot have acted on them: the connection was never made,
+  or it answered 429/503. A read timeout or dropped connection after sending is raised, not resent
+- Retries stop once the call has used up its `deadline` (total seconds across attempts and backoffs),
+  and each attempt's read timeout is cut to the time left
+- A token bucket per provider caps the request rate at `qps` with bursts of up to `burst` requests;
+  callers over the rate wait their turn instead of failing
+- An AIMD controller caps requests in flight: the limit grows by about one per round of successful
+  requests (up to `max_concurrency`) and halves on a 429 or Google `OVER_QUERY_LIMIT` (down to `min_concurrency`)
+- A request still throttled after its last retry raises ProviderThrottled, so callers can tell a quota problem
+  from a real "not found" and do not flag the vendor for it
+- `provider_stats()` reports each provider's limits, queue depth and throttle counts
+- Providers with a circuit breaker (DNB) stop sending requests while the service is failing (see CircuitBreaker)
+  and raise CircuitOpen immediately instead of waiting on timeouts
+
+**Providers**:
+
+- `dnb`: DNB staging service (qfstagingservices.azurewebsites.net)
+- `perplexity`: api.perplexity.ai
+- `google`: maps.googleapis.com (Geocoding and Place Details)
+
+Defaults can be overridden with environment variables named `<provider>_<setting>`,
+e.g. `perplexity_read_timeout=90`, `dnb_deadline=45`, `google_pool_size=20` or `google_qps=25`. `qps=0` turns the rate limit off.
+"""
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Statuses that mean the provider rejected the request without acting on it, so even a POST can be resent
+REJECTED_STATUS_CODES = {429, 503}
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def request_was_sent(error):
+    """
+    False when a connection error happened before the request reached the provider
+    (connection refused, DNS failure, connect timeout), True when it may have been received.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return False
+    if not isinstance(error, requests.ConnectionError):
+        return True
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying connection failure
+    cause = error.args[0] if error.args else None
+    reason = getattr(cause, "reason", cause)
+    return not isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+class ProviderThrottled(requests.RequestException):
+    """
+    Raised when a provider is still rate limiting a request (429 or OVER_QUERY_LIMIT) after the final retry.
+    """
+
+
+class CircuitOpen(requests.RequestException):
+    """
+    Raised without calling the provider while its circuit breaker is open.
+
+    Args:
+        message (str): Error message
+        retry_after (float): Seconds until the breaker lets a trial request through
+    """
+
+    def __init__(self, message, retry_after=0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ProviderConfig:
+    """
+    Connection settings for one upstream provider.
+
+    Args:
+        name (str): Provider name, also the prefix for environment overrides
+        connect_timeout (float): Seconds to wait for the TCP/TLS connection
+        read_timeout (float): Seconds to wait for the response
+        max_retries (int): Retries after the first attempt for retryable failures
+        deadline (float): Total seconds one call may take across attempts and backoffs
+        backoff_base (float): Backoff before the first retry, doubled on each retry
+        backoff_max (float): Upper bound on a single backoff
+        pool_size (int): Keep-alive connections kept open to the provider
+        qps (float): Sustained requests per second allowed by the token bucket (0 for no limit)
+        burst (int): Requests that may be sent at once before the rate applies
+        max_concurrency (int): Upper bound (and starting value) for the adaptive in-flight limit
+        min_concurrency (int): Lower bound for the adaptive in-flight limit
+        throttle_statuses (tuple of str): JSON "status" values that mean the provider is rate limiting
+        circuit_breaker (bool): Wrap the provider in a CircuitBreaker configured by the `breaker_*` settings
+        breaker_error_rate (float): Share of failed or slow calls in the window that opens the breaker
+        breaker_min_calls (int): Calls needed in the window before the error rate is judged
+        breaker_window (float): Seconds of recent calls the error rate is measured over
+        breaker_slow_call (float): Calls taking at least this many seconds count as failures
+        breaker_open_seconds (float): Seconds the breaker stays open before a trial call
+        breaker_trial_calls (int): Successful trial calls needed to close the breaker again
+    """
+
+    def __init__(self, name, connect_timeout, read_timeout, max_retries=3, deadline=60.0,
+                 backoff_base=0.5, backoff_max=10.0, pool_size=10,
+                 qps=0, burst=1, max_concurrency=10, min_concurrency=1, throttle_statuses=(),
+                 circuit_breaker=False, breaker_error_rate=0.5, breaker_min_calls=10, breaker_window=60.0,
+                 breaker_slow_call=10.0, breaker_open_seconds=30.0, breaker_trial_calls=1):
+        self.name = name
+        self.connect_timeout = self._setting("connect_timeout", connect_timeout, float)
+        self.read_timeout = self._setting("read_timeout", read_timeout, float)
+        self.max_retries = self._setting("max_retries", max_retries, int)
+        self.deadline = self._setting("deadline", deadline, float)
+        self.backoff_base = self._setting("backoff_base", backoff_base, float)
+        self.backoff_max = self._setting("backoff_max", backoff_max, float)
+        self.pool_size = self._setting("pool_size", pool_size, int)
+        self.qps = self._setting("qps", qps, float)
+        self.burst = self._setting("burst", burst, int)
+        self.max_concurrency = self._setting("max_concurrency", max_concurrency, int)
+        self.min_concurrency = self._setting("min_concurrency", min_concurrency, int)
+        self.throttle_statuses = frozenset(throttle_statuses)
+        self.circuit_breaker = circuit_breaker
+        self.breaker_error_rate = self._setting("breaker_error_rate", breaker_error_rate, float)
+        self.breaker_min_calls = self._setting("breaker_min_calls", breaker_min_calls, int)
+        self.breaker_window = self._setting("breaker_window", breaker_window, float)
+        self.breaker_slow_call = self._setting("breaker_slow_call", breaker_slow_call, float)
+        self.breaker_open_seconds = self._setting("breaker_open_seconds", breaker_open_seconds, float)
+        self.breaker_trial_calls = self._setting("breaker_trial_calls", breaker_trial_calls, int)
+
+    def _setting(self, key, default, cast):
+        value = os.getenv(f"{self.name}_{key}")
+        return cast(value) if value else default
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+
+PROVIDERS = {
+    "dnb": ProviderConfig("dnb", connect_timeout=5, read_timeout=30, max_retries=2, deadline=60,
+                          qps=5, burst=10, max_concurrency=8, circuit_breaker=True),
+    "perplexity": ProviderConfig("perplexity", connect_timeout=5, read_timeout=60, max_retries=3, deadline=120,
+                                 qps=0.8, burst=5, max_concurrency=5),
+    "google": ProviderConfig("google", connect_timeout=3, read_timeout=10, max_retries=3, deadline=30, pool_size=20,
+                             qps=40, burst=40, max_concurrency=20, throttle_statuses=("OVER_QUERY_LIMIT",)),
+}
+
+
+def backoff_delay(config, attempt, retry_after=None):
+    """
+    Returns the seconds to sleep before retry number `attempt` (starting at 0).
+    Uses full jitter: a random delay between 0 and the exponential backoff cap.
+    """
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), config.backoff_max)
+        except ValueError:
+            pass
+    cap = min(config.backoff_max, config.backoff_base * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Each request takes a token; tokens refill at `rate` per second up to `burst`.
+
+    A caller that finds the bucket empty reserves the next token and sleeps until it is due,
+    so waiting callers are served in arrival order.
+
+    Args:
+        rate (float): Tokens added per second (0 for no limit)
+        burst (int): Bucket size
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.waiting = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes a token, sleeping until one is available. Returns the seconds waited."""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if delay:
+                self.waiting += 1
+                self.waits += 1
+                self.wait_seconds += delay
+        if delay:
+            time.sleep(delay)
+            with self._lock:
+                self.waiting -= 1
+        return delay
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on requests in flight.
+
+    Each successful request raises the limit by 1/limit (about +1 per round of requests), up to `maximum`.
+    A throttled request halves it, down to `minimum`; throttles within `cooldown` seconds of the last
+    decrease count as the same event, so one burst of 429s halves the limit once.
+
+    Args:
+        maximum (int): Upper bound and starting limit
+        minimum (int, optional): Lower bound
+        cooldown (float, optional): Seconds after a decrease during which further throttles are ignored
+    """
+
+    def __init__(self, maximum, minimum=1, cooldown=1.0):
+        self.maximum = max(maximum, 1)
+        self.minimum = max(min(minimum, self.maximum), 1)
+        self.cooldown = cooldown
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self.waiting = 0
+        self.decreases = 0
+        self._last_decrease = None
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Blocks until a slot is free under the current limit."""
+        with self._cond:
+            self.waiting += 1
+            self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.waiting -= 1
+            self.in_flight += 1
+
+    def release(self, outcome):
+        """
+        Frees a slot and adjusts the limit.
+
+        Args:
+            outcome (str): "ok" to increase, "throttled" to decrease, anything else leaves the limit alone
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == "ok":
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            elif outcome == "throttled":
+                now = time.monotonic()
+                if self._last_decrease is None or now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+                    self.decreases += 1
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker.
+
+    - Closed: calls go through. Once the window holds at least `min_calls` calls and the share that failed
+      or took at least `slow_call` seconds reaches `error_rate`, the breaker opens
+    - Open: calls are refused for `open_seconds`
+    - Half-open: up to `trial_calls` calls go through at once; `trial_calls` successes close the breaker,
+      any failure opens it again
+
+    Args:
+        error_rate (float): Failure share (0-1) that opens the breaker
+        min_calls (int): Calls needed in the window before the failure share is judged
+        window (float): Seconds of calls kept for the failure share
+        slow_call (float): Latency in seconds at which a successful call still counts as a failure
+        open_seconds (float): Seconds to refuse calls before trying again
+        trial_calls (int): Trial calls allowed (and successes needed) while half-open
+    """
+
+    def __init__(self, error_rate=0.5, min_calls=10, window=60.0, slow_call=10.0, open_seconds=30.0, trial_calls=1):
+        self.error_rate = error_rate
+        self.min_calls = max(min_calls, 1)
+        self.window = window
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.trial_calls = max(trial_calls, 1)
+        self.state = "closed"
+        self.opened = 0
+        self.rejected = 0
+        self._calls = deque()
+        self._opened_at = None
+        self._trials = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+
+    def _open(self, now):
+        self.state = "open"
+        self.opened += 1
+        self._opened_at = now
+        self._calls.clear()
+
+    def retry_after(self):
+        """Seconds until an open breaker lets a trial call through (0 when it is not open)."""
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(self._opened_at + self.open_seconds - time.monotonic(), 0.0)
+
+    def allow(self):
+        """
+        Returns True if a call may go through. A True answer must be followed by record().
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "open" and now - self._opened_at >= self.open_seconds:
+                self.state = "half_open"
+                self._trials = 0
+                self._trial_successes = 0
+            if self.state == "half_open":
+                if self._trials < self.trial_calls:
+                    self._trials += 1
+                    return True
+            elif self.state == "closed":
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, success, seconds):
+        """
+        Records the outcome of an allowed call.
+
+        Args:
+            success (bool): False for errors and 5xx responses
+            seconds (float): How long the call took
+        """
+        failed = not success or seconds >= self.slow_call
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "half_open":
+                self._trials -= 1
+                if failed:
+                    self._open(now)
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.trial_calls:
+                        self.state = "closed"
+                return
+            if self.state != "closed":
+                return
+
+            self._calls.append((now, failed))
+            while self._calls and now - self._calls[0][0] > self.window:
+                self._calls.popleft()
+            failures = sum(f for _, f in self._calls)
+            if len(self._calls) >= self.min_calls and failures / len(self._calls) >= self.error_rate:
+                self._open(now)
+
+    def stats(self):
+        """Returns {"state", "failure_rate", "calls", "opened", "rejected"}."""
+        with self._lock:
+            calls = len(self._calls)
+            failures = sum(f for _, f in self._calls)
+            return {
+                "state": self.state,
+                "failure_rate": round(failures / calls, 3) if calls else 0.0,
+                "calls": calls,
+                "opened": self.opened,
+                "rejected": self.rejected
+            }
+
+
+class ProviderClient:
+    """
+    Pooled HTTP client for one provider with timeouts, bounded jittered retries, a token-bucket
+    rate limit and an adaptive concurrency limit.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.bucket = TokenBucket(config.qps, config.burst)
+        self.concurrency = AdaptiveConcurrency(config.max_concurrency, config.min_concurrency)
+        self.breaker = None
+        if config.circuit_breaker:
+            self.breaker = CircuitBreaker(
+                config.breaker_error_rate, config.breaker_min_calls, config.breaker_window,
+                config.breaker_slow_call, config.breaker_open_seconds, config.breaker_trial_calls
+            )
+        self.requests = 0
+        self.throttled = 0
+        self._stats_lock = threading.Lock()
+
+    def is_throttled(self, response):
+        """True if the response is the provider rate limiting us (429, or a throttle status in the JSON body)."""
+        if response.status_code == 429:
+            return True
+        if self.config.throttle_statuses and response.status_code == 200:
+            try:
+                return response.json().get("status") in self.config.throttle_statuses
+            except (ValueError, AttributeError):
+                return False
+        return False
+
+    def _send(self, method, url, **kwargs):
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpen(f"{self.config.name} circuit breaker is open", retry_after=self.breaker.retry_after())
+        self.bucket.acquire()
+        self.concurrency.acquire()
+        outcome = "error"
+        started = time.monotonic()
+        try:
+            response = self.session.request(method, url, **kwargs)
+            throttled = self.is_throttled(response)
+            outcome = "throttled" if throttled else "ok" if response.status_code < 500 else "error"
+        finally:
+            self.concurrency.release(outcome)
+            if self.breaker is not None:
+                # Throttling means the service is up; only errors and slow calls count against it
+                self.breaker.record(outcome != "error", time.monotonic() - started)
+            with self._stats_lock:
+                self.requests += 1
+                self.throttled += outcome == "throttled"
+        return response, throttled
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends a request, retrying throttled/5xx responses and connection errors until the retries or
+        the provider's `deadline` run out. Non-idempotent methods (POST, PATCH) are only retried when
+        the provider cannot have acted on the request (see request_was_sent and REJECTED_STATUS_CODES).
+
+        Returns:
+            requests.Response: The last response received, which may still be a 5xx after the final retry
+
+        Raises:
+            ProviderThrottled: If the provider is still rate limiting after the final retry
+            CircuitOpen: If the provider's circuit breaker is open
+            requests.RequestException: If the final attempt fails without a response
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        timeout = kwargs.pop("timeout", None)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = self.config.deadline - (time.monotonic() - started)
+            if timeout is None:
+                # Never wait on a read past the call's deadline
+                kwargs["timeout"] = (self.config.connect_timeout, max(min(self.config.read_timeout, remaining), 0.1))
+            else:
+                kwargs["timeout"] = timeout
+            try:
+                response, throttled = self._send(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.config.max_retries or (not idempotent and request_was_sent(e)):
+                    raise
+                delay = backoff_delay(self.config, attempt)
+                if not self._time_left(started, delay):
+                    raise
+                print(f"{self.config.name} request failed ({str(e)}), retrying in {delay:.2f}s")
+            else:
+                retryable = throttled or response.status_code in (RETRY_STATUS_CODES if idempotent else REJECTED_STATUS_CODES)
+                if not retryable:
+                    return response
+                delay = backoff_delay(self.config, attempt, response.headers.get("Retry-After"))
+                if attempt >= self.config.max_retries or not self._time_left(started, delay):
+                    if throttled:
+                        raise ProviderThrottled(f"{self.config.name} is rate limiting requests", response=response)
+                    return response
+                reason = "a rate limit" if throttled else response.status_code
+                print(f"{self.config.name} returned {reason}, retrying in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def _time_left(self, started, delay):
+        # Another attempt only helps if it can start before the deadline with time to connect
+        return time.monotonic() - started + delay + self.config.connect_timeout < self.config.deadline
+
+    def stats(self):
+        """
+        Returns the provider's limits and counters:
+        {"qps", "burst", "concurrency_limit", "in_flight", "queue_depth", "requests", "throttled",
+         "rate_limited", "rate_limit_wait_seconds", "concurrency_decreases", "circuit"}
+        where "circuit" is CircuitBreaker.stats(), or None for providers without a breaker
+        """
+        return {
+            "qps": self.config.qps,
+            "burst": self.bucket.burst,
+            "concurrency_limit": int(self.concurrency.limit),
+            "in_flight": self.concurrency.in_flight,
+            "queue_depth": self.bucket.waiting + self.concurrency.waiting,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "rate_limited": self.bucket.waits,
+            "rate_limit_wait_seconds": round(self.bucket.wait_seconds, 3),
+            "concurrency_decreases": self.concurrency.decreases,
+            "circuit": self.breaker.stats() if self.breaker is not None else None
+        }
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(provider):
+    """
+    Returns the shared ProviderClient for a provider, creating it on first use.
+
+    Args:
+        provider (str): One of the keys in PROVIDERS
+
+    Raises:
+        KeyError: If the provider is not configured
+    """
+    with _clients_lock:
+        if provider not in _clients:
+            _clients[provider] = ProviderClient(PROVIDERS[provider])
+        return _clients[provider]
+
+
+def provider_stats():
+    """
+    Returns ProviderClient.stats() for every provider used so far in this process.
+    """
+    with _clients_lock:
+        clients = dict(_clients)
+    return {name: client.stats() for name, client in clients.items()}
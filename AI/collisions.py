@@ -0,0 +1,125 @@
+import threading
+
+from AI.matching import canonical_name, canonical_row_address
+
+
+"""
+COLLISION INDEX DOCS:
+
+Finds every Account and Vendor in the portfolio that shares a name or address with a vendor,
+without scanning the tables.
+
+- Two hash maps: canonical name -> entities, canonical address -> entities (see AI/matching.py)
+- An entity is ("account", ID) or ("vendor", ID)
+- A lookup reads the two buckets for the vendor's keys: O(1) in the portfolio size
+- `upsert` and `remove` keep the maps current as rows change; an upsert first removes the row's old keys
+
+The address key is (street, unit, state, ZIP). The city is left out because the ZIP already pins it and
+city spellings vary more than ZIPs.
+"""
+
+
+def name_key(row):
+    return canonical_name(row.get("Name")) or None
+
+
+def address_key(row):
+    address = canonical_row_address(row)
+    if not address.street:
+        return None
+    return (address.street, address.unit, address.state, address.zip)
+
+
+class CollisionIndex:
+    """
+    Index of Account and Vendor rows by canonical name and canonical address.
+
+    Args:
+        accounts (list, optional): Account rows
+        vendors (list, optional): Vendor rows
+    """
+
+    def __init__(self, accounts=(), vendors=()):
+        self._by_name = {}
+        self._by_address = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+        for row in accounts:
+            self.upsert("account", row)
+        for row in vendors:
+            self.upsert("vendor", row)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _discard(self, entity):
+        name, address = self._keys.pop(entity, (None, None))
+        for buckets, key in ((self._by_name, name), (self._by_address, address)):
+            if key is not None:
+                bucket = buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(entity)
+                    if not bucket:
+                        del buckets[key]
+
+    def upsert(self, kind, row):
+        """
+        Adds a row, or re-indexes it under its current name and address.
+
+        Args:
+            kind (str): "account" or "vendor"
+            row (dict): Row with ID, Name, Street, City, State, ZIP and Country columns
+        """
+        entity = (kind, row["ID"])
+        name, address = name_key(row), address_key(row)
+        with self._lock:
+            self._discard(entity)
+            self._keys[entity] = (name, address)
+            if name is not None:
+                self._by_name.setdefault(name, set()).add(entity)
+            if address is not None:
+                self._by_address.setdefault(address, set()).add(entity)
+
+    def remove(self, kind, entity_id):
+        """Removes a row from the index."""
+        with self._lock:
+            self._discard((kind, entity_id))
+
+    def collisions(self, row, kind="vendor"):
+        """
+        Returns the other accounts and vendors sharing the row's canonical name or address.
+
+        Args:
+            row (dict): Vendor (or Account) row
+            kind (str, optional): The row's own kind, so it is not reported as colliding with itself
+
+        Returns:
+            dict: {"accounts": [{"id", "name_match", "address_match"}], "vendors": [...]}
+        """
+        name, address = name_key(row), address_key(row)
+        with self._lock:
+            by_name = set(self._by_name.get(name, ())) if name is not None else set()
+            by_address = set(self._by_address.get(address, ())) if address is not None else set()
+        by_name.discard((kind, row.get("ID")))
+        by_address.discard((kind, row.get("ID")))
+
+        results = {"accounts": [], "vendors": []}
+        for entity in sorted(by_name | by_address, key=lambda e: (e[0], str(e[1]))):
+            results[entity[0] + "s"].append({
+                "id": entity[1],
+                "name_match": entity in by_name,
+                "address_match": entity in by_address
+            })
+        return results
+
+
+def build_collision_index(db_driver):
+    """
+    Builds a CollisionIndex over every Account and Vendor row.
+
+    Returns:
+        CollisionIndex: The populated index
+    """
+    index = CollisionIndex(db_driver.get_accounts(), db_driver.get_vendors())
+    print(f"Built collision index over {len(index)} accounts and vendors")
+    return index
@@ -0,0 +1,106 @@
+import sys, os
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+
+"""
+VENDOR CONTEXT DOCS:
+
+- Holds everything the due diligence tasks read about a vendor for one screening run
+- Loaded once per run so each task does not refetch the same `Vendor`, `Account` and `Equipment` rows
+- Every task in `AI/tasks.py` accepts `context=`; when it is omitted the task loads its own from `vendor_id`
+"""
+
+
+def format_address(row, include_country=False):
+    """
+    Formats a Vendor or Account row as a single address string.
+
+    Args:
+        row (dict): Row with Street, City, State, ZIP (and Country) columns
+        include_country (bool): Whether to append the country
+
+    Returns:
+        str: "Street, City, State, ZIP" or "Street, City, State, ZIP, Country"
+    """
+    address = f"{row['Street']}, {row['City']}, {row['State']}, {row['ZIP']}"
+    if include_country:
+        address += f", {row['Country']}"
+    return address
+
+
+class VendorContext:
+    """
+    Hydrated vendor (and optional account) data shared by the tasks in a screening run.
+
+    Attributes:
+        vendor_id (str): The vendor ID
+        vendor (dict): The Vendor row
+        account (dict): The Account row including its "Equipment" list, or None when no account was loaded
+        equipment (list): Equipment rows for the account
+        country (str): Stripped Vendor.Country, or None
+        vendor_address (str): "Street, City, State, ZIP" for the vendor
+        vendor_full_address (str): Vendor address including the country
+        account_full_address (str): Account address including the country, or None
+    """
+
+    def __init__(self, vendor_id, vendor, account=None):
+        self.vendor_id = vendor_id
+        self.vendor = vendor
+        self.account = account
+        self.equipment = account.get("Equipment", []) if account else []
+
+        country = vendor.get("Country")
+        self.country = country.strip() if country else None
+
+        self.vendor_address = format_address(vendor)
+        self.vendor_full_address = format_address(vendor, include_country=True)
+        self.account_full_address = format_address(account, include_country=True) if account else None
+
+    @property
+    def vendor_name(self):
+        return self.vendor["Name"]
+
+    def due_diligence_data(self):
+        """
+        Returns the same dictionary as DatabaseDriver.due_diligence_check, or None without an account.
+        """
+        if not self.account:
+            return None
+        return {
+            "Account.Name": self.account["Name"],
+            "Account.Address": self.account_full_address,
+            "Vendor.Name": self.vendor["Name"],
+            "Vendor.Address": self.vendor_full_address,
+            "Vendor.Website": self.vendor["Website"]
+        }
+
+
+def load_vendor_context(db_driver, vendor_id, account_id=None):
+    """
+    Loads the vendor, and the account with its equipment when account_id is given, in one round trip.
+
+    Args:
+        db_driver (DatabaseDriver): Driver used for the reads
+        vendor_id (str): The vendor ID
+        account_id (str, optional): Borrower account ID
+
+    Returns:
+        VendorContext: Hydrated context, or None if the vendor (or the requested account) does not exist
+    """
+    account = None
+    if account_id is not None:
+        account, vendor = db_driver.get_account_and_vendor(account_id, vendor_id)
+    else:
+        vendor = db_driver.get_vendor_by_id(vendor_id)
+
+    if not vendor:
+        print(f"Vendor with ID {vendor_id} not found")
+        return None
+    if account_id is not None and not account:
+        print(f"Account with ID {account_id} not found")
+        return None
+
+    return VendorContext(vendor_id, vendor, account)
@@ -0,0 +1,195 @@
+from html.parser import HTMLParser
+
+
+"""
+HTML DISTILLATION DOCS:
+
+Turns a scraped page into compact text before it is sent to an LLM.
+
+- Drops markup that never holds results: scripts, styles, navigation, headers/footers, SVG, iframes
+- Drops hidden elements (`hidden`, `aria-hidden="true"`, `display:none`, hidden inputs)
+- Keeps visible text in document order, one block per line
+- Keeps table rows as pipe-separated cells so search-result tables survive as compact records
+- Enforces a token budget (estimated at 4 characters per token) and reports what was cut
+"""
+
+CHARS_PER_TOKEN = 4
+
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer", "head", "iframe", "select"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "aside", "li", "ul", "ol", "dl", "dt", "dd",
+              "h1", "h2", "h3", "h4", "h5", "h6", "br", "hr", "form", "fieldset"}
+
+
+def _is_hidden(attrs):
+    attrs = dict(attrs)
+    style = (attrs.get("style") or "").replace(" ", "").lower()
+    return (
+        "hidden" in attrs
+        or (attrs.get("aria-hidden") or "").lower() == "true"
+        or "display:none" in style
+        or "visibility:hidden" in style
+    )
+
+
+class _DistillParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines = []
+        self.tables = []
+        self.table_rows = 0
+        self._tables = []
+        self._skip = []
+        self._line = []
+        self._row = None
+        self._cell = None
+        self._table_depth = 0
+
+    def _flush_line(self):
+        text = " ".join(" ".join(self._line).split())
+        if text:
+            self.lines.append(text)
+        self._line = []
+
+    def _finish_cell(self):
+        if self._row is not None and self._cell is not None:
+            self._row.append(" ".join(" ".join(self._cell).split()))
+        self._cell = None
+
+    def _finish_row(self):
+        self._finish_cell()
+        if self._row is not None and any(self._row):
+            self.lines.append(" | ".join(self._row))
+            self.table_rows += 1
+            if self._tables:
+                self._tables[-1].append(self._row)
+        self._row = None
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip:
+            if tag == self._skip[-1] and tag not in VOID_TAGS:
+                self._skip.append(tag)
+            return
+        if tag in VOID_TAGS:
+            if tag in ("br", "hr") and self._table_depth == 0:
+                self._flush_line()
+            return
+        if tag in SKIPPED_TAGS or _is_hidden(attrs):
+            self._skip.append(tag)
+            return
+
+        if tag == "table":
+            self._flush_line()
+            self._finish_row()
+            self._table_depth += 1
+            self._tables.append([])
+        elif tag == "tr" and self._table_depth:
+            self._finish_row()
+            self._row = []
+        elif tag in ("td", "th") and self._table_depth:
+            self._finish_cell()
+            if self._row is None:
+                self._row = []
+            self._cell = []
+        elif tag in BLOCK_TAGS and self._table_depth == 0:
+            self._flush_line()
+
+    def handle_endtag(self, tag):
+        if self._skip:
+            if tag == self._skip[-1]:
+                self._skip.pop()
+            return
+
+        if tag == "table" and self._table_depth:
+            self._finish_row()
+            self._table_depth -= 1
+            table = self._tables.pop()
+            if table:
+                self.tables.append(table)
+        elif tag == "tr" and self._table_depth:
+            self._finish_row()
+        elif tag in ("td", "th") and self._table_depth:
+            self._finish_cell()
+        elif tag in BLOCK_TAGS and self._table_depth == 0:
+            self._flush_line()
+
+    def handle_data(self, data):
+        if self._skip or not data.strip():
+            return
+        if self._cell is not None:
+            self._cell.append(data)
+        elif self._table_depth == 0:
+            self._line.append(data)
+
+    def close(self):
+        super().close()
+        self._finish_row()
+        self._flush_line()
+
+
+def estimate_tokens(text):
+    """Rough token count used for prompt budgets."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def extract_tables(html):
+    """
+    Returns the visible tables of a page as lists of rows, each row a list of cell texts.
+    Hidden and non-content markup is skipped the same way as in distill_html.
+    """
+    parser = _DistillParser()
+    parser.feed(html or "")
+    parser.close()
+    return parser.tables
+
+
+def distill_html(html, max_tokens=3000):
+    """
+    Distills an HTML page to the visible text and table rows, within a token budget.
+
+    Args:
+        html (str): Raw page HTML (e.g. from Playwright's page.content())
+        max_tokens (int, optional): Estimated token budget for the returned text
+
+    Returns:
+        dict:
+            {
+                "text": Distilled text, one block or table row per line,
+                "telemetry": {
+                    "original_chars": Length of the raw HTML,
+                    "distilled_chars": Length of the returned text,
+                    "estimated_tokens": Estimated tokens of the returned text,
+                    "table_rows": Table rows found in the page,
+                    "truncated": Whether lines were dropped to fit the budget,
+                    "dropped_lines": Number of lines dropped
+                }
+            }
+    """
+    parser = _DistillParser()
+    parser.feed(html or "")
+    parser.close()
+
+    # Remove consecutive duplicate lines (repeated labels, pagination controls)
+    lines = [line for i, line in enumerate(parser.lines) if i == 0 or line != parser.lines[i - 1]]
+
+    budget = max_tokens * CHARS_PER_TOKEN
+    kept = []
+    used = 0
+    for line in lines:
+        if used + len(line) + 1 > budget:
+            break
+        kept.append(line)
+        used += len(line) + 1
+
+    text = "\n".join(kept)
+    return {
+        "text": text,
+        "telemetry": {
+            "original_chars": len(html or ""),
+            "distilled_chars": len(text),
+            "estimated_tokens": estimate_tokens(text),
+            "table_rows": parser.table_rows,
+            "truncated": len(kept) < len(lines),
+            "dropped_lines": len(lines) - len(kept)
+        }
+    }
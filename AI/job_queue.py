@@ -0,0 +1,317 @@
+import os
+import json
+import time
+import uuid
+import random
+import sqlite3
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+
+"""
+JOB QUEUE DOCS:
+
+Durable work queue in a local SQLite file, shared by the API and any number of worker processes
+on the same machine. Queued work survives restarts of either.
+
+- `enqueue` stores a job as "queued"
+- `lease` atomically claims the oldest available job for `visibility_timeout` seconds and returns a lease token
+- `ack` marks a leased job "done" and stores its result; `nack` records the error and re-queues it
+  after an exponential backoff (`queue_retry_backoff` * 2^(attempt - 1), capped at `queue_retry_backoff_max`)
+- A lease that is not acked or extended in time expires and the job becomes available again,
+  so work held by a crashed worker is picked up by another one
+- `defer` re-queues a leased job after a given delay with a new payload, for work that could not run yet
+  (a screen whose provider was throttled or unavailable is retried for its deferred tasks only)
+- After `max_attempts` attempts (`queue_max_attempts`, default 3) a job is "dead" and is not retried
+
+Only the holder of the current lease token can ack, nack, extend or report progress on a job.
+
+The file lives at `.cache/job_queue.sqlite3` in the project root unless `job_queue_path` is set in the environment.
+"""
+
+DEFAULT_QUEUE_PATH = Path(__file__).resolve().parent.parent / ".cache" / "job_queue.sqlite3"
+DEFAULT_VISIBILITY_TIMEOUT = 600
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_BACKOFF = 30
+DEFAULT_RETRY_BACKOFF_MAX = 3600
+
+LeasedJob = namedtuple("LeasedJob", ["id", "batch_id", "kind", "payload", "attempts", "token"])
+
+
+class JobQueue:
+    """
+    Lease-based job queue backed by a local SQLite file. Safe to share between threads and processes.
+
+    Args:
+        path (str or Path, optional): SQLite file location. Defaults to `job_queue_path` or .cache/job_queue.sqlite3
+        visibility_timeout (float, optional): Seconds a lease lasts. Defaults to `queue_visibility_timeout` or 600
+        max_attempts (int, optional): Attempts before a job is dead. Defaults to `queue_max_attempts` or 3
+        retry_backoff (float, optional): Delay before the first retry. Defaults to `queue_retry_backoff` or 30
+        retry_backoff_max (float, optional): Longest retry delay. Defaults to `queue_retry_backoff_max` or 3600
+    """
+
+    def __init__(self, path=None, visibility_timeout=None, max_attempts=None, retry_backoff=None, retry_backoff_max=None):
+        self.path = str(path or os.getenv("job_queue_path") or DEFAULT_QUEUE_PATH)
+        self.visibility_timeout = visibility_timeout or float(os.getenv("queue_visibility_timeout") or DEFAULT_VISIBILITY_TIMEOUT)
+        self.max_attempts = max_attempts or int(os.getenv("queue_max_attempts") or DEFAULT_MAX_ATTEMPTS)
+        self.retry_backoff = retry_backoff if retry_backoff is not None else float(os.getenv("queue_retry_backoff") or DEFAULT_RETRY_BACKOFF)
+        self.retry_backoff_max = retry_backoff_max or float(os.getenv("queue_retry_backoff_max") or DEFAULT_RETRY_BACKOFF_MAX)
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # Other processes hold the write lock only for a single statement or lease; wait for them instead of failing
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS queue_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                batch_id TEXT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                available_at REAL NOT NULL,
+                lease_token TEXT,
+                leased_until REAL,
+                progress TEXT,
+                result TEXT,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_queue_available ON queue_jobs (status, available_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_queue_batch ON queue_jobs (batch_id)")
+
+    def enqueue(self, kind, payload, batch_id=None, delay=0, max_attempts=None):
+        """
+        Adds a job.
+
+        Args:
+            kind (str): Job type the worker dispatches on (e.g. "vendor_screen")
+            payload (dict): JSON-serializable job arguments
+            batch_id (str, optional): Groups jobs submitted together
+            delay (float, optional): Seconds before the job can be leased
+            max_attempts (int, optional): Overrides the queue's max_attempts
+
+        Returns:
+            int: The job ID
+        """
+        return self.enqueue_many(kind, [payload], batch_id=batch_id, delay=delay, max_attempts=max_attempts)[0]
+
+    def enqueue_many(self, kind, payloads, batch_id=None, delay=0, max_attempts=None):
+        """
+        Adds several jobs in one transaction. Returns their IDs in order.
+        """
+        now = time.time()
+        ids = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for payload in payloads:
+                    cursor = self._conn.execute(
+                        "INSERT INTO queue_jobs (batch_id, kind, payload, status, max_attempts, available_at, created_at, updated_at) "
+                        "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                        (batch_id, kind, json.dumps(payload), max_attempts or self.max_attempts, now + delay, now, now)
+                    )
+                    ids.append(cursor.lastrowid)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def lease(self, kinds=None, visibility_timeout=None):
+        """
+        Claims the oldest available job.
+
+        Args:
+            kinds (list of str, optional): Only lease jobs of these kinds
+            visibility_timeout (float, optional): Lease length in seconds. Defaults to the queue's visibility_timeout
+
+        Returns:
+            LeasedJob: (id, batch_id, kind, payload, attempts, token), or None if no job is available
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        kind_filter = ""
+        params = [now]
+        if kinds:
+            kind_filter = f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._expire_leases(now)
+                row = self._conn.execute(
+                    "SELECT id, batch_id, kind, payload, attempts FROM queue_jobs "
+                    f"WHERE status = 'queued' AND available_at <= ?{kind_filter} ORDER BY available_at, id LIMIT 1",
+                    params
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE queue_jobs SET status = 'leased', attempts = attempts + 1, lease_token = ?, "
+                        "leased_until = ?, updated_at = ? WHERE id = ?",
+                        (token, now + (visibility_timeout or self.visibility_timeout), now, row[0])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return LeasedJob(row[0], row[1], row[2], json.loads(row[3]), row[4] + 1, token)
+
+    def _expire_leases(self, now):
+        # Leases that ran out count as failed attempts: re-queue them, or mark them dead once out of attempts
+        self._conn.execute(
+            "UPDATE queue_jobs SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'queued' END, "
+            "lease_token = NULL, leased_until = NULL, available_at = ?, updated_at = ?, "
+            "last_error = 'Lease expired before the job was acked' "
+            "WHERE status = 'leased' AND leased_until <= ?",
+            (now, now, now)
+        )
+
+    def _update_leased(self, job_id, token, assignments, params):
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE queue_jobs SET {assignments}, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (*params, time.time(), job_id, token)
+            )
+        return cursor.rowcount == 1
+
+    def ack(self, job_id, token, result=None):
+        """
+        Marks a leased job done. Returns False if the lease was lost (expired and re-leased).
+        """
+        return self._update_leased(
+            job_id, token,
+            "status = 'done', lease_token = NULL, leased_until = NULL, result = ?",
+            (json.dumps(result, default=str),)
+        )
+
+    def nack(self, job_id, token, error=None):
+        """
+        Records a failed attempt and re-queues the job after a backoff, or marks it dead once out of attempts.
+        Returns False if the lease was lost.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM queue_jobs WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (job_id, token)
+            ).fetchone()
+        if row is None:
+            return False
+        attempts, max_attempts = row
+        if attempts >= max_attempts:
+            return self._update_leased(
+                job_id, token,
+                "status = 'dead', lease_token = NULL, leased_until = NULL, last_error = ?",
+                (error,)
+            )
+        return self._update_leased(
+            job_id, token,
+            "status = 'queued', lease_token = NULL, leased_until = NULL, available_at = ?, last_error = ?",
+            (time.time() + self.backoff(attempts), error)
+        )
+
+    def defer(self, job_id, token, delay, payload=None, result=None, error=None):
+        """
+        Re-queues a leased job to run again in `delay` seconds, optionally with a new payload and the
+        partial result so far (e.g. a screen whose provider was unavailable, retried for the deferred tasks only).
+        The attempt counts towards max_attempts like a nack.
+
+        Returns:
+            bool: True if the job was re-queued; False if it is out of attempts (the caller should ack it
+                with what it has) or the lease was lost
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts, payload FROM queue_jobs WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (job_id, token)
+            ).fetchone()
+        if row is None or row[0] >= row[1]:
+            return False
+        return self._update_leased(
+            job_id, token,
+            "status = 'queued', lease_token = NULL, leased_until = NULL, available_at = ?, payload = ?, result = ?, last_error = ?",
+            (time.time() + delay, json.dumps(payload) if payload is not None else row[2],
+             json.dumps(result, default=str) if result is not None else None, error)
+        )
+
+    def backoff(self, attempts):
+        """Seconds to wait before retrying a job that has failed `attempts` times (with up to 10% jitter)."""
+        delay = min(self.retry_backoff * 2 ** (attempts - 1), self.retry_backoff_max)
+        return delay * (1 + random.random() * 0.1)
+
+    def extend(self, job_id, token, visibility_timeout=None):
+        """
+        Pushes a lease's expiry out by `visibility_timeout` seconds from now. Returns False if the lease was lost.
+        """
+        return self._update_leased(
+            job_id, token,
+            "leased_until = ?",
+            (time.time() + (visibility_timeout or self.visibility_timeout),)
+        )
+
+    def set_progress(self, job_id, token, progress):
+        """
+        Stores a JSON-serializable progress report for a leased job. Returns False if the lease was lost.
+        """
+        return self._update_leased(job_id, token, "progress = ?", (json.dumps(progress),))
+
+    def _job(self, row):
+        (job_id, batch_id, kind, payload, status, attempts, max_attempts, available_at,
+         progress, result, last_error, created_at, updated_at) = row
+        return {
+            "id": job_id,
+            "batch_id": batch_id,
+            "kind": kind,
+            "payload": json.loads(payload),
+            "status": status,
+            "attempts": attempts,
+            "max_attempts": max_attempts,
+            "available_at": available_at,
+            "progress": json.loads(progress) if progress else {},
+            "result": json.loads(result) if result else None,
+            "last_error": last_error,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+    _COLUMNS = ("id, batch_id, kind, payload, status, attempts, max_attempts, available_at, "
+                "progress, result, last_error, created_at, updated_at")
+
+    def get(self, job_id):
+        """Returns a job as a dict, or None if the ID is unknown."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {self._COLUMNS} FROM queue_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    def get_batch(self, batch_id):
+        """Returns the jobs enqueued with `batch_id`, in submission order."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM queue_jobs WHERE batch_id = ? ORDER BY id", (batch_id,)
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def stats(self):
+        """
+        Returns job counts by status, e.g. {"queued": 3, "leased": 1, "done": 10, "dead": 0}.
+        """
+        counts = {"queued": 0, "leased": 0, "done": 0, "dead": 0}
+        with self._lock:
+            for status, count in self._conn.execute("SELECT status, COUNT(*) FROM queue_jobs GROUP BY status"):
+                counts[status] = count
+        return counts
+
+    def close(self):
+        """Closes the SQLite connection."""
+        with self._lock:
+            self._conn.close()
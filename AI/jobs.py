@@ -0,0 +1,327 @@
+import os
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+"""
+SCREENING JOBS DOCS:
+
+Runs due diligence for a batch of (account, vendor) pairs in the background so the API can answer right away.
+
+- `JobManager.submit` records the job and queues one `run_vendor_pipeline` call per pair, returning the job ID
+- Pairs run on a shared pool of `job_workers` threads (default 4), so a large batch never starts more
+  screens at once than the pool allows; each screen still runs its own tasks concurrently (AI/pipeline.py)
+- `JobManager.get` returns a snapshot of the job: per-pair status, per-task status
+  ("pending", "running", "done", "failed") and, once a pair finishes, its results, errors, timings and
+  the tasks that were deferred because their provider was unavailable
+- Jobs are kept in memory; the oldest finished jobs are dropped once more than `job_history` (default 1000) are stored
+
+With `job_backend=queue`, QueuedJobManager puts each pair on the durable SQLite queue (AI/job_queue.py)
+instead, and separate `python -m AI.worker` processes run the screens. Snapshots have the same shape.
+Only the queue retries deferred tasks: the worker re-queues the screen for them after the provider's
+retry_after, and the item shows "retrying" meanwhile. The rerun skips downstream tasks that already
+finished, so their flags and the screening email are not repeated. In-process jobs report them under "deferred".
+"""
+
+DEFAULT_JOB_WORKERS = 4
+DEFAULT_JOB_HISTORY = 1000
+SCREEN_JOB = "vendor_screen"
+
+
+def json_safe(value):
+    """Round-trips a result through JSON so snapshots can always be serialized."""
+    return json.loads(json.dumps(value, default=str))
+
+
+def _now(timestamp=None):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+def screen_status(outcome):
+    """
+    A screen whose vendor could not be loaded, or whose results could not be saved, failed;
+    any other finished screen is done.
+    """
+    errors = outcome.get("errors") or {}
+    return "failed" if "context" in errors or "writes" in errors else "done"
+
+
+def retryable(outcome):
+    """True when a finished screen should run again: its results were not saved."""
+    return "writes" in (outcome.get("errors") or {})
+
+
+def retry_delay(outcome, default):
+    """
+    Seconds to wait before rerunning a screen's deferred tasks: the longest retry_after the
+    deferred tasks reported, or `default` when none did.
+    """
+    delays = [
+        (outcome["results"].get(name) or {}).get("retry_after")
+        for name in outcome.get("deferred") or []
+    ]
+    delays = [float(delay) for delay in delays if delay]
+    return max(delays) if delays else default
+
+
+def completed_tasks(outcome):
+    """
+    Names of the tasks in a screen's result that finished: they did not raise and were not deferred.
+    """
+    errors = outcome.get("errors") or {}
+    return sorted(
+        name for name, result in (outcome.get("results") or {}).items()
+        if result is not None and name not in errors and not (isinstance(result, dict) and result.get("deferred"))
+    )
+
+
+def merge_outcomes(previous, outcome):
+    """
+    Combines an earlier screen's result with a rerun of some of its tasks; the rerun's entries win.
+    """
+    rerun = set(outcome.get("results") or {})
+    errors = {name: error for name, error in (previous.get("errors") or {}).items() if name not in rerun}
+    return {
+        **outcome,
+        "results": {**(previous.get("results") or {}), **(outcome.get("results") or {})},
+        "errors": {**errors, **(outcome.get("errors") or {})},
+        "timings": {**(previous.get("timings") or {}), **(outcome.get("timings") or {})},
+        "total_seconds": round((previous.get("total_seconds") or 0) + (outcome.get("total_seconds") or 0), 3)
+    }
+
+
+def _progress(items):
+    return {
+        "total": len(items),
+        "done": sum(item["status"] == "done" for item in items),
+        "failed": sum(item["status"] == "failed" for item in items)
+    }
+
+
+class JobManager:
+    """
+    Background runner for batches of vendor screens.
+
+    Args:
+        max_workers (int, optional): Pairs screened at once. Defaults to `job_workers` or 4
+        history (int, optional): Jobs kept in memory. Defaults to `job_history` or 1000
+        run (callable, optional): Called as run(account_id, vendor_id, refresh=..., on_progress=...).
+            Defaults to run_vendor_pipeline
+    """
+
+    def __init__(self, max_workers=None, history=None, run=None):
+        self.max_workers = max_workers or int(os.getenv("job_workers") or DEFAULT_JOB_WORKERS)
+        self.history = history or int(os.getenv("job_history") or DEFAULT_JOB_HISTORY)
+        self._run = run
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="screening-job")
+
+    def submit(self, pairs, refresh=False):
+        """
+        Queues a batch of screens.
+
+        Args:
+            pairs (list of dict): [{"account_id": ..., "vendor_id": ...}]
+            refresh (bool, optional): Bypass cached upstream responses for every screen in the batch
+
+        Returns:
+            str: The job ID
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "created_at": _now(),
+            "finished_at": None,
+            "items": [
+                {
+                    "account_id": pair["account_id"],
+                    "vendor_id": pair["vendor_id"],
+                    "status": "queued",
+                    "tasks": {},
+                    "results": None,
+                    "errors": {},
+                    "timings": {},
+                    "total_seconds": None,
+                    "deferred": []
+                }
+                for pair in pairs
+            ]
+        }
+        if not job["items"]:
+            job["status"] = "done"
+            job["finished_at"] = job["created_at"]
+        with self._lock:
+            self._jobs[job_id] = job
+            self._trim()
+        for item in job["items"]:
+            self._executor.submit(self._run_item, job, item, refresh)
+        return job_id
+
+    def get(self, job_id):
+        """
+        Returns a snapshot of a job, or None if the ID is unknown.
+
+        Returns:
+            dict: {"job_id", "status", "created_at", "finished_at", "progress": {"total", "done", "failed"}, "items": [...]}
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = {
+                **job,
+                "items": [{**item, "tasks": dict(item["tasks"])} for item in job["items"]]
+            }
+        snapshot["progress"] = _progress(snapshot["items"])
+        return snapshot
+
+    def shutdown(self, wait=True):
+        """Stops accepting pairs; with wait=True, returns once the queued and running screens finish."""
+        self._executor.shutdown(wait=wait)
+
+    def _trim(self):
+        # Drop the oldest finished jobs first; running jobs are never dropped
+        excess = len(self._jobs) - self.history
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id]["status"] == "done":
+                del self._jobs[job_id]
+                excess -= 1
+
+    def _run_item(self, job, item, refresh):
+        run = self._run
+        if run is None:
+            from AI.pipeline import run_vendor_pipeline
+            run = run_vendor_pipeline
+
+        def on_progress(name, status):
+            with self._lock:
+                item["tasks"][name] = status
+
+        with self._lock:
+            item["status"] = "running"
+            job["status"] = "running"
+
+        try:
+            outcome = run(item["account_id"], item["vendor_id"], refresh=refresh, on_progress=on_progress)
+            outcome = json_safe(outcome)
+            status = screen_status(outcome)
+        except Exception as e:
+            print(f"Error screening vendor {item['vendor_id']} for job {job['job_id']}: {str(e)}")
+            outcome = {"errors": {"pipeline": str(e)}}
+            status = "failed"
+
+        with self._lock:
+            item["results"] = outcome.get("results")
+            item["errors"] = outcome.get("errors", {})
+            item["timings"] = outcome.get("timings", {})
+            item["total_seconds"] = outcome.get("total_seconds")
+            item["deferred"] = outcome.get("deferred", [])
+            item["status"] = status
+            if all(i["status"] in ("done", "failed") for i in job["items"]):
+                job["status"] = "done"
+                job["finished_at"] = _now()
+
+
+class QueuedJobManager:
+    """
+    Submits batches to the durable job queue for worker processes (AI/worker.py) to run.
+
+    Args:
+        queue (JobQueue, optional): The queue. Defaults to a JobQueue at `job_queue_path`
+    """
+
+    def __init__(self, queue=None):
+        if queue is None:
+            from AI.job_queue import JobQueue
+            queue = JobQueue()
+        self.queue = queue
+
+    def submit(self, pairs, refresh=False):
+        """
+        Enqueues one screen per pair.
+
+        Returns:
+            str: The job ID
+        """
+        job_id = uuid.uuid4().hex
+        self.queue.enqueue_many(SCREEN_JOB, [
+            {"account_id": pair["account_id"], "vendor_id": pair["vendor_id"], "refresh": refresh}
+            for pair in pairs
+        ], batch_id=job_id)
+        return job_id
+
+    def get(self, job_id):
+        """
+        Returns a snapshot of a job in the same shape as JobManager.get, or None if the ID is unknown.
+        """
+        rows = self.queue.get_batch(job_id)
+        if not rows:
+            return None
+
+        items = []
+        for row in rows:
+            outcome = row["result"] or {}
+            if row["status"] == "done":
+                status = screen_status(outcome)
+            elif row["status"] == "dead":
+                status = "failed"
+            elif row["status"] == "leased":
+                status = "running"
+            else:
+                status = "retrying" if row["attempts"] else "queued"
+            errors = outcome.get("errors") or {}
+            if row["status"] != "done" and row["last_error"]:
+                errors = {"pipeline": row["last_error"]}
+            items.append({
+                "account_id": row["payload"]["account_id"],
+                "vendor_id": row["payload"]["vendor_id"],
+                "status": status,
+                "attempts": row["attempts"],
+                "tasks": row["progress"],
+                "results": outcome.get("results"),
+                "errors": errors,
+                "timings": outcome.get("timings", {}),
+                "total_seconds": outcome.get("total_seconds"),
+                "deferred": outcome.get("deferred", [])
+            })
+
+        finished = all(item["status"] in ("done", "failed") for item in items)
+        started = any(item["status"] != "queued" for item in items)
+        return {
+            "job_id": job_id,
+            "status": "done" if finished else "running" if started else "queued",
+            "created_at": _now(rows[0]["created_at"]),
+            "finished_at": _now(max(row["updated_at"] for row in rows)) if finished else None,
+            "items": items,
+            "progress": _progress(items)
+        }
+
+    def shutdown(self, wait=True):
+        """Nothing to stop: queued screens keep running in the worker processes."""
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """
+    Returns the process-wide job manager, creating it on first use:
+    a QueuedJobManager when `job_backend=queue`, otherwise an in-process JobManager.
+    """
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            if (os.getenv("job_backend") or "thread").lower() == "queue":
+                _job_manager = QueuedJobManager()
+            else:
+                _job_manager = JobManager()
+        return _job_manager
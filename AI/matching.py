@@ -0,0 +1,210 @@
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from AI.ofac import fold_text, normalize_name, jaro_winkler, similarity_score
+from AI.state_registry import STATE_CODES, resolve_state
+
+
+"""
+ENTITY MATCHING DOCS:
+
+Compares vendor and account names and addresses by their canonical forms instead of the raw strings.
+
+**Names**: accents, case and punctuation removed, common abbreviations expanded and legal suffixes
+(LLC, INC, CORP, ...) dropped, the same normalization the OFAC screen uses.
+"Acme Equipment, LLC" and "ACME Equipment LLC" both become "ACME EQUIPMENT".
+
+**Addresses**: USPS street suffix and directional abbreviations ("Street" -> "ST", "North" -> "N"),
+unit designators collected into a separate unit ("Suite 200", "Ste. 200" and "#200" -> "200"),
+state names as postal codes and ZIP+4 cut to the 5-digit ZIP.
+"123 Main Street, Suite 200" and "123 Main St Ste 200" have the same canonical form.
+
+**Address scores** need the same house number and (when both sides have one) the same unit;
+only the street name and city are fuzzy-scored, so "123 Main St" and "125 Main St" do not match.
+
+**Scores** are 0-100. A pair matches when its score is at or above the threshold:
+`name_match_threshold` and `address_match_threshold` in the environment (default 92 for both).
+Canonical forms are cached, so repeated comparisons of the same rows only pay for the scoring.
+"""
+
+DEFAULT_NAME_THRESHOLD = 92
+DEFAULT_ADDRESS_THRESHOLD = 92
+
+STREET_SUFFIXES = {
+    "ALLEY": "ALY", "AVENUE": "AVE", "AV": "AVE", "BOULEVARD": "BLVD", "CENTER": "CTR", "CIRCLE": "CIR",
+    "COURT": "CT", "CROSSING": "XING", "DRIVE": "DR", "EXPRESSWAY": "EXPY", "FREEWAY": "FWY",
+    "HIGHWAY": "HWY", "LANE": "LN", "PARKWAY": "PKWY", "PKY": "PKWY", "PLACE": "PL", "PLAZA": "PLZ",
+    "POINT": "PT", "ROAD": "RD", "ROUTE": "RTE", "SQUARE": "SQ", "STREET": "ST", "STR": "ST",
+    "TERRACE": "TER", "TRAIL": "TRL", "TURNPIKE": "TPKE", "WAY": "WAY",
+}
+
+DIRECTIONALS = {
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+    "NORTHEAST": "NE", "NORTHWEST": "NW", "SOUTHEAST": "SE", "SOUTHWEST": "SW",
+}
+
+UNIT_DESIGNATORS = {
+    "APARTMENT", "APT", "BUILDING", "BLDG", "DEPARTMENT", "DEPT", "FLOOR", "FL", "ROOM", "RM",
+    "SUITE", "STE", "UNIT", "#",
+}
+
+US_COUNTRY_NAMES = {"US", "USA", "UNITEDSTATES", "UNITEDSTATESOFAMERICA"}
+
+CanonicalAddress = namedtuple("CanonicalAddress", ["street", "unit", "city", "state", "zip", "country"])
+
+
+@lru_cache(maxsize=65536)
+def canonical_name(name):
+    """
+    Canonical form of a business name (see normalize_name in AI/ofac.py).
+    """
+    return normalize_name(name)
+
+
+@lru_cache(maxsize=65536)
+def canonical_street(street):
+    """
+    Canonical form of a street line.
+
+    Returns:
+        tuple: (street, unit) where street has USPS abbreviations applied and unit is the unit number or ""
+    """
+    tokens = fold_text(str(street or "").replace("#", " # "), keep="#").split()
+
+    words = []
+    unit = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in UNIT_DESIGNATORS and i > 0:
+            # Everything after the first unit designator is the unit ("STE 200", "BLDG 4 FL 2")
+            unit = [t for t in tokens[i + 1:] if t not in UNIT_DESIGNATORS]
+            break
+        words.append(DIRECTIONALS.get(token) or STREET_SUFFIXES.get(token, token))
+        i += 1
+    return " ".join(words), " ".join(unit)
+
+
+@lru_cache(maxsize=65536)
+def canonical_address(street, city, state, zip_code, country=None):
+    """
+    Canonical form of an address.
+
+    Args:
+        street (str): Street line, optionally including a unit
+        city (str): City
+        state (str): State name or postal code (other regions are kept as given)
+        zip_code (str): ZIP, ZIP+4 or postal code
+        country (str, optional): Country
+
+    Returns:
+        CanonicalAddress: (street, unit, city, state, zip, country)
+    """
+    street, unit = canonical_street(street)
+    city = fold_text(city)
+
+    name = resolve_state(state)
+    state = STATE_CODES[name] if name else fold_text(state)
+
+    zip_code = fold_text(zip_code).replace(" ", "")
+    if re.fullmatch(r"\d{9}|\d{5}", zip_code):
+        zip_code = zip_code[:5]
+
+    country = re.sub(r"[^A-Z]", "", fold_text(country))
+    if country in US_COUNTRY_NAMES:
+        country = "US"
+    return CanonicalAddress(street, unit, city, state, zip_code, country)
+
+
+def canonical_row_address(row):
+    """
+    Canonical address of a Vendor or Account row (Street, City, State, ZIP, Country columns).
+    """
+    return canonical_address(row.get("Street"), row.get("City"), row.get("State"), row.get("ZIP"), row.get("Country"))
+
+
+def name_similarity(a, b):
+    """
+    Similarity of two names on a 0-100 scale, 100 when their canonical forms are equal.
+    """
+    a, b = canonical_name(a), canonical_name(b)
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 100.0
+    return similarity_score(a, b)
+
+
+def split_house_number(street):
+    """
+    Splits a canonical street line into its leading house number and the street name.
+
+    Returns:
+        tuple: (house_number, street_name), house_number "" when the line does not start with one
+    """
+    number, _, name = street.partition(" ")
+    if number[:1].isdigit():
+        return number, name
+    return "", street
+
+
+def address_similarity(a, b):
+    """
+    Similarity of two CanonicalAddress values on a 0-100 scale.
+
+    Different ZIPs, states or (when both are given) countries, house numbers or units score 0, so
+    neighbouring buildings and other suites never match. Otherwise the street name counts for 80%
+    and the city for 20%.
+    """
+    if not a.street or not b.street:
+        return 0.0
+    a_number, a_name = split_house_number(a.street)
+    b_number, b_name = split_house_number(b.street)
+    for x, y in ((a.zip, b.zip), (a.state, b.state), (a.country, b.country), (a_number, b_number), (a.unit, b.unit)):
+        if x and y and x != y:
+            return 0.0
+    if a == b:
+        return 100.0
+
+    score = 80 * jaro_winkler(a_name, b_name)
+    score += 20 * (jaro_winkler(a.city, b.city) if a.city and b.city else 1.0)
+    return round(score, 1)
+
+
+def match_thresholds():
+    """
+    Returns the configured (name, address) match thresholds.
+    """
+    return (
+        float(os.getenv("name_match_threshold") or DEFAULT_NAME_THRESHOLD),
+        float(os.getenv("address_match_threshold") or DEFAULT_ADDRESS_THRESHOLD),
+    )
+
+
+def compare_entities(first, second, name_threshold=None, address_threshold=None):
+    """
+    Compares two Vendor/Account rows by name and address.
+
+    Args:
+        first (dict): Row with Name, Street, City, State, ZIP and Country columns
+        second (dict): Row with the same columns
+        name_threshold (float, optional): Minimum name score for a match. Defaults to `name_match_threshold`
+        address_threshold (float, optional): Minimum address score for a match. Defaults to `address_match_threshold`
+
+    Returns:
+        dict: {"name_score", "address_score", "name_match", "address_match"}
+    """
+    default_name, default_address = match_thresholds()
+    name_threshold = default_name if name_threshold is None else name_threshold
+    address_threshold = default_address if address_threshold is None else address_threshold
+
+    name_score = name_similarity(first.get("Name"), second.get("Name"))
+    address_score = address_similarity(canonical_row_address(first), canonical_row_address(second))
+    return {
+        "name_score": name_score,
+        "address_score": address_score,
+        "name_match": name_score >= name_threshold,
+        "address_match": address_score >= address_threshold,
+    }
@@ -0,0 +1,578 @@
+import os
+import csv
+import re
+import zlib
+import threading
+import unicodedata
+from pathlib import Path
+
+
+"""
+OFAC SCREENING DOCS:
+
+Screens names against the OFAC sanctions lists locally instead of driving the Treasury search website.
+
+**Input files** (the published legacy CSV format, placed in the directory set by `ofac_list_dir`):
+
+- `sdn.csv` / `alt.csv`: Specially Designated Nationals list and its aliases
+- `cons_prim.csv` / `cons_alt.csv`: Consolidated (non-SDN) list and its aliases (optional)
+
+**How a name is screened**:
+
+1. Normalize: strip accents and punctuation, uppercase, expand abbreviations, drop legal suffixes (LLC, INC, ...)
+2. Block: look up candidate entries sharing character trigrams or Soundex codes with the name
+3. Score: Jaro-Winkler similarity (0-100) on the full name and on the sorted tokens, keeping the higher
+4. Return every candidate scoring at or above the threshold (80, the same minimum score task_four used on the website)
+
+The block index is split into `SHARD_COUNT` shards by a hash of each whole block key, which spreads
+keys evenly, so a list update only copies and rebuilds the few shards holding the changed entries' keys.
+
+**Refreshing** (OfacRefresher):
+
+1. Poll the list directory; when a file's size or modification time changes, reload the entries
+2. Diff them against the loaded index (added, removed, changed entries)
+3. Build a new index that shares every untouched shard with the old one and rebuilds only the affected shards
+4. Swap the new index in with a single reference assignment; screens already running keep using the old index
+5. Hand the added entries to a callback (tasks.py uses it to rescreen only vendors that block-match them)
+"""
+
+DEFAULT_THRESHOLD = 80
+SHARD_COUNT = 1024
+NULL_VALUE = "-0-"
+
+LIST_FILES = {
+    "sdn": ("sdn.csv", "alt.csv"),
+    "cons": ("cons_prim.csv", "cons_alt.csv"),
+}
+
+ABBREVIATIONS = {
+    "&": "AND",
+    "INTL": "INTERNATIONAL",
+    "CO": "COMPANY",
+    "MFG": "MANUFACTURING",
+    "SVCS": "SERVICES",
+    "SVC": "SERVICE",
+    "TECH": "TECHNOLOGY",
+    "GRP": "GROUP",
+    "BROS": "BROTHERS",
+    "NATL": "NATIONAL",
+}
+
+LEGAL_SUFFIXES = {
+    "LLC", "LLP", "LP", "INC", "INCORPORATED", "CORP", "CORPORATION", "LTD", "LIMITED",
+    "PLC", "GMBH", "AG", "SA", "SRL", "BV", "NV", "PTE", "PVT", "FZE", "FZCO", "COMPANY",
+}
+
+
+def _clean(value):
+    value = (value or "").strip()
+    return "" if value == NULL_VALUE else value
+
+
+def fold_text(value, keep=""):
+    """
+    Folds text for comparison: accents stripped to ASCII, uppercased, every character other than
+    letters, digits and those in `keep` replaced by a space, and whitespace collapsed.
+    Shared by name matching, SOS result parsing, address matching and address cache keys.
+    """
+    text = unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode("ascii").upper()
+    return " ".join(re.sub(f"[^A-Z0-9{re.escape(keep)}\\s]", " ", text).split())
+
+
+def normalize_name(name, drop_suffixes=True):
+    """
+    Normalizes a name for matching.
+
+    Args:
+        name (str): Raw entity or person name
+        drop_suffixes (bool, optional): Remove legal suffixes. False keeps them, to tell "X LLC" from "X INC"
+
+    Returns:
+        str: Uppercase ASCII tokens separated by single spaces, abbreviations expanded and legal suffixes removed
+    """
+    name = fold_text(name, keep="&-").replace("&", " & ")
+    tokens = []
+    core = []
+    for word in name.split():
+        parts = word.replace("-", " ").split()
+        if "-" in word and len(parts) > 1:
+            # Parts of a hyphenated word ("CO-OP") are kept as written, never expanded or dropped
+            tokens.extend(parts)
+            core.extend(parts)
+            continue
+        for part in parts:
+            part = ABBREVIATIONS.get(part, part)
+            tokens.append(part)
+            if part not in LEGAL_SUFFIXES:
+                core.append(part)
+    if not drop_suffixes:
+        return " ".join(tokens)
+    return " ".join(core or tokens)
+
+
+def name_variants(name):
+    """
+    Returns the normalized forms a list name should be indexed under.
+    OFAC writes individuals as "LAST, First Middle", so "First Middle LAST" is added as well.
+    """
+    variants = {normalize_name(name)}
+    if name.count(",") == 1:
+        last, first = name.split(",")
+        variants.add(normalize_name(f"{first} {last}"))
+    variants.discard("")
+    return variants
+
+
+def soundex(token):
+    """
+    American Soundex code for a single token (e.g. "ROBERT" -> "R163").
+    """
+    codes = {c: d for d, letters in {"1": "BFPV", "2": "CGJKQSXZ", "3": "DT", "4": "L", "5": "MN", "6": "R"}.items()
+             for c in letters}
+    letters = [c for c in token.upper() if c.isalpha()]
+    if not letters:
+        return token
+    result = letters[0]
+    previous = codes.get(letters[0], "")
+    for c in letters[1:]:
+        code = codes.get(c, "")
+        if code and code != previous:
+            result += code
+        if c not in "HW":
+            previous = code
+    return (result + "000")[:4]
+
+
+def jaro_winkler(a, b, prefix_scale=0.1):
+    """
+    Jaro-Winkler similarity between two strings.
+
+    Returns:
+        float: 0.0 (no similarity) to 1.0 (identical)
+    """
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+
+    window = max(max(len(a), len(b)) // 2 - 1, 0)
+    a_matched = [False] * len(a)
+    b_matched = [False] * len(b)
+    matches = 0
+    for i, c in enumerate(a):
+        for j in range(max(0, i - window), min(len(b), i + window + 1)):
+            if not b_matched[j] and b[j] == c:
+                a_matched[i] = b_matched[j] = True
+                matches += 1
+                break
+    if matches == 0:
+        return 0.0
+
+    transpositions = 0
+    j = 0
+    for i, c in enumerate(a):
+        if a_matched[i]:
+            while not b_matched[j]:
+                j += 1
+            if c != b[j]:
+                transpositions += 1
+            j += 1
+
+    jaro = (matches / len(a) + matches / len(b) + (matches - transpositions / 2) / matches) / 3
+
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * prefix_scale * (1 - jaro)
+
+
+def similarity_score(query, candidate):
+    """
+    Scores a normalized query name against a normalized list name on a 0-100 scale.
+    Uses the higher of the full-string and sorted-token Jaro-Winkler similarities,
+    so reordered names ("SMITH JOHN" vs "JOHN SMITH") still score high.
+    """
+    full = jaro_winkler(query, candidate)
+    ordered = jaro_winkler(" ".join(sorted(query.split())), " ".join(sorted(candidate.split())))
+    return round(max(full, ordered) * 100, 1)
+
+
+def block_keys(normalized):
+    """
+    Returns the blocking keys for a normalized name: padded character trigrams and per-token Soundex codes.
+    """
+    padded = f" {normalized} "
+    keys = {padded[i:i + 3] for i in range(len(padded) - 2)}
+    keys.update("#" + soundex(token) for token in normalized.split() if token.isalpha())
+    return keys
+
+
+def shard_for(key):
+    """Returns the shard a blocking key is stored in: a stable hash of the whole key, so shards stay small and even."""
+    return zlib.crc32(key.encode("utf-8")) % SHARD_COUNT
+
+
+class SdnEntry:
+    """
+    One entry (person, entity, vessel or aircraft) on an OFAC list.
+
+    Attributes:
+        entry_id (str): "<list>:<ent_num>", e.g. "sdn:36"
+        name (str): Primary name as published
+        sdn_type (str): "individual", "vessel", "aircraft", or "" for entities
+        programs (str): Sanctions program codes
+        aliases (tuple of str): Alternate names from the alias file
+    """
+
+    def __init__(self, entry_id, name, sdn_type="", programs="", aliases=()):
+        self.entry_id = entry_id
+        self.name = name
+        self.sdn_type = sdn_type
+        self.programs = programs
+        self.aliases = tuple(aliases)
+
+    def all_names(self):
+        return (self.name,) + self.aliases
+
+    def __eq__(self, other):
+        return isinstance(other, SdnEntry) and (
+            self.entry_id, self.name, self.sdn_type, self.programs, self.aliases
+        ) == (other.entry_id, other.name, other.sdn_type, other.programs, other.aliases)
+
+    def __hash__(self):
+        return hash((self.entry_id, self.name, self.aliases))
+
+
+def diff_entries(old_entries, new_entries):
+    """
+    Compares two loaded lists.
+
+    Returns:
+        dict: {"added": set of entry IDs, "removed": set of entry IDs, "changed": set of entry IDs}
+    """
+    old_ids = set(old_entries)
+    new_ids = set(new_entries)
+    return {
+        "added": new_ids - old_ids,
+        "removed": old_ids - new_ids,
+        "changed": {i for i in old_ids & new_ids if old_entries[i] != new_entries[i]}
+    }
+
+
+def _find_file(directory, filename):
+    for path in Path(directory).iterdir():
+        if path.name.lower() == filename:
+            return path
+    return None
+
+
+def load_entries(directory):
+    """
+    Loads every list found in a directory of OFAC CSV files.
+
+    Args:
+        directory (str or Path): Directory containing sdn.csv (and optionally alt.csv, cons_prim.csv, cons_alt.csv)
+
+    Returns:
+        dict: {entry_id: SdnEntry}
+
+    Raises:
+        FileNotFoundError: If the directory contains neither sdn.csv nor cons_prim.csv
+    """
+    entries = {}
+    for list_name, (primary_file, alias_file) in LIST_FILES.items():
+        primary_path = _find_file(directory, primary_file)
+        if primary_path is None:
+            continue
+
+        aliases = {}
+        alias_path = _find_file(directory, alias_file)
+        if alias_path is not None:
+            with open(alias_path, newline="", encoding="latin-1") as f:
+                for row in csv.reader(f):
+                    if len(row) >= 4 and _clean(row[3]):
+                        aliases.setdefault(row[0].strip(), []).append(_clean(row[3]))
+
+        with open(primary_path, newline="", encoding="latin-1") as f:
+            for row in csv.reader(f):
+                if len(row) < 4 or not _clean(row[1]):
+                    continue
+                ent_num = row[0].strip()
+                entry_id = f"{list_name}:{ent_num}"
+                entries[entry_id] = SdnEntry(
+                    entry_id,
+                    _clean(row[1]),
+                    sdn_type=_clean(row[2]),
+                    programs=_clean(row[3]),
+                    aliases=aliases.get(ent_num, ())
+                )
+
+    if not entries:
+        raise FileNotFoundError(f"No OFAC list files (sdn.csv or cons_prim.csv) found in {directory}")
+    return entries
+
+
+class OfacIndex:
+    """
+    Immutable in-memory fuzzy-match index over OFAC list entries.
+
+    Args:
+        entries (dict): {entry_id: SdnEntry}
+    """
+
+    def __init__(self, entries, _names=None, _shards=None):
+        self.entries = entries
+        if _names is None:
+            _names = {entry_id: self._index_names(entry) for entry_id, entry in entries.items()}
+        self.names = _names
+        self.shards = _shards if _shards is not None else self._build_shards(self.names)
+
+    @staticmethod
+    def _index_names(entry):
+        normalized = set()
+        for name in entry.all_names():
+            normalized.update(name_variants(name))
+        return tuple(sorted(normalized))
+
+    @staticmethod
+    def _build_shards(names, only_shards=None):
+        shards = {}
+        for entry_id, normalized_names in names.items():
+            for normalized in normalized_names:
+                for key in block_keys(normalized):
+                    shard = shard_for(key)
+                    if only_shards is not None and shard not in only_shards:
+                        continue
+                    shards.setdefault(shard, {}).setdefault(key, set()).add(entry_id)
+        return shards
+
+    def with_changes(self, new_entries):
+        """
+        Builds the index for an updated list, reusing everything that did not change.
+        Only the shards containing blocking keys of added, removed or changed entries are copied and
+        rebuilt; every other shard is shared with this index. This index is left untouched.
+
+        Args:
+            new_entries (dict): {entry_id: SdnEntry} for the updated list
+
+        Returns:
+            tuple: (OfacIndex for new_entries, diff as returned by diff_entries)
+        """
+        diff = diff_entries(self.entries, new_entries)
+        outgoing = diff["removed"] | diff["changed"]
+        incoming = diff["added"] | diff["changed"]
+
+        names = {entry_id: normalized for entry_id, normalized in self.names.items() if entry_id not in outgoing}
+        for entry_id in incoming:
+            names[entry_id] = self._index_names(new_entries[entry_id])
+
+        def keys_of(entry_names):
+            return {key for normalized in entry_names for key in block_keys(normalized)}
+
+        removals = {entry_id: keys_of(self.names[entry_id]) for entry_id in outgoing}
+        additions = {entry_id: keys_of(names[entry_id]) for entry_id in incoming}
+        affected = {shard_for(key) for keys in list(removals.values()) + list(additions.values()) for key in keys}
+
+        shards = dict(self.shards)
+        for shard in affected:
+            shards[shard] = {key: set(ids) for key, ids in self.shards.get(shard, {}).items()}
+        for entry_id, keys in removals.items():
+            for key in keys:
+                bucket = shards[shard_for(key)].get(key)
+                if bucket is not None:
+                    bucket.discard(entry_id)
+                    if not bucket:
+                        del shards[shard_for(key)][key]
+        for entry_id, keys in additions.items():
+            for key in keys:
+                shards[shard_for(key)].setdefault(key, set()).add(entry_id)
+        for shard in affected:
+            if not shards[shard]:
+                del shards[shard]
+
+        diff["rebuilt_shards"] = len(affected)
+        return OfacIndex(new_entries, _names=names, _shards=shards), diff
+
+    def candidates(self, normalized):
+        """
+        Returns entry IDs that share enough blocking keys with a normalized name to be worth scoring.
+        """
+        keys = block_keys(normalized)
+        trigram_count = sum(1 for k in keys if not k.startswith("#"))
+        phonetic_count = len(keys) - trigram_count
+        trigram_hits = {}
+        phonetic_hits = {}
+        for key in keys:
+            hits = phonetic_hits if key.startswith("#") else trigram_hits
+            for entry_id in self.shards.get(shard_for(key), {}).get(key, ()):
+                hits[entry_id] = hits.get(entry_id, 0) + 1
+
+        # Share at least 30% of the trigrams, or the Soundex code of at least half the tokens
+        trigram_minimum = max(1, int(trigram_count * 0.3))
+        phonetic_minimum = max(1, (phonetic_count + 1) // 2)
+        return {entry_id for entry_id, count in trigram_hits.items() if count >= trigram_minimum} | \
+            {entry_id for entry_id, count in phonetic_hits.items() if count >= phonetic_minimum}
+
+    def screen(self, name, threshold=DEFAULT_THRESHOLD, limit=10):
+        """
+        Screens one name against the index.
+
+        Args:
+            name (str): Vendor or person name
+            threshold (float, optional): Minimum score (0-100) for a match
+            limit (int, optional): Maximum number of matches returned
+
+        Returns:
+            list of dict: Matches sorted by score, each
+                {"entry_id", "name", "matched_name", "sdn_type", "programs", "score"}
+        """
+        query = normalize_name(name)
+        if not query:
+            return []
+
+        matches = []
+        for entry_id in self.candidates(query):
+            best_score, best_name = max(
+                (similarity_score(query, candidate), candidate) for candidate in self.names[entry_id]
+            )
+            if best_score >= threshold:
+                entry = self.entries[entry_id]
+                matches.append({
+                    "entry_id": entry_id,
+                    "name": entry.name,
+                    "matched_name": best_name,
+                    "sdn_type": entry.sdn_type,
+                    "programs": entry.programs,
+                    "score": best_score
+                })
+        matches.sort(key=lambda m: (-m["score"], m["entry_id"]))
+        return matches[:limit]
+
+    def screen_many(self, names, threshold=DEFAULT_THRESHOLD, limit=10):
+        """
+        Screens many names in one pass. Names that normalize to the same string are scored once.
+
+        Returns:
+            dict: {name: list of matches as returned by screen()}
+        """
+        by_normalized = {}
+        for name in names:
+            by_normalized.setdefault(normalize_name(name), []).append(name)
+
+        results = {}
+        for normalized, originals in by_normalized.items():
+            matches = self.screen(originals[0], threshold=threshold, limit=limit)
+            for name in originals:
+                results[name] = matches
+        return results
+
+
+_index = None
+_index_fingerprint = None
+_index_lock = threading.Lock()
+
+
+def list_fingerprint(directory):
+    """
+    Returns (file name, size, modification time) for every list file in a directory, used to detect updates.
+    """
+    names = {name for files in LIST_FILES.values() for name in files}
+    return tuple(sorted(
+        (path.name.lower(), path.stat().st_size, path.stat().st_mtime_ns)
+        for path in Path(directory).iterdir() if path.name.lower() in names
+    ))
+
+
+def get_ofac_index():
+    """
+    Returns the process-wide OfacIndex built from the directory in `ofac_list_dir`.
+
+    Returns:
+        OfacIndex: The loaded index, or None if `ofac_list_dir` is not set or has no list files
+    """
+    global _index, _index_fingerprint
+    with _index_lock:
+        if _index is None:
+            directory = os.getenv("ofac_list_dir")
+            if not directory:
+                return None
+            try:
+                _index_fingerprint = list_fingerprint(directory)
+                _index = OfacIndex(load_entries(directory))
+                print(f"Loaded {len(_index.entries)} OFAC entries from {directory}")
+            except (OSError, FileNotFoundError) as e:
+                print(f"Error loading OFAC lists from {directory}: {str(e)}")
+                return None
+        return _index
+
+
+class OfacRefresher:
+    """
+    Background refresher that hot-swaps the process-wide OFAC index when the list files change.
+
+    Args:
+        directory (str, optional): List directory. Defaults to `ofac_list_dir`
+        interval (float, optional): Seconds between checks. Defaults to `ofac_refresh_interval` or 3600
+        on_added (callable, optional): Called with (list of added SdnEntry, new OfacIndex) after a swap
+    """
+
+    def __init__(self, directory=None, interval=None, on_added=None):
+        self.directory = directory or os.getenv("ofac_list_dir")
+        self.interval = interval or float(os.getenv("ofac_refresh_interval") or 3600)
+        self.on_added = on_added
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """
+        Reloads the lists if their files changed and swaps in the updated index.
+
+        Returns:
+            dict: The diff (with "rebuilt_shards") if the index was swapped, or None if nothing changed
+        """
+        global _index, _index_fingerprint
+        fingerprint = list_fingerprint(self.directory)
+        with _index_lock:
+            current = _index
+            if current is not None and fingerprint == _index_fingerprint:
+                return None
+
+        # Load and rebuild outside the lock so screens keep running against the current index
+        new_entries = load_entries(self.directory)
+        if current is None:
+            new_index = OfacIndex(new_entries)
+            diff = {"added": set(new_entries), "removed": set(), "changed": set(), "rebuilt_shards": len(new_index.shards)}
+        else:
+            new_index, diff = current.with_changes(new_entries)
+
+        with _index_lock:
+            _index = new_index
+            _index_fingerprint = fingerprint
+        print(f"OFAC index refreshed: {len(diff['added'])} added, {len(diff['removed'])} removed, "
+              f"{len(diff['changed'])} changed, {diff['rebuilt_shards']} shards rebuilt")
+
+        if self.on_added is not None and current is not None and diff["added"]:
+            try:
+                self.on_added([new_entries[entry_id] for entry_id in diff["added"]], new_index)
+            except Exception as e:
+                print(f"Error handling new OFAC entries: {str(e)}")
+        return diff
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing OFAC index: {str(e)}")
+
+    def start(self):
+        """Starts checking for list updates every `interval` seconds on a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ofac-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops the background thread."""
+        self._stop.set()
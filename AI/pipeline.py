@@ -0,0 +1,268 @@
+import sys, os
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+"""
+PIPELINE DOCS:
+
+Runs the due diligence tasks for a vendor as a dependency graph instead of one after another.
+
+**Graph**:
+
+- `task_one`, `task_two`, `task_four`, `task_five`, `task_six` have no dependencies and run at the same time
+- `task_three` waits for `task_two` and uses its `dnb_state` (DNBaddress.state) for the Secretary of State lookup
+- `task_seven` waits for every other task so the email report contains all flags raised during the run
+
+Wall-clock time per vendor is roughly the longest chain (task_two -> task_three) instead of the sum of all checks.
+"""
+
+
+class PipelineTask:
+    """
+    A node in the pipeline graph.
+
+    Args:
+        name (str): Task name, used as the key in the merged result
+        run (callable): Called with the dict of finished dependency results, returns the task result
+        depends_on (tuple of str): Names of tasks that must finish before this one starts
+    """
+
+    def __init__(self, name, run, depends_on=()):
+        self.name = name
+        self.run = run
+        self.depends_on = tuple(depends_on)
+
+
+def validate_graph(pipeline_tasks):
+    """
+    Checks that every dependency exists and that the graph has no cycles.
+
+    Raises:
+        ValueError: If a dependency is unknown or the graph contains a cycle
+    """
+    names = {t.name for t in pipeline_tasks}
+    for t in pipeline_tasks:
+        for dep in t.depends_on:
+            if dep not in names:
+                raise ValueError(f"Task '{t.name}' depends on unknown task '{dep}'")
+
+    remaining = {t.name: set(t.depends_on) for t in pipeline_tasks}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Pipeline has a dependency cycle between: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_graph(pipeline_tasks, max_workers=None, on_progress=None):
+    """
+    Runs pipeline tasks on a thread pool, starting each one as soon as its dependencies finish.
+
+    A task whose dependency failed still runs; it sees None for that dependency's result.
+
+    Args:
+        pipeline_tasks (list of PipelineTask): Nodes of the graph
+        max_workers (int, optional): Thread pool size. Defaults to the number of tasks
+        on_progress (callable, optional): Called with (task name, status) as tasks move through
+            "pending", "running", "done" and "failed"
+
+    Returns:
+        dict:
+            {
+                "results": {task name: task result or None},
+                "errors": {task name: error message} for tasks that raised,
+                "timings": {task name: seconds the task ran for},
+                "total_seconds": Wall-clock seconds for the whole graph
+            }
+    """
+    validate_graph(pipeline_tasks)
+
+    results = {}
+    errors = {}
+    timings = {}
+    pending = {t.name: t for t in pipeline_tasks}
+    started = time.perf_counter()
+
+    def report(name, status):
+        if on_progress is not None:
+            try:
+                on_progress(name, status)
+            except Exception as e:
+                print(f"Pipeline progress callback failed: {str(e)}")
+
+    for name in pending:
+        report(name, "pending")
+
+    def timed(task, dep_results):
+        report(task.name, "running")
+        task_start = time.perf_counter()
+        try:
+            return task.run(dep_results)
+        finally:
+            timings[task.name] = round(time.perf_counter() - task_start, 3)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(pipeline_tasks)) as executor:
+        running = {}
+        while pending or running:
+            # Start every task whose dependencies have all finished
+            for name in list(pending):
+                task = pending[name]
+                if all(dep in results for dep in task.depends_on):
+                    dep_results = {dep: results[dep] for dep in task.depends_on}
+                    running[executor.submit(timed, task, dep_results)] = name
+                    del pending[name]
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                    report(name, "done")
+                except Exception as e:
+                    print(f"Pipeline task {name} failed: {str(e)}")
+                    results[name] = None
+                    errors[name] = str(e)
+                    report(name, "failed")
+
+    return {
+        "results": results,
+        "errors": errors,
+        "timings": timings,
+        "total_seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def build_vendor_pipeline(account_id, vendor_id, context, refresh=False):
+    """
+    Builds the due diligence graph for one vendor.
+
+    Args:
+        account_id (str): Borrower account ID, used by task_one
+        vendor_id (str): The vendor ID to screen
+        context (VendorContext): Vendor data loaded once and shared by every task
+        refresh (bool, optional): Bypass cached upstream responses for this run
+
+    Returns:
+        list of PipelineTask: Graph nodes for task_one..task_seven
+    """
+    from AI import tasks
+    from AI.browser_pool import run_async
+
+    def run_task_three(deps):
+        dnb_result = deps.get("task_two") or {}
+        # Run on the shared background loop so the Playwright browser pool stays warm between vendors
+        return run_async(tasks.task_three(vendor_id, state=dnb_result.get("dnb_state"), context=context, refresh=refresh))
+
+    return [
+        PipelineTask("task_one", lambda deps: tasks.task_one(account_id, vendor_id, context=context)),
+        PipelineTask("task_two", lambda deps: tasks.task_two(vendor_id, context=context, refresh=refresh)),
+        PipelineTask("task_three", run_task_three, depends_on=("task_two",)),
+        PipelineTask("task_four", lambda deps: tasks.task_four(vendor_id, context=context)),
+        PipelineTask("task_five", lambda deps: tasks.task_five(vendor_id, context=context, refresh=refresh)),
+        PipelineTask("task_six", lambda deps: tasks.task_six(vendor_id, context=context, refresh=refresh)),
+        PipelineTask(
+            "task_seven",
+            lambda deps: tasks.task_seven(vendor_id, context=context),
+            depends_on=("task_one", "task_two", "task_three", "task_four", "task_five", "task_six")
+        ),
+    ]
+
+
+def select_tasks(pipeline_tasks, names, completed=()):
+    """
+    Returns the named tasks and every task downstream of them, with dependencies on tasks
+    that are left out dropped (those tasks see no result for them).
+
+    Downstream tasks listed in `completed` are left out, along with the tasks only they lead to,
+    so a rerun does not repeat their writes (task_three's flags, task_seven's email).
+
+    Raises:
+        ValueError: If a name is not a task in the graph
+    """
+    known = {t.name for t in pipeline_tasks}
+    unknown = set(names) - known
+    if unknown:
+        raise ValueError(f"Unknown pipeline tasks: {sorted(unknown)}")
+
+    selected = set(names)
+    grew = True
+    while grew:
+        downstream = {t.name for t in pipeline_tasks if selected & set(t.depends_on)} - set(completed)
+        grew = not downstream <= selected
+        selected |= downstream
+    return [
+        PipelineTask(t.name, t.run, depends_on=[dep for dep in t.depends_on if dep in selected])
+        for t in pipeline_tasks if t.name in selected
+    ]
+
+
+def run_vendor_pipeline(account_id, vendor_id, max_workers=None, refresh=False, on_progress=None, only=None, completed=None):
+    """
+    Runs the full due diligence screen for one vendor with independent tasks overlapping.
+
+    Args:
+        account_id (str): Borrower account ID, used by task_one
+        vendor_id (str): The vendor ID to screen
+        max_workers (int, optional): Thread pool size for the run
+        refresh (bool, optional): Bypass cached upstream responses for this run
+        on_progress (callable, optional): Called with (task name, status) as tasks start and finish
+        only (list of str, optional): Run only these tasks and the tasks downstream of them (e.g. the
+            deferred tasks of an earlier run). Defaults to the whole graph
+        completed (list of str, optional): With `only`, tasks that already finished in the earlier run;
+            they are not rerun even when downstream of `only`
+
+    Returns:
+        dict:
+            {
+                "account_id": Borrower account ID,
+                "vendor_id": Vendor ID,
+                "results": {task name: task result or None},
+                "errors": {task name: error message} for tasks that raised, and "writes" if saving the results failed,
+                "timings": {task name: seconds the task ran for},
+                "total_seconds": Wall-clock seconds for the whole screen,
+                "writes": {"buffered": Vendor writes made by the tasks, "flushed": Database writes they were coalesced into,
+                           "failed": Database writes that failed},
+                "deferred": Names of tasks that could not reach their provider and should be retried later
+            }
+    """
+    from AI import tasks
+
+    # Load the vendor, account and equipment once for every task in the run
+    context = tasks.load_vendor_context(tasks.db_driver, vendor_id, account_id)
+    if context is None:
+        # Still screen the vendor when only the account is missing; task_one will report it
+        context = tasks.load_vendor_context(tasks.db_driver, vendor_id)
+    if context is None:
+        return {
+            "account_id": account_id,
+            "vendor_id": vendor_id,
+            "results": {},
+            "errors": {"context": f"Vendor with ID {vendor_id} not found"},
+            "timings": {},
+            "total_seconds": 0.0
+        }
+
+    # Coalesce the run's flag appends and Vendor field updates into one write at the end
+    with tasks.db_driver.buffered_writes(vendor_id) as write_buffer:
+        pipeline_tasks = build_vendor_pipeline(account_id, vendor_id, context, refresh=refresh)
+        if only:
+            pipeline_tasks = select_tasks(pipeline_tasks, only, completed or ())
+        run = run_graph(pipeline_tasks, max_workers=max_workers, on_progress=on_progress)
+    if write_buffer.failed_flushes:
+        run["errors"]["writes"] = f"{write_buffer.failed_flushes} of {write_buffer.flushes} vendor writes failed"
+    return {
+        "account_id": account_id,
+        "vendor_id": vendor_id,
+        **run,
+        "writes": {"buffered": write_buffer.writes, "flushed": write_buffer.flushes, "failed": write_buffer.failed_flushes},
+        "deferred": sorted(name for name, result in run["results"].items() if isinstance(result, dict) and result.get("deferred"))
+    }
@@ -0,0 +1,169 @@
+from datetime import date, datetime
+
+from AI.html_distill import extract_tables
+from AI.ofac import normalize_name
+
+
+"""
+SECRETARY OF STATE ADAPTER DOCS:
+
+Per-state knowledge of a Secretary of State business search: which form fields to fill and how to read
+the results table. check_secretary_of_state uses the adapter registered for the vendor's state and only
+asks Perplexity to read the page when no adapter exists or the adapter cannot parse the results.
+
+No state is registered yet, so every state is read by Perplexity. An adapter is only registered once its
+selectors and columns are checked against a results page saved from the live registry.
+
+**Adding a state**:
+
+1. Save a results page from the registry's business search and add it as a fixture in AI/tests/test_sos_adapters.py
+2. Subclass TableSosAdapter (or SosAdapter) and set the selectors for the search form and results
+3. Set the column headers that hold the entity name, status and registration/formation date
+4. Decorate the class with @register_adapter("<State Name>") and test parse() against the saved page
+
+parse() returns None (fall back to the LLM) unless it finds a results table with name, status and date
+columns and exactly one row whose canonical name (normalize_name) equals the vendor's; ties are broken by
+comparing the names with their legal suffixes kept.
+A table without such a row is inconclusive, not "not found": registries match search terms loosely and
+list names that differ from ours in ways (DBAs, trade names) that only a reader can judge.
+"""
+
+SOS_ADAPTERS = {}
+
+
+def _state_key(state):
+    return (state or "").lower().replace(" ", "")
+
+
+def register_adapter(state):
+    """
+    Class decorator that registers an adapter for a state (full name, any case/spacing).
+    """
+    def decorator(cls):
+        cls.state = state
+        SOS_ADAPTERS[_state_key(state)] = cls()
+        return cls
+    return decorator
+
+
+def get_adapter(state):
+    """
+    Returns the adapter registered for a state, or None.
+    """
+    return SOS_ADAPTERS.get(_state_key(state))
+
+
+class SosAdapter:
+    """
+    Search form and results layout for one Secretary of State registry.
+    The base class holds the generic selectors check_secretary_of_state has always used and does not parse.
+    """
+
+    state = None
+    input_selector = 'input[type="text"]'
+    submit_selector = 'button[type="submit"]'
+    results_selector = '.search-results'
+    timeout = 10000
+
+    name_columns = ("entity name", "business name", "name", "corporate name")
+    status_columns = ("status", "entity status", "business status")
+    date_columns = ("formation date", "registration date", "original filing date", "filing date",
+                    "date formed", "initial filing date", "date of organization")
+    date_formats = ("%m/%d/%Y", "%Y-%m-%d", "%m-%d-%Y", "%B %d, %Y", "%b %d, %Y", "%d-%b-%Y")
+    active_statuses = ("active", "good standing", "in existence", "current", "active/compliance",
+                       "active - good standing")
+
+    async def search(self, page, sos_url, vendor_name):
+        """
+        Submits the registry search for a vendor and returns the results page HTML.
+        """
+        # Navigate to the Secretary of State website
+        await page.goto(sos_url)
+
+        # Wait for the search form to be visible
+        await page.wait_for_selector(self.input_selector, timeout=self.timeout)
+
+        # Enter the vendor name in the search field
+        await page.fill(self.input_selector, vendor_name)
+
+        # Click the search button
+        await page.click(self.submit_selector)
+
+        # Wait for results to load
+        await page.wait_for_selector(self.results_selector, timeout=self.timeout)
+
+        # Get the HTML content of the results
+        return await page.content()
+
+    def parse(self, html, vendor_name):
+        """
+        Reads the registration date and status for the vendor from the results page.
+
+        Args:
+            html (str): Results page HTML
+            vendor_name (str): Vendor name searched for
+
+        Returns:
+            dict: Same shape as the Perplexity result
+                {"found", "registration_date", "years_in_business", "status", "active", "explanation"},
+                or None if the results could not be parsed
+        """
+        return None
+
+
+class TableSosAdapter(SosAdapter):
+    """
+    Adapter for registries that list search results in an HTML table with a header row.
+    """
+
+    def _column(self, header, names):
+        for i, cell in enumerate(header):
+            if cell.strip().lower().rstrip(":") in names:
+                return i
+        return None
+
+    def _parse_date(self, value):
+        value = (value or "").strip()
+        for fmt in self.date_formats:
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+        return None
+
+    def parse(self, html, vendor_name):
+        target = normalize_name(vendor_name)
+        for table in extract_tables(html):
+            header = table[0]
+            name_col = self._column(header, self.name_columns)
+            status_col = self._column(header, self.status_columns)
+            date_col = self._column(header, self.date_columns)
+            if name_col is None or status_col is None or date_col is None:
+                continue
+
+            width = max(name_col, status_col, date_col)
+            rows = [row for row in table[1:] if len(row) > width]
+            matches = [row for row in rows if normalize_name(row[name_col]) == target]
+            if len(matches) > 1:
+                # Canonical names drop legal suffixes; "X LLC" and "X Inc" are different entities
+                full_name = normalize_name(vendor_name, drop_suffixes=False)
+                matches = [row for row in matches if normalize_name(row[name_col], drop_suffixes=False) == full_name]
+            if len(matches) != 1:
+                # Inconclusive: let the LLM read the page rather than report the vendor as unregistered
+                return None
+            match = matches[0]
+
+            registered = self._parse_date(match[date_col])
+            if registered is None:
+                return None
+            status = match[status_col].strip()
+            return {
+                "found": True,
+                "registration_date": registered.strftime("%m/%d/%Y"),
+                "years_in_business": round((date.today() - registered).days / 365.25, 1),
+                "status": status,
+                "active": status.lower() in self.active_statuses,
+                "explanation": f"Parsed from the {self.state} registry results by its adapter"
+            }
+        return None
+
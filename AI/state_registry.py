@@ -0,0 +1,182 @@
+import os
+import csv
+import threading
+from pathlib import Path
+from types import MappingProxyType
+
+
+"""
+STATE REGISTRY DOCS:
+
+Resolves a state as vendors store it ("New York", "new york", "newyork", "NY", "N.Y.") to its full name
+and Secretary of State search URL without a database round trip.
+
+**Source**: `secretary_of_state_lookup.csv` in the project root (or the file set by `state_lookup_path`)
+is loaded once into an immutable map on first use. Lookups are dictionary reads.
+
+**Refreshing** (StateRegistryRefresher): optionally re-reads the Supabase `States` table every
+`state_registry_refresh_interval` seconds and swaps in a new map. Database links override the CSV;
+states missing from the database keep their CSV link.
+"""
+
+DEFAULT_LOOKUP_PATH = Path(__file__).resolve().parent.parent / "secretary_of_state_lookup.csv"
+
+STATE_CODES = {
+    "Alabama": "AL", "Alaska": "AK", "Arizona": "AZ", "Arkansas": "AR", "California": "CA",
+    "Colorado": "CO", "Connecticut": "CT", "Delaware": "DE", "District of Columbia": "DC", "Florida": "FL",
+    "Georgia": "GA", "Hawaii": "HI", "Idaho": "ID", "Illinois": "IL", "Indiana": "IN",
+    "Iowa": "IA", "Kansas": "KS", "Kentucky": "KY", "Louisiana": "LA", "Maine": "ME",
+    "Maryland": "MD", "Massachusetts": "MA", "Michigan": "MI", "Minnesota": "MN", "Mississippi": "MS",
+    "Missouri": "MO", "Montana": "MT", "Nebraska": "NE", "Nevada": "NV", "New Hampshire": "NH",
+    "New Jersey": "NJ", "New Mexico": "NM", "New York": "NY", "North Carolina": "NC", "North Dakota": "ND",
+    "Ohio": "OH", "Oklahoma": "OK", "Oregon": "OR", "Pennsylvania": "PA", "Rhode Island": "RI",
+    "South Carolina": "SC", "South Dakota": "SD", "Tennessee": "TN", "Texas": "TX", "Utah": "UT",
+    "Vermont": "VT", "Virginia": "VA", "Washington": "WA", "West Virginia": "WV", "Wisconsin": "WI",
+    "Wyoming": "WY"
+}
+
+
+def state_key(state):
+    """
+    Lookup key for a state: lowercase letters only, so case, spacing, periods and stray quotes are ignored.
+    """
+    return "".join(c for c in (state or "").lower() if "a" <= c <= "z")
+
+
+# Every accepted spelling -> full state name
+STATE_NAMES = MappingProxyType({
+    **{state_key(name): name for name in STATE_CODES},
+    **{state_key(code): name for name, code in STATE_CODES.items()},
+    "washingtondc": "District of Columbia"
+})
+
+
+def resolve_state(state):
+    """
+    Returns the full state name for any accepted spelling or postal code, or None if it is not a state.
+    """
+    return STATE_NAMES.get(state_key(state))
+
+
+def load_state_links(path=None):
+    """
+    Reads the state -> Secretary of State URL CSV (columns `state,url`).
+
+    Returns:
+        dict: {full state name: url}. Rows whose state cannot be resolved are skipped with a warning
+    """
+    links = {}
+    with open(path or DEFAULT_LOOKUP_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            name = resolve_state(row.get("state"))
+            url = (row.get("url") or "").strip()
+            if name is None or not url:
+                print(f"Skipping unrecognized Secretary of State lookup row: {row}")
+                continue
+            links[name] = url
+    return links
+
+
+class StateRegistry:
+    """
+    Immutable map of full state name -> Secretary of State URL.
+
+    Args:
+        links (dict): {state (any accepted spelling): url}
+    """
+
+    def __init__(self, links):
+        resolved = {}
+        for state, url in links.items():
+            name = resolve_state(state)
+            if name is not None and url:
+                resolved[name] = url
+        self.links = MappingProxyType(resolved)
+
+    def __len__(self):
+        return len(self.links)
+
+    def resolve(self, state):
+        """Returns the full state name for `state`, or None."""
+        return resolve_state(state)
+
+    def get_url(self, state):
+        """Returns the Secretary of State URL for `state` in any accepted spelling, or None."""
+        return self.links.get(resolve_state(state))
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_state_registry():
+    """
+    Returns the process-wide StateRegistry, loading the lookup CSV on first use.
+
+    Returns:
+        StateRegistry: The loaded registry (empty if the CSV could not be read)
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            path = os.getenv("state_lookup_path") or DEFAULT_LOOKUP_PATH
+            try:
+                _registry = StateRegistry(load_state_links(path))
+                print(f"Loaded {len(_registry)} Secretary of State links from {path}")
+            except OSError as e:
+                print(f"Error loading Secretary of State links from {path}: {str(e)}")
+                _registry = StateRegistry({})
+        return _registry
+
+
+class StateRegistryRefresher:
+    """
+    Background refresher that rebuilds the process-wide registry from the Supabase `States` table.
+
+    Args:
+        db_driver (DatabaseDriver): Driver used to read the `States` table
+        interval (float, optional): Seconds between refreshes. Defaults to `state_registry_refresh_interval` or 86400
+    """
+
+    def __init__(self, db_driver, interval=None):
+        self.db_driver = db_driver
+        self.interval = interval or float(os.getenv("state_registry_refresh_interval") or 86400)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """
+        Reads the `States` table and swaps in a registry with its links layered over the current ones.
+
+        Returns:
+            StateRegistry: The new registry, or None if the table could not be read
+        """
+        global _registry
+        rows = self.db_driver.get_state_links()
+        if not rows:
+            return None
+
+        links = dict(get_state_registry().links)
+        links.update(rows)
+        registry = StateRegistry(links)
+        with _registry_lock:
+            _registry = registry
+        print(f"State registry refreshed: {len(registry)} Secretary of State links")
+        return registry
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing state registry: {str(e)}")
+
+    def start(self):
+        """Starts refreshing every `interval` seconds on a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="state-registry-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops the background thread."""
+        self._stop.set()
@@ -5,9 +5,12 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
 # Database
-from db import DatabaseDriver
-import requests
-db_driver = DatabaseDriver()
+from db import get_database_driver, track_collisions
+from AI.context import load_vendor_context
+from AI.clients import get_client, ProviderThrottled
+from requests import RequestException, HTTPError
+from AI.cache import get_cache, make_key
+db_driver = get_database_driver()
 
 
 
@@ -22,10 +25,16 @@ import email.utils
 from dotenv import load_dotenv
 load_dotenv()
 
-import json, csv, base64, time
+import json, csv, base64, threading, asyncio
 from pathlib import Path
 
-from playwright.async_api import async_playwright
+from AI.browser_pool import get_browser_pool, get_selenium_pool
+from AI.ofac import get_ofac_index, normalize_name, fold_text, OfacIndex, OfacRefresher
+from AI.html_distill import distill_html
+from AI.sos_adapters import get_adapter, SosAdapter
+from AI.state_registry import get_state_registry, StateRegistryRefresher
+from AI.matching import compare_entities
+from AI.collisions import build_collision_index
 import re
 
 
@@ -55,6 +64,33 @@ PERPLEXITY_API_KEY = os.getenv("perplexity_api_key")
 # CONSTANTS
 DATABASE_URL = f"postgresql+psycopg2://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}?sslmode=require"
 
+# Seconds a Perplexity response is reused for an identical prompt, per call site
+PERPLEXITY_CACHE_TTLS = {
+    "secretary_of_state": 7 * 24 * 3600,
+    "google_search": 3 * 24 * 3600,
+    "adverse_news": 24 * 3600,
+}
+
+# Seconds Google Maps results are reused for the same normalized address or place_id
+GOOGLE_CACHE_TTLS = {
+    "geocode": 90 * 24 * 3600,
+    "place_details": 90 * 24 * 3600,
+    "zero_results": 7 * 24 * 3600,
+}
+
+# Google API statuses that say the request failed on Google's side, not that the address is unknown
+GOOGLE_UNAVAILABLE_STATUSES = {"UNKNOWN_ERROR", "REQUEST_DENIED", "OVER_DAILY_LIMIT"}
+
+# Seconds a DNB search response is reused for the same (name, city, state, country)
+DNB_CACHE_TTL = int(os.getenv("dnb_cache_ttl") or 7 * 24 * 3600)
+DNB_NEGATIVE_CACHE_TTL = int(os.getenv("dnb_negative_cache_ttl") or 15 * 60)
+
+# Estimated token budget for the Secretary of State page text sent to Perplexity
+SOS_PROMPT_TOKEN_BUDGET = int(os.getenv("sos_prompt_token_budget") or 3000)
+
+# Generic Secretary of State search used for states without an adapter
+GENERIC_SOS_ADAPTER = SosAdapter()
+
 
 
 """
@@ -69,37 +105,111 @@ TASK ONE DOCS:
 - If `Vendor.Name === Account.Name` → flag
 - If `Vendor.Address === Account.Address` → flag
 """
-def task_one(account_id, vendor_id):
+def get_vendor_context(vendor_id, context=None, account_id=None):
+    """
+    Returns the shared VendorContext for a run, loading it from the database when none was passed in.
+
+    Args:
+        vendor_id (str): The vendor ID
+        context (VendorContext, optional): Context already loaded for this run
+        account_id (str, optional): Borrower account ID to load alongside the vendor
+
+    Returns:
+        VendorContext: Hydrated context, or None if the vendor or account does not exist
+    """
+    if context is not None and (account_id is None or context.account is not None):
+        return context
+    return load_vendor_context(db_driver, vendor_id, account_id)
+
+_collision_index = None
+_collision_index_lock = threading.Lock()
+
+def load_collision_index():
+    """
+    Builds the process-wide CollisionIndex from every Account and Vendor row and registers it with the
+    database drivers (track_collisions), which keep it current from the rows they fetch and write.
+    Called by the API server and the screening worker at startup so no screen waits on the build.
+
+    Returns:
+        CollisionIndex: The index, or None if the tables could not be read
+    """
+    global _collision_index
+    try:
+        index = build_collision_index(db_driver)
+    except Exception as e:
+        print(f"Error building collision index: {str(e)}")
+        return None
+    with _collision_index_lock:
+        _collision_index = index
+    track_collisions(index)
+    return index
+
+def get_collision_index():
+    """
+    Returns the process-wide CollisionIndex, building it on first use if it was not loaded at startup.
+    """
+    global _collision_index
+    index = _collision_index
+    if index is not None:
+        return index
+    with _collision_index_lock:
+        if _collision_index is None:
+            _collision_index = build_collision_index(db_driver)
+            track_collisions(_collision_index)
+        return _collision_index
+
+def find_portfolio_collisions(context):
+    """
+    Finds other accounts and vendors in the portfolio that share the vendor's canonical name or address.
+    The context's rows were fetched through the driver, so the index already reflects them.
+
+    Args:
+        context (VendorContext): Shared vendor data for this run
+
+    Returns:
+        dict: {"accounts": [...], "vendors": [...]} as returned by CollisionIndex.collisions
+    """
+    return get_collision_index().collisions(context.vendor)
+
+def task_one(account_id, vendor_id, context=None):
     """
     Compares vendor and account names/addresses for matches and updates flags accordingly.
+    Names and addresses are compared by their canonical forms and scored 0-100 (see AI/matching.py);
+    a score at or above `name_match_threshold` / `address_match_threshold` counts as a match.
+    Also flags the vendor when it shares a canonical name or address with any other borrower in the portfolio.
     """
     try:
-        # Use database driver to get due diligence data
-        data = db_driver.due_diligence_check(account_id, vendor_id)
+        # Use the shared vendor context to get due diligence data
+        context = get_vendor_context(vendor_id, context, account_id)
+        data = context.due_diligence_data() if context else None
         if data is None:
             print("Failed to get due diligence data")
             return None
 
         matches_found = False
+        flags = []
 
-        vendor_name = data["Vendor.Name"]
-        vendor_address = data["Vendor.Address"]
-        account_name = data["Account.Name"]
-        account_address = data["Account.Address"]
+        scores = compare_entities(context.vendor, context.account)
 
         # Check for matches and update flags
-        if vendor_name == account_name or vendor_address == account_address:
+        if scores["name_match"] or scores["address_match"]:
             matches_found = True
+            flags.append("name/address")
 
-            # Update vendor flags directly through database driver
-            flag_type = "name/address"
-            update_success = db_driver.update_flags(vendor_id, flag_type)
+        # Check the rest of the portfolio for borrowers sharing the vendor's name or address
+        collisions = find_portfolio_collisions(context)
+        other_accounts = [c for c in collisions["accounts"] if str(c["id"]) != str(account_id)]
+        if other_accounts:
+            flags.append(f"Vendor shares name/address with {len(other_accounts)} other account(s)")
 
-            if not update_success:
-                print(f"Failed to update flags for vendor {vendor_id}")
+        # Update vendor flags directly through database driver
+        if flags and not db_driver.update_flags_many(vendor_id, flags):
+            print(f"Failed to update flags for vendor {vendor_id}")
 
         return {
             "matches_found": matches_found,
+            "scores": scores,
+            "collisions": collisions,
             "data": data
         }
 
@@ -142,19 +252,35 @@ TASK TWO DOCS:
 		print("Multiple companies found")
 		return False"""
 
-def task_two_endpoint(name, city, state, country=None):
+def dnb_cache_key(name, city, state, country=None):
+    """
+    Builds the DNB cache key from the normalized search tuple.
+    """
+    parts = [name, city, state, country if country == "CA" else None]
+    return make_key(*[" ".join(str(p).lower().split()) if p else None for p in parts])
+
+def task_two_endpoint(name, city, state, country=None, refresh=False):
     """
     Makes API request to DNB endpoint with country-specific formatting.
+    Successful responses are cached for DNB_CACHE_TTL seconds and unsuccessful
+    ones (isSuccess false) for DNB_NEGATIVE_CACHE_TTL seconds.
 
     Args:
         name (str): Vendor name
         city (str): Vendor city
         state (str): Vendor state
         country (str, optional): Country code, used for non-US vendors
+        refresh (bool, optional): Ignore the cached response and call DNB
 
     Returns:
         dict: API response
     """
+    cache_key = dnb_cache_key(name, city, state, country)
+    if not refresh:
+        cached = get_cache().get("dnb", cache_key)
+        if cached is not None:
+            return cached
+
     url = "https://qfstagingservices.azurewebsites.net/api/v1/Account/DnBFindCompany"
 
     # Build params based on country
@@ -168,9 +294,13 @@ def task_two_endpoint(name, city, state, country=None):
     if country == "CA":
         params["country"] = country
 
-    response = requests.post(url, json=params)
+    response = get_client("dnb").post(url, json=params)
     response.raise_for_status()
-    return response.json()
+    result = response.json()
+
+    ttl = DNB_CACHE_TTL if result.get("isSuccess") else DNB_NEGATIVE_CACHE_TTL
+    get_cache().set("dnb", cache_key, result, ttl)
+    return result
 
 def task_two_validate_response(search_response):
 	search_response = search_response.get("dnbCompanies", [])
@@ -184,39 +314,73 @@ def task_two_validate_response(search_response):
 		print("Multiple companies found")
 		return 0
 
-def task_two(vendor_id):
+def task_two_extract_state(company):
+    """
+    Extracts the headquarters state (DNBaddress.state) from a DNB company record.
+
+    Args:
+        company (dict): A single entry from the "dnbCompanies" list
+
+    Returns:
+        str: State name or abbreviation, or None if the record has no address
+    """
+    address = company.get("primaryAddress") or company.get("address") or {}
+    if isinstance(address, dict):
+        region = address.get("addressRegion") or address.get("state")
+        if isinstance(region, dict):
+            region = region.get("name") or region.get("abbreviatedName")
+        if region:
+            return region
+    return company.get("state")
+
+def task_two(vendor_id, context=None, refresh=False):
     """
     Performs validation of vendors using DNB database.
 
     Args:
         vendor_id (str): The vendor ID to validate
+        context (VendorContext, optional): Shared vendor data for this run
+        refresh (bool, optional): Bypass the cached DNB response and search again
 
     Returns:
-        dict: Results of the validation including any flags
+        dict: Results of the validation including any flags. When DNB cannot be reached (circuit breaker open,
+              rate limited, timeouts or server errors) no flag is raised and the result is the deferred marker
+              {"validated": None, "deferred": True, "retry_after": seconds or None, "message": ...}
     """
     try:
         # Get vendor information
-        vendor = db_driver.get_vendor_by_id(vendor_id)
-        if not vendor:
-            print(f"Vendor with ID {vendor_id} not found")
+        context = get_vendor_context(vendor_id, context)
+        if not context:
             return None
+        vendor = context.vendor
 
         # Get vendor's country
-        vendor_country = db_driver.get_vendor_country(vendor_id)
+        vendor_country = context.country
         if not vendor_country:
             print(f"Could not determine country for vendor {vendor_id}")
             return None
 
         # Make API call with country-specific parameters
-        response = task_two_endpoint(
-            name=vendor["Name"],
-            city=vendor["City"],
-            state=vendor["State"],
-            country=vendor_country if vendor_country == "CA" else None
-        )
+        try:
+            response = task_two_endpoint(
+                name=vendor["Name"],
+                city=vendor["City"],
+                state=vendor["State"],
+                country=vendor_country if vendor_country == "CA" else None,
+                refresh=refresh
+            )
+        except RequestException as e:
+            # An outage says nothing about the vendor: defer the check instead of flagging it
+            print(f"DNB search deferred for vendor {vendor_id}: {str(e)}")
+            return {
+                "validated": None,
+                "deferred": True,
+                "retry_after": getattr(e, "retry_after", None),
+                "message": f"DNB unavailable, retry later: {str(e)}"
+            }
 
         if response["isSuccess"] == False:
-            update_success = db_driver.update_flags(vendor_id, "DNB - API call failed")
+            update_success = db_driver.update_flags_many(vendor_id, ["DNB - API call failed"])
             return {
                 "validated": False,
                 "message": "DNB API call failed"
@@ -231,18 +395,19 @@ def task_two(vendor_id):
                 # Exactly one company found
                 return {
                     "validated": True,
-                    "message": "Single company found in DNB database"
+                    "message": "Single company found in DNB database",
+                    "dnb_state": task_two_extract_state(response["dnbCompanies"][0])
                 }
             elif validation_result == 0:
                 # Multiple companies found
-                update_success = db_driver.update_flags(vendor_id, "DNB - Multiple companies found in database")
+                update_success = db_driver.update_flags_many(vendor_id, ["DNB - Multiple companies found in database"])
                 return {
                     "validated": False,
                     "message": "Multiple companies found in DNB database"
                 }
         else:
             # No company found but API call was successful
-            update_success = db_driver.update_flags(vendor_id, "DNB - Successful search - No company found")
+            update_success = db_driver.update_flags_many(vendor_id, ["DNB - Successful search - No company found"])
             return {
                 "validated": False,
                 "message": "No companies found in DNB search"
@@ -287,145 +452,208 @@ def task_two(vendor_id):
 #     - If status ≠ "Active" → flag
 # - **If vendor is not found at all** → flag
 
-def call_perplexity_api(prompt):
+def perplexity_cache_key(data):
+    """
+    Builds the response cache key for a Perplexity request from its model, prompts and temperature.
+    """
+    system_prompt = next((m["content"] for m in data["messages"] if m["role"] == "system"), None)
+    user_prompt = next((m["content"] for m in data["messages"] if m["role"] == "user"), None)
+    return make_key(data["model"], system_prompt, user_prompt, data.get("temperature"))
+
+def call_perplexity_api(prompt, cache_ttl=None, refresh=False, cacheable=None):
     """
     Call the Perplexity API to analyze HTML content.
 
     Args:
         prompt (str): Prompt to send to Perplexity
+        cache_ttl (int, optional): Seconds to reuse the response for an identical prompt. No caching if None
+        refresh (bool, optional): Skip the cached response and call Perplexity, then store the new response
+        cacheable (callable, optional): Called with the response; it is only cached when this returns True,
+            so an answer the caller cannot use is asked again next time
 
     Returns:
         str: Perplexity's response
+
+    Raises:
+        ProviderThrottled: If Perplexity is still rate limiting after retries
+        HTTPError: If Perplexity answers with any other non-200 status
+        requests.RequestException: If Perplexity cannot be reached or times out
     """
-    try:
-        headers = {
-            "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
-            "Content-Type": "application/json"
-        }
+    headers = {
+        "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
+        "Content-Type": "application/json"
+    }
 
-        data = {
-            #"model": "llama-3.1-sonar-small-128k-online",
-            "model": "sonar",
-
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "Be precise and concise."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.2,
-            "top_p": 0.9,
-            "return_citations": True,
-            "stream": False
-        }
+    data = {
+        #"model": "llama-3.1-sonar-small-128k-online",
+        "model": "sonar",
 
-        response = requests.post(
-            "https://api.perplexity.ai/chat/completions",
-            headers=headers,
-            json=data
-        )
+        "messages": [
+            {
+                "role": "system",
+                "content": "Be precise and concise."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "temperature": 0.2,
+        "top_p": 0.9,
+        "return_citations": True,
+        "stream": False
+    }
 
-        if response.status_code == 200:
-            return response.json()["choices"][0]["message"]["content"]
-        else:
-            # Print detailed error information
-            print(f"Perplexity API Error Details:")
-            print(f"Status Code: {response.status_code}")
-            print(f"Response Headers: {response.headers}")
-            print(f"Response Body: {response.text}")
-            print(f"Request Headers: {headers}")
-            print(f"Request Data: {data}")
-
-            return json.dumps({
-                "found": False,
-                "registration_date": None,
-                "years_in_business": None,
-                "status": None,
-                "explanation": f"API error: {response.status_code} - {response.text}"
-            })
+    cache_key = perplexity_cache_key(data)
+    if cache_ttl and not refresh:
+        cached = get_cache().get("perplexity", cache_key)
+        if cached is not None:
+            return cached
 
-    except Exception as e:
-        print(f"Error calling Perplexity API: {str(e)}")
-        return json.dumps({
-            "found": False,
-            "registration_date": None,
-            "years_in_business": None,
-            "status": None,
-            "explanation": f"Error calling Perplexity API: {str(e)}"
-        })
+    response = get_client("perplexity").post(
+        "https://api.perplexity.ai/chat/completions",
+        headers=headers,
+        json=data
+    )
+
+    if response.status_code != 200:
+        # An outage says nothing about the business, so it must not read as "not found"
+        raise HTTPError(f"Perplexity returned {response.status_code}: {response.text[:200]}", response=response)
+
+    content = response.json()["choices"][0]["message"]["content"]
+    if cache_ttl and (cacheable is None or cacheable(content)):
+        get_cache().set("perplexity", cache_key, content, cache_ttl)
+    return content
 
 def get_state_sos_url(state):
     """
-    Get the Secretary of State URL for a given state using the database lookup.
+    Get the Secretary of State URL for a given state from the in-process state registry.
 
     Args:
-        state (str): State name (can be in any case)
+        state (str): Full state name or postal code, in any case or spacing
 
     Returns:
         str: URL for the state's Secretary of State website, or None if not found
     """
-    try:
-        # Format state name to lowercase and remove spaces
-        formatted_state = state.lower().replace(" ", "")
+    url = get_state_registry().get_url(state)
+    if url:
+        print(f"Found URL for state {state}: {url}")
+        return url
+    print(f"State '{state}' not found in Secretary of State lookup table")
+    return None
+
+def analyze_secretary_of_state_page(html_content, refresh=False):
+    """
+    Uses Perplexity to read a Secretary of State results page.
 
-        # Get URL from database
-        url = db_driver.get_state_link(formatted_state)
+    Args:
+        html_content (str): Results page HTML
+        refresh (bool, optional): Bypass cached Perplexity responses and fetch fresh ones
 
-        if url:
-            print(f"Found URL for state {state}: {url}")
-            return url
-        else:
-            print(f"State '{state}' not found in Secretary of State lookup table")
-            return None
+    Returns:
+        dict: {"found", "registration_date", "years_in_business", "status", "active", "explanation",
+               "distillation"}, or the same keys plus "error" and "flags" if the response could not be parsed
+    """
+    # Strip scripts, styles, navigation and hidden markup so only the visible results reach the prompt
+    distilled = distill_html(html_content, max_tokens=SOS_PROMPT_TOKEN_BUDGET)
+    telemetry = distilled["telemetry"]
+    print(f"Distilled Secretary of State page from {telemetry['original_chars']} to "
+          f"{telemetry['distilled_chars']} characters (~{telemetry['estimated_tokens']} tokens)")
+    if telemetry["truncated"]:
+        print(f"Secretary of State page truncated to fit the prompt budget: {telemetry['dropped_lines']} lines dropped")
+
+    # Create a prompt for Perplexity to analyze the page content
+    prompt = f"""
+    I have scraped the Secretary of State website for a business search. Here is the visible text of the
+    results page, with table rows written as cells separated by " | ":
+
+    {distilled["text"]}
+
+    Please analyze this content and extract the following information:
+    1. Is the business found in the registry? (Yes/No)
+    2. When was the business registered? (date)
+    3. How many years has the business been operating? (calculate from registration date to today)
+    4. What is the current status of the business? (Active, Inactive, etc.)
+    5. Is the status "Active" or equivalent? (Yes/No)
+
+    Return your findings in this JSON format:
+    {{
+        "found": true/false,
+        "registration_date": "MM/DD/YYYY" or null,
+        "years_in_business": number or null,
+        "status": "status text" or null,
+        "active": true/false,
+        "explanation": "brief explanation of findings"
+    }}
+    """
 
-    except Exception as e:
-        print(f"Error reading Secretary of State URL for {state}: {str(e)}")
-        return None
+    def parses(content):
+        try:
+            json.loads(content)
+            return True
+        except ValueError:
+            return False
+
+    # Call Perplexity API; only answers that parse are cached
+    perplexity_response = call_perplexity_api(
+        prompt, cache_ttl=PERPLEXITY_CACHE_TTLS["secretary_of_state"], refresh=refresh, cacheable=parses
+    )
+
+    # Parse the response
+    try:
+        results = json.loads(perplexity_response)
+    except json.JSONDecodeError:
+        print(f"Invalid JSON response from Perplexity: {perplexity_response}")
+        return {
+            "error": "Error parsing Perplexity response",
+            "found": False,
+            "registration_date": None,
+            "years_in_business": None,
+            "status": None,
+            "active": False,
+            "explanation": "Error parsing Perplexity response",
+            "flags": ["Error parsing Secretary of State results"],
+            "flag_count": 1
+        }
+
+    results["distillation"] = telemetry
+    return results
 
-async def check_secretary_of_state(vendor_name, state):
+async def check_secretary_of_state(vendor_name, state, refresh=False):
     """
-    Use Playwright to scrape Secretary of State website and Perplexity AI to analyze the content.
+    Use Playwright to scrape Secretary of State website and read the results.
+    States with an adapter in AI/sos_adapters.py are searched and parsed deterministically;
+    Perplexity AI analyzes the page only when there is no adapter or its parse fails.
 
     Args:
         vendor_name (str): Name of the vendor to check
         state (str): State name (e.g., "New York")
+        refresh (bool, optional): Bypass cached Perplexity responses and fetch fresh ones
 
     Returns:
-        dict: Results including found status, years in business, and active status
+        dict: Results including found status, years in business, active status and
+              "parsed_by" ("adapter" or "perplexity")
     """
     try:
         # Get the appropriate Secretary of State URL
-        sos_url = get_state_sos_url(state.lower())
+        sos_url = get_state_sos_url(state)
         if not sos_url:
             return {"error": f"No Secretary of State URL found for {state}"}
+        state = get_state_registry().resolve(state)
 
-        # Use Playwright to scrape the website
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
+        adapter = get_adapter(state)
 
+        # Use a warm Playwright browser from the shared pool to scrape the website
+        async with get_browser_pool().page() as page:
             try:
-                # Navigate to the Secretary of State website
-                await page.goto(sos_url)
-
-                # Wait for the search form to be visible
-                await page.wait_for_selector('input[type="text"]', timeout=10000)
-
-                # Enter the vendor name in the search field
-                await page.fill('input[type="text"]', vendor_name)
-
-                # Click the search button
-                await page.click('button[type="submit"]')
-
-                # Wait for results to load
-                await page.wait_for_selector('.search-results', timeout=10000)
-
-                # Get the HTML content of the results
-                html_content = await page.content()
+                html_content = None
+                if adapter is not None:
+                    try:
+                        html_content = await adapter.search(page, sos_url, vendor_name)
+                    except Exception as e:
+                        print(f"{state} adapter search failed, using generic search: {str(e)}")
+                if html_content is None:
+                    html_content = await GENERIC_SOS_ADAPTER.search(page, sos_url, vendor_name)
 
             except Exception as e:
                 print(f"Error scraping website: {str(e)}")
@@ -434,51 +662,16 @@ async def check_secretary_of_state(vendor_name, state):
                     "flags": ["Error accessing Secretary of State website"],
                     "flag_count": 1
                 }
-            finally:
-                await browser.close()
-
-        # Create a prompt for Perplexity to analyze the HTML content
-        prompt = f"""
-        I have scraped the Secretary of State website for a business search. Here is the HTML content:
-
-        {html_content}
-
-        Please analyze this content and extract the following information:
-        1. Is the business found in the registry? (Yes/No)
-        2. When was the business registered? (date)
-        3. How many years has the business been operating? (calculate from registration date to today)
-        4. What is the current status of the business? (Active, Inactive, etc.)
-        5. Is the status "Active" or equivalent? (Yes/No)
-
-        Return your findings in this JSON format:
-        {{
-            "found": true/false,
-            "registration_date": "MM/DD/YYYY" or null,
-            "years_in_business": number or null,
-            "status": "status text" or null,
-            "active": true/false,
-            "explanation": "brief explanation of findings"
-        }}
-        """
-
-        # Call Perplexity API
-        perplexity_response = call_perplexity_api(prompt)
-
-        # Parse the response
-        try:
-            results = json.loads(perplexity_response)
-        except json.JSONDecodeError:
-            print(f"Invalid JSON response from Perplexity: {perplexity_response}")
-            return {
-                "found": False,
-                "registration_date": None,
-                "years_in_business": None,
-                "status": None,
-                "active": False,
-                "explanation": "Error parsing Perplexity response",
-                "flags": ["Error parsing Secretary of State results"],
-                "flag_count": 1
-            }
+
+        # Parsing and the Perplexity call block; run them off the event loop shared by every check
+        results = await asyncio.to_thread(adapter.parse, html_content, vendor_name) if adapter is not None else None
+        if results is not None:
+            results["parsed_by"] = "adapter"
+        else:
+            results = await asyncio.to_thread(analyze_secretary_of_state_page, html_content, refresh=refresh)
+            if "flags" in results:
+                return results
+            results["parsed_by"] = "perplexity"
 
         # Determine if any flags should be set based on the criteria
         flags = []
@@ -494,6 +687,9 @@ async def check_secretary_of_state(vendor_name, state):
 
         return results
 
+    except RequestException:
+        # Perplexity rate limited or unavailable: task_three defers the check
+        raise
     except Exception as e:
         return {
             "error": str(e),
@@ -502,7 +698,7 @@ async def check_secretary_of_state(vendor_name, state):
         }
 
 
-async def task_three(vendor_id):
+async def task_three(vendor_id, state=None, context=None, refresh=False):
     """
     Checks the vendor in their state's official business registry (Secretary of State).
     Adds flags if:
@@ -512,28 +708,33 @@ async def task_three(vendor_id):
 
     Args:
         vendor_id (str): The vendor ID to check
+        state (str, optional): DNB headquarters state from task_two. Falls back to Vendor.State
+        context (VendorContext, optional): Shared vendor data for this run
+        refresh (bool, optional): Bypass cached Perplexity responses and fetch fresh ones
 
     Returns:
-        dict: Results of the check including any flags raised
+        dict: Results of the check including any flags raised. When Perplexity is still rate limiting after
+              retries, or cannot be reached (timeouts, server errors), nothing is written and the result is the
+              deferred marker {"success": False, "deferred": True, "retry_after": None, "message": ...}
     """
     try:
-        # Get vendor information
-        vendor = db_driver.get_vendor_by_id(vendor_id)
-        if not vendor:
-            print(f"Vendor with ID {vendor_id} not found")
+        # Database calls block, so they run in a thread instead of on the shared event loop
+        context = await asyncio.to_thread(get_vendor_context, vendor_id, context)
+        if not context:
             return None
+        vendor = context.vendor
 
         vendor_name = vendor["Name"]
-        vendor_state = vendor["State"]
+        vendor_state = state or vendor["State"]
 
         # Check the vendor in the Secretary of State registry
-        sos_results = await check_secretary_of_state(vendor_name, vendor_state)
+        sos_results = await check_secretary_of_state(vendor_name, vendor_state, refresh=refresh)
 
         # Process results and update vendor record
         if "error" in sos_results:
             # Handle error case
             print(f"Error checking Secretary of State: {sos_results['error']}")
-            db_driver.update_flags(vendor_id, "Error checking Secretary of State")
+            await asyncio.to_thread(db_driver.update_flags_many, vendor_id, ["Error checking Secretary of State"])
             return {
                 "success": False,
                 "message": sos_results["error"]
@@ -544,24 +745,20 @@ async def task_three(vendor_id):
         active_status = sos_results.get("active", False)
 
         # Update the database with SOS information
-        db_driver.update_sos_info(vendor_id, years_in_business, active_status)
+        await asyncio.to_thread(db_driver.update_sos_info, vendor_id, years_in_business, active_status)
 
         # Add flags based on the criteria
         flags_added = []
 
         if not sos_results.get("found", False):
-            flag = "Business not found in Secretary of State registry"
-            db_driver.update_flags(vendor_id, flag)
-            flags_added.append(flag)
+            flags_added.append("Business not found in Secretary of State registry")
         elif years_in_business is not None and years_in_business < 5:
-            flag = f"Business operating for only {years_in_business} years"
-            db_driver.update_flags(vendor_id, flag)
-            flags_added.append(flag)
+            flags_added.append(f"Business operating for only {years_in_business} years")
         elif not active_status:
             status = sos_results.get("status", "Unknown")
-            flag = f"Business status is '{status}' instead of 'Active'"
-            db_driver.update_flags(vendor_id, flag)
-            flags_added.append(flag)
+            flags_added.append(f"Business status is '{status}' instead of 'Active'")
+
+        await asyncio.to_thread(db_driver.update_flags_many, vendor_id, flags_added)
 
         return {
             "success": True,
@@ -574,6 +771,15 @@ async def task_three(vendor_id):
             "flag_count": len(flags_added)
         }
 
+    except RequestException as e:
+        # Same as task_five: no verdict on the registration, so defer the check instead of flagging it
+        print(f"Secretary of State check deferred for vendor {vendor_id}: {str(e)}")
+        return {
+            "success": False,
+            "deferred": True,
+            "retry_after": getattr(e, "retry_after", None),
+            "message": f"Secretary of State analysis unavailable, retry later: {str(e)}"
+        }
     except Exception as e:
         print(f"Operation failed: {str(e)}")
         return {
@@ -581,10 +787,54 @@ async def task_three(vendor_id):
             "message": str(e)
         }
 
+def screen_ofac(vendor_name):
+    """
+    Screens a vendor name against the OFAC lists.
+    Uses the local screening index (AI/ofac.py) when `ofac_list_dir` is configured and
+    falls back to the Treasury search website otherwise.
+
+    Args:
+        vendor_name (str): Name of the vendor to check
+
+    Returns:
+        dict:
+            {
+                "match_found": True if any entry scored 80 or higher,
+                "matches": Matched list entries with scores (empty for the website search),
+                "source": "local" or "website"
+            }
+    """
+    index = get_ofac_index()
+    if index is None:
+        return {
+            "match_found": check_ofac_sanctions_website(vendor_name),
+            "matches": [],
+            "source": "website"
+        }
+
+    matches = index.screen(vendor_name)
+    return {
+        "match_found": len(matches) > 0,
+        "matches": matches,
+        "source": "local"
+    }
+
 def check_ofac_sanctions_list(vendor_name):
+    """
+    Checks the OFAC Sanctions List for the vendor name with a minimum score of 80.
+
+    Args:
+        vendor_name (str): Name of the vendor to check
+
+    Returns:
+        bool: True if a match is found, False otherwise
+    """
+    return screen_ofac(vendor_name)["match_found"]
+
+def check_ofac_sanctions_website(vendor_name):
     """
     Uses Selenium to check the OFAC Sanctions List for the vendor name.
-    Sets the minimum score to 80 as required.
+    Sets the minimum score to 80 as required. Drivers come from the shared Selenium pool.
 
     Args:
         vendor_name (str): Name of the vendor to check
@@ -592,86 +842,73 @@ def check_ofac_sanctions_list(vendor_name):
     Returns:
         bool: True if a match is found, False otherwise
     """
-    from selenium import webdriver
     from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
     from selenium.common.exceptions import TimeoutException, WebDriverException
-    from selenium.webdriver.chrome.options import Options
-    from webdriver_manager.chrome import ChromeDriverManager
 
     try:
-        # Set up Chrome options
-        chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_argument('--headless')  # Run in headless mode
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-
-        # Initialize the driver with webdriver-manager
-        driver = webdriver.Chrome(executable_path=ChromeDriverManager().install(), options=chrome_options)
-        driver.set_page_load_timeout(30)  # Set page load timeout
-        wait = WebDriverWait(driver, 20)  # Set explicit wait timeout
-
-        try:
-            # Navigate to the OFAC Sanctions List search page
-            driver.get("https://sanctionssearch.ofac.treas.gov/")
-
-            # Wait for and find the name input field
-            name_input = wait.until(
-                EC.presence_of_element_located((By.ID, "ctl00_MainContent_txtLastName"))
-            )
-            name_input.send_keys(vendor_name)
-
-            # Set the slider value to 80 using JavaScript
-            # First, locate the hidden input that stores the slider value
-            slider_input = wait.until(
-                EC.presence_of_element_located((By.ID, "ctl00_MainContent_Slider1"))
-            )
+        # Borrow a warm driver from the shared pool
+        with get_selenium_pool().driver() as driver:
+            wait = WebDriverWait(driver, 20)  # Set explicit wait timeout
 
-            # Also find the visible bound control that shows the value
-            bound_control = wait.until(
-                EC.presence_of_element_located((By.ID, "ctl00_MainContent_Slider1_Boundcontrol"))
-            )
-
-            # Use JavaScript to set both values to 80
-            driver.execute_script("arguments[0].value = '80';", slider_input)
-            driver.execute_script("arguments[0].value = '80';", bound_control)
-
-            # Click the search button
-            search_button = wait.until(
-                EC.element_to_be_clickable((By.ID, "ctl00_MainContent_btnSearch"))
-            )
-            search_button.click()
-
-            # Wait for results to load
-            results_text = wait.until(
-                EC.presence_of_element_located((By.ID, "ctl00_MainContent_lblResults"))
-            ).text
-
-            print(f"Results text: {results_text}")
-
-            # Parse the number of results found
-            match = re.search(r'Lookup Results: (\d+) Found', results_text)
-            if match:
-                match_count = int(match.group(1))
-                print(f"Found {match_count} matches")
-                return match_count > 0
-            else:
-                print("No match count found in results text")
-                # Check if there are any results in the table
-                results_table = driver.find_elements(By.CSS_SELECTOR, '#scrollResults table tr')
-                return len(results_table) > 0
+            try:
+                # Navigate to the OFAC Sanctions List search page
+                driver.get("https://sanctionssearch.ofac.treas.gov/")
+
+                # Wait for and find the name input field
+                name_input = wait.until(
+                    EC.presence_of_element_located((By.ID, "ctl00_MainContent_txtLastName"))
+                )
+                name_input.send_keys(vendor_name)
+
+                # Set the slider value to 80 using JavaScript
+                # First, locate the hidden input that stores the slider value
+                slider_input = wait.until(
+                    EC.presence_of_element_located((By.ID, "ctl00_MainContent_Slider1"))
+                )
+
+                # Also find the visible bound control that shows the value
+                bound_control = wait.until(
+                    EC.presence_of_element_located((By.ID, "ctl00_MainContent_Slider1_Boundcontrol"))
+                )
+
+                # Use JavaScript to set both values to 80
+                driver.execute_script("arguments[0].value = '80';", slider_input)
+                driver.execute_script("arguments[0].value = '80';", bound_control)
 
-        except TimeoutException as e:
-            print(f"Timeout during OFAC search: {str(e)}")
-            return True  # Be cautious and return True to trigger manual review
+                # Click the search button
+                search_button = wait.until(
+                    EC.element_to_be_clickable((By.ID, "ctl00_MainContent_btnSearch"))
+                )
+                search_button.click()
 
-        except Exception as e:
-            print(f"Error during OFAC search: {str(e)}")
-            return True  # Be cautious and return True to trigger manual review
+                # Wait for results to load
+                results_text = wait.until(
+                    EC.presence_of_element_located((By.ID, "ctl00_MainContent_lblResults"))
+                ).text
+
+                print(f"Results text: {results_text}")
+
+                # Parse the number of results found
+                match = re.search(r'Lookup Results: (\d+) Found', results_text)
+                if match:
+                    match_count = int(match.group(1))
+                    print(f"Found {match_count} matches")
+                    return match_count > 0
+                else:
+                    print("No match count found in results text")
+                    # Check if there are any results in the table
+                    results_table = driver.find_elements(By.CSS_SELECTOR, '#scrollResults table tr')
+                    return len(results_table) > 0
+
+            except TimeoutException as e:
+                print(f"Timeout during OFAC search: {str(e)}")
+                return True  # Be cautious and return True to trigger manual review
 
-        finally:
-            driver.quit()
+            except Exception as e:
+                print(f"Error during OFAC search: {str(e)}")
+                return True  # Be cautious and return True to trigger manual review
 
     except WebDriverException as e:
         print(f"Error initializing browser: {str(e)}")
@@ -681,28 +918,30 @@ def check_ofac_sanctions_list(vendor_name):
         print(f"Unexpected error: {str(e)}")
         return True  # Be cautious and return True to trigger manual review
 
-def task_four(vendor_id):
+def task_four(vendor_id, context=None):
     """
     Performs OFAC Sanctions List check for a vendor.
     Adds a flag if the vendor name appears on the OFAC Sanctions List.
 
     Args:
         vendor_id (str): The vendor ID to check
+        context (VendorContext, optional): Shared vendor data for this run
 
     Returns:
         dict: Results of the check including whether a match was found
     """
     try:
         # Get vendor information
-        vendor = db_driver.get_vendor_by_id(vendor_id)
-        if not vendor:
-            print(f"Vendor with ID {vendor_id} not found")
+        context = get_vendor_context(vendor_id, context)
+        if not context:
             return None
+        vendor = context.vendor
 
         vendor_name = vendor["Name"]
 
         # Check the OFAC sanctions list
-        match_found = check_ofac_sanctions_list(vendor_name)
+        screening = screen_ofac(vendor_name)
+        match_found = screening["match_found"]
 
         # Update the database with OFAC information
         db_driver.update_ofac_info(vendor_id, match_found)
@@ -710,12 +949,13 @@ def task_four(vendor_id):
         # Add flag if a match was found
         if match_found:
             flag = "Vendor found on OFAC Sanctions List"
-            db_driver.update_flags(vendor_id, flag)
+            db_driver.update_flags_many(vendor_id, [flag])
 
             return {
                 "success": True,
                 "vendor_name": vendor_name,
                 "match_found": True,
+                "matches": screening["matches"],
                 "flags_added": [flag],
                 "flag_count": 1
             }
@@ -724,6 +964,7 @@ def task_four(vendor_id):
             "success": True,
             "vendor_name": vendor_name,
             "match_found": False,
+            "matches": [],
             "flags_added": [],
             "flag_count": 0
         }
@@ -735,15 +976,127 @@ def task_four(vendor_id):
             "message": str(e)
         }
 
-def call_perplexity_dict(prompt):
+def task_four_batch(vendors=None, index=None):
+    """
+    Re-screens many vendors against the local OFAC index in one pass.
+    Updates Vendor.OfacHitFound for every vendor and flags the ones with a match, skipping vendors
+    already marked as a hit or already carrying the flag so repeated runs do not add it again.
+
+    Args:
+        vendors (list of dict, optional): Vendor rows to screen. Defaults to every vendor
+        index (OfacIndex, optional): Index to screen against. Defaults to the current local index
+
+    Returns:
+        dict:
+            {
+                "screened": Number of vendors screened,
+                "hits": {vendor_id: list of matches} for vendors with a match,
+                "flagged": Vendor IDs that were newly flagged
+            }
+
+    Raises:
+        RuntimeError: If no local OFAC index is configured
+    """
+    index = index or get_ofac_index()
+    if index is None:
+        raise RuntimeError("No local OFAC index configured; set ofac_list_dir")
+
+    if vendors is None:
+        vendors = db_driver.get_vendors()
+    results = index.screen_many([vendor["Name"] for vendor in vendors])
+
+    flag = "Vendor found on OFAC Sanctions List"
+    hits = {}
+    flagged = []
+    for vendor in vendors:
+        matches = results[vendor["Name"]]
+        if matches:
+            hits[vendor["ID"]] = matches
+            if vendor.get("OfacHitFound") or flag in (vendor.get("Flags") or []):
+                continue
+            db_driver.update_flags_many(vendor["ID"], [flag])
+            flagged.append(vendor["ID"])
+    db_driver.update_ofac_info_many({vendor["ID"]: vendor["ID"] in hits for vendor in vendors})
+
+    return {
+        "screened": len(vendors),
+        "hits": hits,
+        "flagged": flagged
+    }
+
+def rescreen_vendors_for_new_ofac_entries(added_entries, index=None):
+    """
+    Rescreens only the vendors whose names block-match newly added OFAC entries, in one
+    task_four_batch pass over the rows already loaded, so vendors already flagged are not flagged again.
+    Used as the OfacRefresher callback so a list update does not rescreen the whole vendor table.
+
+    Args:
+        added_entries (list of SdnEntry): Entries added by the list update
+        index (OfacIndex, optional): The refreshed index. Defaults to the current one
+
+    Returns:
+        list: Vendor IDs that were rescreened
+    """
+    added_index = OfacIndex({entry.entry_id: entry for entry in added_entries})
+    matched = [vendor for vendor in db_driver.get_vendors() if added_index.candidates(normalize_name(vendor["Name"]))]
+    if matched:
+        task_four_batch(matched, index=index)
+    print(f"Rescreened {len(matched)} vendors against {len(added_entries)} new OFAC entries")
+    return [vendor["ID"] for vendor in matched]
+
+def start_ofac_refresher(interval=None):
+    """
+    Starts the background OFAC list refresher for this process.
+    New list entries trigger a targeted rescreen of the vendors that block-match them.
+
+    Returns:
+        OfacRefresher: The running refresher, or None if `ofac_list_dir` is not set
+    """
+    if not os.getenv("ofac_list_dir"):
+        return None
+    refresher = OfacRefresher(interval=interval, on_added=rescreen_vendors_for_new_ofac_entries)
+    refresher.start()
+    return refresher
+
+def start_state_registry_refresher(interval=None):
+    """
+    Starts refreshing the Secretary of State links from the Supabase `States` table for this process.
+    Only runs when `state_registry_refresh_interval` is set or an interval is passed.
+
+    Returns:
+        StateRegistryRefresher: The running refresher, or None if refreshing is not configured
+    """
+    if interval is None and not os.getenv("state_registry_refresh_interval"):
+        return None
+    refresher = StateRegistryRefresher(db_driver, interval=interval)
+    refresher.start()
+    return refresher
+
+def start_refreshers():
+    """
+    Starts the OFAC list and Secretary of State link refreshers that are configured for this process.
+    Called by the API server and the screening worker at startup.
+
+    Returns:
+        list: The running refreshers; call stop() on each at shutdown
+    """
+    return [refresher for refresher in (start_ofac_refresher(), start_state_registry_refresher()) if refresher is not None]
+
+def call_perplexity_dict(prompt, cache_ttl=None, refresh=False):
     """ Calls the Perplexity API on the prompt input.
 
     Args:
         prompt (str): The prompt Perplexity is given
+        cache_ttl (int, optional): Seconds to reuse the response for an identical prompt. No caching if None
+        refresh (bool, optional): Skip the cached response and call Perplexity, then store the new response
 
     Returns:
         dict: Data returned by Perplexity
 
+    Raises:
+        ProviderThrottled: If Perplexity is still rate limiting after retries
+        HTTPError: If Perplexity answers with any other non-200 status
+        ValueError: If the answer contains no JSON object
     """
     url = "https://api.perplexity.ai/chat/completions"
     api_key = PERPLEXITY_API_KEY
@@ -763,21 +1116,29 @@ def call_perplexity_dict(prompt):
         ]
     }
 
-    response = requests.post(url, headers=headers, json=data)
+    cache_key = perplexity_cache_key(data)
+    result = get_cache().get("perplexity", cache_key) if cache_ttl and not refresh else None
+    from_cache = result is not None
 
-    if response.status_code == 200:
+    if not from_cache:
+        response = get_client("perplexity").post(url, headers=headers, json=data)
+        if response.status_code != 200:
+            # Callers index into the result, so a failed call must not look like an empty answer
+            raise HTTPError(f"Perplexity returned {response.status_code}: {response.text[:200]}", response=response)
         result = response.json()["choices"][0]["message"]["content"]
-        match = re.search(r'\{[\s\S]*?\}', result)
-        if match:
-            json_block = match.group(0)
-            return json.loads(json_block)
-        else:
-            raise ValueError("No valid JSON object found in response.")
+
+    match = re.search(r'\{[\s\S]*?\}', result)
+    if match:
+        json_block = match.group(0)
+        parsed = json.loads(json_block)
+        # Only cache responses that parsed, so a malformed answer is retried next time
+        if cache_ttl and not from_cache:
+            get_cache().set("perplexity", cache_key, result, cache_ttl)
+        return parsed
     else:
-        print("Error:", response.status_code)
-        print(response.text)
+        raise ValueError("No valid JSON object found in response.")
 
-def google_search_validation(vendor_name, vendor_address):
+def google_search_validation(vendor_name, vendor_address, refresh=False):
     """
     Uses Perplexity to Google search for the vendor and extracts the top Google
     Business result.
@@ -790,9 +1151,13 @@ def google_search_validation(vendor_name, vendor_address):
     Args:
         vendor_name (str): The name of the vendor
         vendor_address (str): The address of the vendor
+        refresh (bool, optional): Bypass cached Perplexity responses and fetch fresh ones
 
     Returns:
         flags (list of str): Flags indicating issues with the vendor
+
+    Raises:
+        requests.RequestException: If Perplexity is still rate limiting after retries, or cannot be reached
     """
     # Create a prompt for Perplexity to Google search for the vendor and extract business address and website data
     prompt = f"""Please search for the business {vendor_name} {vendor_address} on Google.
@@ -813,7 +1178,7 @@ def google_search_validation(vendor_name, vendor_address):
             }}"""
     try:
         # Input this prompt to Perpexity and parse the response
-        response = call_perplexity_dict(prompt)
+        response = call_perplexity_dict(prompt, cache_ttl=PERPLEXITY_CACHE_TTLS["google_search"], refresh=refresh)
 
         # Flag for no business found, no website found, no address listed, or mismatched addresses
         flags = []
@@ -826,71 +1191,153 @@ def google_search_validation(vendor_name, vendor_address):
         elif not response["website_address_found"] or not response["website_address_match"]:
             flags.append("Address listed on website does not match vendor address")
         return flags
+    except RequestException:
+        # Perplexity rate limited or unavailable: no verdict on the vendor, so the caller defers the check
+        raise
     except Exception as e:
         raise RuntimeError(f"Failed to Google search for vendor {vendor_name}.")
 
-def google_maps_validation(vendor_address):
+def normalize_address(address):
     """
-    Uses Google Maps API to validate whether the vendor address corresponds to a
-    physical location that is likely to be a business.
+    Normalizes an address for use as a cache key: folded like every other name (see fold_text), then lowercased.
+    """
+    return fold_text(address).lower()
+
+def geocode_address(vendor_address, refresh=False):
+    """
+    Geocodes an address with the Google Geocoding API, reusing cached results for the same normalized address.
+    ZERO_RESULTS is cached too (for a shorter time) so unknown addresses are not looked up again on every rescreen.
 
     Args:
-        vendor_address (str): The vendor address to check
+        vendor_address (str): The address to geocode
+        refresh (bool, optional): Ignore the cached result and call the API
 
     Returns:
-        list of str: Flags indicating issues with the address
+        dict:
+            {
+                "status": Geocoding API status ("OK", "ZERO_RESULTS", ...)
+                "location_type": geometry.location_type of the first result, or None
+                "place_id": place_id of the first result, or None
+            }
+
+    Raises:
+        requests.RequestException: If Google fails the request (HTTP error or GOOGLE_UNAVAILABLE_STATUSES)
     """
-    # Geocode the address
+    cache_key = normalize_address(vendor_address)
+    if not refresh:
+        cached = get_cache().get("google_geocode", cache_key)
+        if cached is not None:
+            return cached
+
     geocode_url = "https://maps.googleapis.com/maps/api/geocode/json"
     params = {
         "address": vendor_address,
         "key": GOOGLE_MAPS_API_KEY
     }
+    response = get_client("google").get(geocode_url, params=params)
+    response.raise_for_status()
+    geo_response = response.json()
+    if geo_response["status"] in GOOGLE_UNAVAILABLE_STATUSES:
+        raise RequestException(f"Google geocoding returned {geo_response['status']}")
+
+    geocode = {"status": geo_response["status"], "location_type": None, "place_id": None}
+    if geo_response["status"] == "OK" and len(geo_response["results"]) > 0:
+        result = geo_response["results"][0]
+        geocode["location_type"] = result["geometry"]["location_type"]
+        geocode["place_id"] = result.get("place_id")
+        get_cache().set("google_geocode", cache_key, geocode, GOOGLE_CACHE_TTLS["geocode"])
+    elif geo_response["status"] == "ZERO_RESULTS":
+        get_cache().set("google_geocode", cache_key, geocode, GOOGLE_CACHE_TTLS["zero_results"])
+    return geocode
+
+def get_place_types(place_id, refresh=False):
+    """
+    Fetches the Place Details types for a place_id, reusing cached results.
+
+    Args:
+        place_id (str): Google place_id from geocoding
+        refresh (bool, optional): Ignore the cached result and call the API
+
+    Returns:
+        list of str: Place types, or None if Place Details did not return OK
 
+    Raises:
+        requests.RequestException: If Google fails the request (HTTP error or GOOGLE_UNAVAILABLE_STATUSES)
+    """
+    if not refresh:
+        cached = get_cache().get("google_place_types", place_id)
+        if cached is not None:
+            return cached
+
+    places_url = "https://maps.googleapis.com/maps/api/place/details/json"
+    place_params = {
+        "place_id": place_id,
+        "key": GOOGLE_MAPS_API_KEY,
+        "fields": "name,business_status,types"
+    }
+    response = get_client("google").get(places_url, params=place_params)
+    response.raise_for_status()
+    place_response = response.json()
+    if place_response.get("status") in GOOGLE_UNAVAILABLE_STATUSES:
+        raise RequestException(f"Google Place Details returned {place_response['status']}")
+
+    if place_response.get("status") != "OK":
+        return None
+    types = place_response["result"].get("types", [])
+    get_cache().set("google_place_types", place_id, types, GOOGLE_CACHE_TTLS["place_details"])
+    return types
+
+def google_maps_validation(vendor_address, refresh=False):
+    """
+    Uses Google Maps API to validate whether the vendor address corresponds to a
+    physical location that is likely to be a business.
+    Geocoding and Place Details results are cached by normalized address and place_id.
+
+    Args:
+        vendor_address (str): The vendor address to check
+        refresh (bool, optional): Ignore cached Google results and call the APIs
+
+    Returns:
+        list of str: Flags indicating issues with the address
+
+    Raises:
+        requests.RequestException: If Google is still over its query limit after retries, or fails the request
+    """
     try:
-        geo_response = requests.get(geocode_url, params=params).json()
+        # Geocode the address
+        geocode = geocode_address(vendor_address, refresh=refresh)
 
-        if geo_response["status"] != "OK" or len(geo_response["results"]) == 0:
+        if geocode["status"] != "OK":
             return ["Address details could not be found."]
 
-        result = geo_response["results"][0]
-        location_type = result["geometry"]["location_type"]
-        place_id = result.get("place_id")
-
         # If the location is not a physical building, flag
-        if location_type != "ROOFTOP":
+        if geocode["location_type"] != "ROOFTOP":
             return ["Address does not appear to be a physical building."]
 
-        if place_id:
-            places_url = "https://maps.googleapis.com/maps/api/place/details/json"
-            place_params = {
-                "place_id": place_id,
-                "key": GOOGLE_MAPS_API_KEY,
-                "fields": "name,business_status,types"
-            }
-
-            place_response = requests.get(places_url, params=place_params).json()
+        if geocode["place_id"]:
+            types = get_place_types(geocode["place_id"], refresh=refresh)
 
-            if place_response.get("status") == "OK":
-                types = place_response["result"].get("types", [])
+            if types is not None:
                 # If the location type does not correspond to a business, flag
                 if "establishment" not in types and "point_of_interest" not in types and "premise" not in types and "street_address" not in types:
                     return ["Address does not appear to a business establishment."]
                 # If the location type corresponds to a PO box, flag
                 if "post_office" in types or "mailbox" in types:
-                    print("B")
                     return ["Address appears to be a P.O. box or mail drop."]
             else:
                 return ["Address details could not be found."]
         else:
             return ["Address details could not be found."]
 
+    except RequestException:
+        # Over the Google quota or Google unavailable: no verdict on the address, so raise no flag
+        raise
     except Exception as e:
         return ["Address details could not be found."]
 
     return []
 
-def task_five(vendor_id):
+def task_five(vendor_id, context=None, refresh=False):
     """
     Performs validation of vendors using Perplexity for Google search and Google
     Maps API for Google Maps search.
@@ -900,6 +1347,8 @@ def task_five(vendor_id):
 
     Args:
         vendor_id (str): The vendor id
+        context (VendorContext, optional): Shared vendor data for this run
+        refresh (bool, optional): Bypass cached Perplexity and Google Maps responses and fetch fresh ones
 
     Returns:
         dict:
@@ -907,37 +1356,50 @@ def task_five(vendor_id):
                 "flags": List of flag messages that were raised
                 "num_flags": Integer count of flags raised
             }
+            When Perplexity or Google Maps is still rate limiting after retries, or cannot be reached
+            (timeouts, server errors), the deferred marker
+            {"flags": flags found so far, "num_flags", "deferred": True, "retry_after": None, "message": ...}.
+            Its flags are not written: the whole task is rerun later (with the Perplexity answer cached),
+            so writing them now would add them twice
     """
     # Get vendor name and address
-    vendor_info = db_driver.get_vendor_by_id(vendor_id)
-    if not vendor_info:
+    context = get_vendor_context(vendor_id, context)
+    if not context:
         raise ValueError(f"Vendor ID '{vendor_id}' not found")
 
-    vendor_name = vendor_info["Name"]
-
-    vendor_address = f"{vendor_info['Street']}, {vendor_info['City']}, {vendor_info['State']}, {vendor_info['ZIP']}"
+    vendor_name = context.vendor_name
+    vendor_address = context.vendor_address
 
-    # Raise business address and website flags
-    address_website_flags = google_search_validation(vendor_name, vendor_address)
-    num_flags = len(address_website_flags)
-
-    # Raise Google Maps presence flag
-    maps_flags = google_maps_validation(vendor_address)
-    flags = address_website_flags + maps_flags
-    num_flags += len(maps_flags)
+    flags = []
+    try:
+        # Raise business address and website flags
+        flags += google_search_validation(vendor_name, vendor_address, refresh=refresh)
+
+        # Raise Google Maps presence flag
+        flags += google_maps_validation(vendor_address, refresh=refresh)
+    except RequestException as e:
+        # A rate limit or outage says nothing about the vendor: defer the check instead of dropping or flagging it
+        print(f"Google validation deferred for vendor {vendor_id}: {str(e)}")
+        return {
+            "flags": flags,
+            "num_flags": len(flags),
+            "deferred": True,
+            "retry_after": getattr(e, "retry_after", None),
+            "message": f"Google validation unavailable, retry later: {str(e)}"
+        }
+    num_flags = len(flags)
 
-    # Increment flags
-    for flag in flags:
-        result = db_driver.update_flags(vendor_id, flag)
-        if not result:
-            print(f"Failed to update flags for vendor id {vendor_id}")
+    # Increment flags in a single write
+    result = db_driver.update_flags_many(vendor_id, flags)
+    if not result:
+        print(f"Failed to update flags for vendor id {vendor_id}")
 
     return {
         "flags": flags,
         "num_flags": num_flags
     }
 
-def task_six(vendor_id):
+def task_six(vendor_id, context=None, refresh=False):
     """
     Use Perplexity to search for adverse news associated with a vendor.
     Performs a Google search using the vendor's name and flag if any results
@@ -945,6 +1407,8 @@ def task_six(vendor_id):
 
     Args:
         vendor_id (str): Identifier of the vendor
+        context (VendorContext, optional): Shared vendor data for this run
+        refresh (bool, optional): Bypass cached Perplexity responses and fetch fresh ones
 
     Returns:
         dict:
@@ -952,12 +1416,14 @@ def task_six(vendor_id):
                 "flags": List of flag messages that were raised
                 "num_flags": Integer count of flags raised
             }
+            When Perplexity is still rate limiting after retries, or cannot be reached, the deferred marker
+            {"flags": [], "num_flags": 0, "deferred": True, "retry_after": None, "message": ...}
     """
     # Get vendor name
-    vendor_info = db_driver.get_vendor_by_id(vendor_id)
-    if not vendor_info:
+    context = get_vendor_context(vendor_id, context)
+    if not context:
         raise ValueError(f"Vendor ID '{vendor_id}' not found")
-    vendor_name = vendor_info["Name"]
+    vendor_name = context.vendor_name
 
     # Create a prompt to search for adverse news associated with the vendor
     keywords = ["fraud", "lawsuit", "shutdown", "bankruptcy", "charges", "scam", "indictment", "settlement", "scandal"]
@@ -1005,22 +1471,31 @@ def task_six(vendor_id):
     }}"""
     try:
         # Call Perplexity on the prompt
-        response = call_perplexity_dict(prompt)
+        response = call_perplexity_dict(prompt, cache_ttl=PERPLEXITY_CACHE_TTLS["adverse_news"], refresh=refresh)
 
         # Raise flags
         if not response["adverse_findings"]:
             return {"flags": [], "num_flags": 0}
         num_flags = len(response["flag_reasons"])
 
-        for flag in response["flag_reasons"]:
-            result = db_driver.update_flags(vendor_id, flag)
-            if not result:
-                print(f"Failed to update flags for vendor id {vendor_id}")
+        result = db_driver.update_flags_many(vendor_id, response["flag_reasons"])
+        if not result:
+            print(f"Failed to update flags for vendor id {vendor_id}")
 
         return {
             "flags": response["flag_reasons"],
             "num_flags": num_flags
         }
+    except RequestException as e:
+        # Same as task_five: defer the search instead of failing the screen
+        print(f"Adverse news search deferred for vendor {vendor_id}: {str(e)}")
+        return {
+            "flags": [],
+            "num_flags": 0,
+            "deferred": True,
+            "retry_after": getattr(e, "retry_after", None),
+            "message": f"Adverse news search unavailable, retry later: {str(e)}"
+        }
     except Exception as e:
         raise RuntimeError(f"Failed to run adverse news search for vendor {vendor_name}.")
 
@@ -1086,16 +1561,15 @@ def send_email(body, vendor_name, recipient_email=None):
         print(f"Unexpected error sending email: {str(e)}")
         return False
 
-def task_seven(vendor_id):
+def task_seven(vendor_id, context=None):
         try:
             # Get vendor information
-            vendor = db_driver.get_vendor_by_id(vendor_id)
-            if not vendor:
-                print(f"Vendor with ID {vendor_id} not found")
+            context = get_vendor_context(vendor_id, context)
+            if not context:
                 return None
 
-            vendor_name = vendor["Name"]
-            vendor_address = f"{vendor['Street']}, {vendor['City']}, {vendor['State']}, {vendor['ZIP']}"
+            vendor_name = context.vendor_name
+            vendor_address = context.vendor_address
 
             # Get flags information
             flags_info = db_driver.get_flags(vendor_id)
@@ -0,0 +1,327 @@
+import pytest
+import sys
+import json
+import time
+import socket
+import threading
+import urllib.request
+import urllib.error
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+import db
+# app.py creates a database driver on import; a placeholder project is enough because the tests replace it
+db.PROJECTURL = db.PROJECTURL or "http://localhost"
+db.ANONKEY = db.ANONKEY or "test-key"
+
+import app
+from AI import tasks
+
+
+VENDORS = [
+    {"ID": 1, "Name": "Acme", "State": "Ohio", "DateScanned": "2024-01-10", "NumFlags": 0},
+    {"ID": 2, "Name": "Birch", "State": "OH", "DateScanned": "2024-02-10", "NumFlags": 2},
+    {"ID": 3, "Name": "Cedar", "State": "Iowa", "DateScanned": "2024-03-10", "NumFlags": 1},
+    {"ID": 4, "Name": "Dune", "State": "ohio", "DateScanned": "2024-04-10", "NumFlags": 3},
+    {"ID": 5, "Name": "Elm", "State": "Ohio", "DateScanned": None, "NumFlags": 0}
+]
+
+
+class FakeQuery:
+    """PostgREST query builder over a list of rows; raises once `fail_after` queries have run"""
+
+    def __init__(self, supabase, rows):
+        self.supabase = supabase
+        self.rows = rows
+        self.columns = None
+        self.size = None
+
+    def select(self, columns):
+        self.columns = None if columns == "*" else columns.split(", ")
+        return self
+
+    def _where(self, test):
+        self.rows = [row for row in self.rows if test(row)]
+        return self
+
+    def eq(self, column, value):
+        return self._where(lambda row: row[column] == value)
+
+    def in_(self, column, values):
+        return self._where(lambda row: row[column] in values)
+
+    def gt(self, column, value):
+        return self._where(lambda row: row[column] is not None and row[column] > type(row[column])(value))
+
+    def gte(self, column, value):
+        return self._where(lambda row: row[column] is not None and row[column] >= value)
+
+    def lte(self, column, value):
+        return self._where(lambda row: row[column] is not None and row[column] <= value)
+
+    def order(self, column):
+        self.rows = sorted(self.rows, key=lambda row: row[column])
+        return self
+
+    def limit(self, size):
+        self.size = size
+        return self
+
+    def execute(self):
+        self.supabase.queries += 1
+        if self.supabase.fail_after is not None and self.supabase.queries > self.supabase.fail_after:
+            raise RuntimeError("connection reset")
+        rows = self.rows[:self.size]
+        if self.columns:
+            rows = [{column: row[column] for column in self.columns} for row in rows]
+        return FakeResponse(rows)
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeSupabase:
+    def __init__(self, rows, fail_after=None):
+        self.rows = rows
+        self.fail_after = fail_after
+        self.queries = 0
+        self.postgrest = None
+
+    def table(self, name):
+        return FakeQuery(self, list(self.rows))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def make(rows=VENDORS, fail_after=None):
+        fake = FakeSupabase(rows, fail_after)
+        monkeypatch.setattr(db, "create_client", lambda *args: fake)
+        monkeypatch.setattr(app, "DB", db.DatabaseDriver(cache_ttl=0))
+        return app.app.test_client(), fake
+    return make
+
+
+def body_of(response):
+    return json.loads(response.get_data(as_text=True))
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+@pytest.fixture(autouse=True)
+def reset_draining():
+    yield
+    app._draining.clear()
+
+
+class SlowRegistry:
+    """State registry whose lookups take `delay` seconds"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def get_url(self, state):
+        time.sleep(self.delay)
+        return "https://sos.example.gov"
+
+    def resolve(self, state):
+        return "Ohio"
+
+
+class FakeRefresher:
+    def __init__(self):
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeJobManager:
+    def __init__(self):
+        self.shutdowns = 0
+
+    def shutdown(self, wait=True):
+        self.shutdowns += 1
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def fetch(port, path):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+class TestInFlightRequests:
+    def test_counter_returns_to_zero(self, monkeypatch):
+        """Test that before_request/teardown_request count a request in and out"""
+        monkeypatch.setattr(app, "get_state_registry", lambda: SlowRegistry(0))
+        response = app.app.test_client().get("/secofstate/oh/")
+        assert response.status_code == 200
+        assert app._in_flight == 0
+
+    def test_draining_rejects_new_requests(self, monkeypatch):
+        """Test that requests arriving while draining get 503 and are not counted"""
+        monkeypatch.setattr(app, "get_state_registry", lambda: SlowRegistry(0))
+        assert app.drain_requests(0.1)
+        response = app.app.test_client().get("/secofstate/oh/")
+        assert response.status_code == 503
+        assert app._in_flight == 0
+
+    def test_drain_waits_for_in_flight_request(self, monkeypatch):
+        """Test that drain_requests returns only after the running request finishes"""
+        monkeypatch.setattr(app, "get_state_registry", lambda: SlowRegistry(0.3))
+        client = app.app.test_client()
+        request = threading.Thread(target=client.get, args=("/secofstate/oh/",))
+        request.start()
+        while app._in_flight == 0:
+            time.sleep(0.01)
+
+        started = time.perf_counter()
+        assert app.drain_requests(5)
+        assert time.perf_counter() - started > 0.1
+        request.join()
+
+    def test_drain_times_out(self, monkeypatch):
+        """Test that drain_requests gives up after the timeout while a request is still running"""
+        monkeypatch.setattr(app, "get_state_registry", lambda: SlowRegistry(0.5))
+        client = app.app.test_client()
+        request = threading.Thread(target=client.get, args=("/secofstate/oh/",))
+        request.start()
+        while app._in_flight == 0:
+            time.sleep(0.01)
+
+        assert not app.drain_requests(0.05)
+        request.join()
+
+
+class TestServe:
+    def test_serve_drains_requests_and_jobs_on_stop(self, monkeypatch):
+        """Test that a stopped server finishes the in-flight request, refuses new ones, drains jobs and stops the refreshers"""
+        monkeypatch.setattr(app, "get_state_registry", lambda: SlowRegistry(0.5))
+        jobs = FakeJobManager()
+        monkeypatch.setattr(app, "get_job_manager", lambda: jobs)
+        refresher = FakeRefresher()
+        monkeypatch.setattr(tasks, "start_refreshers", lambda: [refresher])
+        monkeypatch.setattr(tasks, "load_collision_index", lambda: None)
+        port = free_port()
+        stopping = threading.Event()
+        server = threading.Thread(target=app.serve, args=("127.0.0.1", port, 4, 5, stopping))
+        server.start()
+
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.02)
+
+        statuses = []
+        slow = threading.Thread(target=lambda: statuses.append(fetch(port, "/secofstate/oh/")))
+        slow.start()
+        while app._in_flight == 0:
+            time.sleep(0.01)
+
+        stopping.set()
+        deadline = time.time() + 2
+        while not app._draining.is_set() and time.time() < deadline:
+            time.sleep(0.01)
+        assert fetch(port, "/secofstate/oh/") == 503
+
+        slow.join()
+        server.join(5)
+        assert statuses == [200]
+        assert not server.is_alive()
+        assert jobs.shutdowns == 1
+        assert refresher.stopped
+
+
+class TestListRows:
+    def test_keyset_cursor_pages(self, client):
+        """Test that next_cursor walks the table in ID order and is None on the last page"""
+        test_client, _ = client()
+        first = body_of(test_client.get("/vendor/?limit=2"))
+        assert [row["ID"] for row in first["vendors"]] == [1, 2]
+        assert first["next_cursor"] == 2
+
+        second = body_of(test_client.get(f"/vendor/?limit=2&cursor={first['next_cursor']}"))
+        assert [row["ID"] for row in second["vendors"]] == [3, 4]
+        last = body_of(test_client.get(f"/vendor/?limit=2&cursor={second['next_cursor']}"))
+        assert [row["ID"] for row in last["vendors"]] == [5]
+        assert last["next_cursor"] is None
+
+    def test_no_pagination_parameters_returns_every_row(self, client, monkeypatch):
+        """Test that a plain list request still returns the whole table, fetched page by page"""
+        monkeypatch.setattr(app, "MAX_LIST_LIMIT", 2)
+        test_client, fake = client()
+        body = body_of(test_client.get("/vendor/"))
+        assert [row["ID"] for row in body["vendors"]] == [1, 2, 3, 4, 5]
+        assert body["next_cursor"] is None
+        assert fake.queries == 3
+
+    def test_full_list_failure_is_an_error(self, client, monkeypatch):
+        """Test that a page failing part-way fails the request instead of returning a partial list"""
+        monkeypatch.setattr(app, "MAX_LIST_LIMIT", 2)
+        test_client, _ = client(fail_after=1)
+        assert test_client.get("/vendor/").status_code == 500
+
+    def test_fields_projection_keeps_id(self, client):
+        """Test that fields limits the columns and always includes ID"""
+        test_client, _ = client()
+        body = body_of(test_client.get("/vendor/?fields=Name&limit=1"))
+        assert body["vendors"] == [{"ID": 1, "Name": "Acme"}]
+
+    def test_invalid_field_rejected(self, client):
+        """Test that a field name that is not a plain column is a 400"""
+        test_client, _ = client()
+        assert test_client.get("/vendor/?fields=Name,ID;drop").status_code == 400
+
+    def test_state_filter_matches_spellings(self, client):
+        """Test that a state code matches the full name, the code and the lowercased name"""
+        test_client, _ = client()
+        body = body_of(test_client.get("/vendor/?state=oh"))
+        assert [row["ID"] for row in body["vendors"]] == [1, 2, 4, 5]
+
+    def test_date_and_flagged_filters(self, client):
+        """Test that the DateScanned bounds are inclusive and flagged keeps NumFlags > 0"""
+        test_client, _ = client()
+        body = body_of(test_client.get("/vendor/?scanned_since=2024-02-10&scanned_before=2024-04-10"))
+        assert [row["ID"] for row in body["vendors"]] == [2, 3, 4]
+        body = body_of(test_client.get("/vendor/?flagged=true"))
+        assert [row["ID"] for row in body["vendors"]] == [2, 3, 4]
+
+    def test_invalid_date_rejected(self, client):
+        test_client, _ = client()
+        assert test_client.get("/vendor/?scanned_since=last-week").status_code == 400
+
+    def test_ndjson_streams_every_page(self, client, monkeypatch):
+        """Test that format=ndjson streams all matching rows across pages"""
+        monkeypatch.setattr(app, "MAX_LIST_LIMIT", 2)
+        test_client, fake = client()
+        response = test_client.get("/vendor/?limit=1&format=ndjson&fields=Name")
+        assert response.mimetype == "application/x-ndjson"
+        assert [row["ID"] for row in ndjson(response)] == [1, 2, 3, 4, 5]
+        assert fake.queries == 3
+
+    def test_ndjson_failure_ends_with_error_line(self, client, monkeypatch):
+        """Test that a page failing mid-stream ends the stream with an error line and a resume cursor"""
+        monkeypatch.setattr(app, "MAX_LIST_LIMIT", 2)
+        test_client, _ = client(fail_after=1)
+        lines = ndjson(test_client.get("/vendor/?limit=1&format=ndjson"))
+        assert [row["ID"] for row in lines[:-1]] == [1, 2]
+        assert lines[-1] == {"error": "Could not fetch vendors", "cursor": 2}
+
+        resumed = ndjson(client()[0].get("/vendor/?limit=1&format=ndjson&cursor=2"))
+        assert [row["ID"] for row in resumed] == [3, 4, 5]
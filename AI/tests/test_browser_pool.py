@@ -0,0 +1,231 @@
+import pytest
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from AI.browser_pool import BrowserPool, SeleniumDriverPool, get_browser_pool, run_async
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+        self.routes = []
+
+    async def route(self, pattern, handler):
+        self.routes.append(pattern)
+
+    async def new_page(self):
+        return {"context": self}
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeChromium:
+    def __init__(self):
+        self.browsers = []
+
+    async def launch(self):
+        browser = FakeBrowser()
+        self.browsers.append(browser)
+        return browser
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+        self.stopped = False
+
+    async def stop(self):
+        self.stopped = True
+
+
+def make_pool(**kwargs):
+    pool = BrowserPool(**kwargs)
+    pool._playwright = FakePlaywright()
+    return pool
+
+
+class TestBrowserPool:
+    def test_page_reuses_browser_and_closes_context(self):
+        """Test that pages share one warm browser and each context is closed after use"""
+        async def run():
+            pool = make_pool(max_pages=2, max_uses=10)
+            for _ in range(3):
+                async with pool.page() as page:
+                    assert page["context"].routes == ["**/*"]
+            return pool
+
+        pool = asyncio.run(run())
+        browser, = pool._playwright.chromium.browsers
+        assert pool.launches == 1
+        assert all(context.closed for context in browser.contexts)
+
+    def test_browser_retired_after_max_uses(self):
+        """Test that a browser is replaced and closed once it has served max_uses pages"""
+        async def run():
+            pool = make_pool(max_uses=2)
+            for _ in range(3):
+                async with pool.page():
+                    pass
+            return pool
+
+        pool = asyncio.run(run())
+        first, second = pool._playwright.chromium.browsers
+        assert first.closed and not second.closed
+
+    def test_disconnected_browser_is_replaced(self):
+        """Test that a browser that crashes during a check is not handed out again"""
+        async def run():
+            pool = make_pool()
+            async with pool.page():
+                pool._current["browser"].connected = False
+            async with pool.page():
+                pass
+            return pool
+
+        pool = asyncio.run(run())
+        assert pool.launches == 2
+
+    def test_max_pages_bounds_concurrency(self):
+        """Test that no more than max_pages pages are open at once"""
+        async def run():
+            pool = make_pool(max_pages=2)
+            open_pages = []
+            peak = []
+
+            async def check():
+                async with pool.page():
+                    open_pages.append(1)
+                    peak.append(len(open_pages))
+                    await asyncio.sleep(0.01)
+                    open_pages.pop()
+
+            await asyncio.gather(*(check() for _ in range(5)))
+            return max(peak)
+
+        assert asyncio.run(run()) == 2
+
+
+class TestSharedLoop:
+    def test_one_pool_per_loop(self):
+        """Test that get_browser_pool returns the same pool on a loop and a new one on another loop"""
+        async def pools():
+            return get_browser_pool(), get_browser_pool()
+
+        first, again = asyncio.run(pools())
+        other, _ = asyncio.run(pools())
+        assert first is again
+        assert first is not other
+
+    def test_pool_closes_when_its_loop_finishes(self):
+        """Test that a standalone asyncio.run leaves no browser running once it returns"""
+        async def check():
+            pool = get_browser_pool()
+            playwright = pool._playwright = FakePlaywright()
+            async with pool.page():
+                pass
+            return playwright
+
+        playwright = asyncio.run(check())
+        browser, = playwright.chromium.browsers
+        assert browser.closed
+        assert playwright.stopped
+
+    def test_threaded_work_does_not_block_other_checks(self):
+        """Test that checks from several threads overlap when their blocking calls use asyncio.to_thread"""
+        async def check():
+            await asyncio.to_thread(time.sleep, 0.2)
+
+        threads = [threading.Thread(target=run_async, args=(check(),)) for _ in range(4)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert time.perf_counter() - started < 0.6
+
+
+class FakeDriver:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.cookies_cleared = 0
+        self.storage_cleared = 0
+        self.quit_called = False
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Network.clearBrowserCookies":
+            self.cookies_cleared += 1
+
+    def delete_all_cookies(self):
+        pass
+
+    def execute_script(self, script):
+        self.storage_cleared += 1
+
+    def get(self, url):
+        if not self.alive:
+            raise RuntimeError("chrome not reachable")
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeSeleniumPool(SeleniumDriverPool):
+    def _create_driver(self):
+        self.launches += 1
+        return {"driver": FakeDriver(), "uses": 0}
+
+
+class TestSeleniumDriverPool:
+    def test_driver_is_reused_with_a_clean_session(self):
+        """Test that a returned driver has its cookies and storage cleared and is handed out again"""
+        pool = FakeSeleniumPool(max_drivers=1, max_uses=10)
+        with pool.driver() as first:
+            pass
+        with pool.driver() as second:
+            pass
+        assert first is second
+        assert pool.launches == 1
+        assert first.cookies_cleared == 2 and first.storage_cleared == 2
+
+    def test_driver_quit_after_max_uses(self):
+        """Test that a driver is quit once it reaches max_uses"""
+        pool = FakeSeleniumPool(max_uses=1)
+        with pool.driver() as driver:
+            pass
+        assert driver.quit_called
+        assert pool._idle == []
+
+    def test_crashed_driver_is_quit(self):
+        """Test that a driver that stops responding is not returned to the pool"""
+        pool = FakeSeleniumPool()
+        with pool.driver() as driver:
+            driver.alive = False
+        assert driver.quit_called
+        with pool.driver() as replacement:
+            assert replacement is not driver
@@ -0,0 +1,59 @@
+import pytest
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from AI.cache import ResponseCache, make_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Returns an empty cache backed by a temporary SQLite file"""
+    return ResponseCache(path=tmp_path / "cache.sqlite3", max_entries=3)
+
+
+class TestResponseCache:
+    def test_hit_after_set(self, cache):
+        """Test that a stored value is returned and counted as a hit"""
+        key = make_key("sonar", "Be precise and concise.", "prompt", 0.2)
+        assert cache.get("perplexity", key) is None
+
+        cache.set("perplexity", key, {"found": True}, ttl=60)
+
+        assert cache.get("perplexity", key) == {"found": True}
+        stats = cache.stats()["perplexity"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+    def test_key_depends_on_every_part(self):
+        """Test that changing the temperature changes the key"""
+        assert make_key("sonar", "system", "prompt", 0.2) != make_key("sonar", "system", "prompt", 0.3)
+
+    def test_expired_entry_is_a_miss(self, cache):
+        """Test that an entry past its TTL is not returned"""
+        cache.set("perplexity", "key", "value", ttl=0.05)
+        time.sleep(0.1)
+        assert cache.get("perplexity", "key") is None
+
+    def test_least_recently_used_entry_is_evicted(self, cache):
+        """Test that the cache stays within max_entries by evicting the oldest access"""
+        for key in ("a", "b", "c"):
+            cache.set("perplexity", key, key, ttl=60)
+            time.sleep(0.01)
+        cache.get("perplexity", "a")
+        cache.set("perplexity", "d", "d", ttl=60)
+
+        assert cache.get("perplexity", "b") is None
+        assert cache.get("perplexity", "a") == "a"
+        assert cache.stats()["perplexity"]["evictions"] == 1
+
+    def test_disabled_cache_always_misses(self, tmp_path):
+        """Test that a disabled cache stores nothing"""
+        cache = ResponseCache(path=tmp_path / "cache.sqlite3", enabled=False)
+        cache.set("perplexity", "key", "value", ttl=60)
+        assert cache.get("perplexity", "key") is None
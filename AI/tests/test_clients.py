@@ -0,0 +1,234 @@
+import pytest
+import sys
+import time
+import threading
+from pathlib import Path
+
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from AI.clients import (
+    ProviderConfig, ProviderClient, ProviderThrottled, TokenBucket, AdaptiveConcurrency, CircuitBreaker, CircuitOpen
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.headers = {}
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    """Returns the queued responses in order, raising any queued exceptions"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.timeouts = []
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        self.timeouts.append(kwargs.get("timeout"))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def refused():
+    """A connection error raised before the request reached the provider"""
+    return requests.ConnectionError(MaxRetryError(None, "/", reason=NewConnectionError(None, "Connection refused")))
+
+
+def make_client(responses, **settings):
+    settings = {"max_retries": 2, "backoff_base": 0.001, "backoff_max": 0.001, **settings}
+    client = ProviderClient(ProviderConfig("test", connect_timeout=1, read_timeout=1, **settings))
+    client.session = FakeSession(responses)
+    return client
+
+
+class TestTokenBucket:
+    def test_burst_then_rate(self):
+        """Test that a full bucket allows a burst and later callers wait for refills"""
+        bucket = TokenBucket(rate=50, burst=3)
+        started = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        elapsed = time.monotonic() - started
+
+        assert elapsed >= 2 / 50 * 0.9
+        assert bucket.waits == 2
+
+    def test_zero_rate_is_unlimited(self):
+        """Test that qps=0 never waits"""
+        bucket = TokenBucket(rate=0, burst=1)
+        assert all(bucket.acquire() == 0.0 for _ in range(100))
+
+
+class TestAdaptiveConcurrency:
+    def test_throttle_halves_and_success_grows(self):
+        """Test multiplicative decrease on a throttle and additive increase on success"""
+        limiter = AdaptiveConcurrency(maximum=8, minimum=1, cooldown=0)
+        limiter.acquire()
+        limiter.release("throttled")
+        assert limiter.limit == 4
+
+        for _ in range(4):
+            limiter.acquire()
+            limiter.release("ok")
+        assert 4.9 < limiter.limit < 5.1
+
+    def test_burst_of_throttles_decreases_once(self):
+        """Test that throttles inside the cooldown count as one event"""
+        limiter = AdaptiveConcurrency(maximum=8, cooldown=60)
+        for _ in range(3):
+            limiter.acquire()
+            limiter.release("throttled")
+        assert limiter.limit == 4 and limiter.decreases == 1
+
+    def test_limit_blocks_extra_callers(self):
+        """Test that callers beyond the limit wait for a slot"""
+        limiter = AdaptiveConcurrency(maximum=1)
+        limiter.acquire()
+        acquired = threading.Event()
+        waiter = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+        waiter.start()
+
+        assert not acquired.wait(0.05)
+        assert limiter.waiting == 1
+        limiter.release("ok")
+        assert acquired.wait(1)
+        waiter.join()
+
+
+class TestProviderClient:
+    def test_retries_429_then_succeeds(self):
+        """Test that a 429 is retried and counted as throttled"""
+        client = make_client([FakeResponse(429), FakeResponse(200)])
+        assert client.get("https://example.com").status_code == 200
+        assert client.stats()["throttled"] == 1
+        assert client.stats()["requests"] == 2
+
+    def test_over_query_limit_body_is_throttling(self):
+        """Test that Google's OVER_QUERY_LIMIT status is retried and raises once retries run out"""
+        over = {"status": "OVER_QUERY_LIMIT"}
+        client = make_client([FakeResponse(200, over)] * 3, throttle_statuses=("OVER_QUERY_LIMIT",))
+        with pytest.raises(ProviderThrottled):
+            client.get("https://maps.example.com")
+        assert client.session.calls == 3
+        assert client.concurrency.decreases >= 1
+
+    def test_server_error_is_returned_after_retries(self):
+        """Test that a persistent 5xx is still returned, not raised"""
+        client = make_client([FakeResponse(503)] * 3)
+        assert client.get("https://example.com").status_code == 503
+
+    def test_get_retries_read_timeout(self):
+        """Test that a GET is resent after a read timeout"""
+        client = make_client([requests.ReadTimeout("slow"), FakeResponse(200)])
+        assert client.get("https://example.com").status_code == 200
+        assert client.session.calls == 2
+
+    def test_post_read_timeout_is_not_retried(self):
+        """Test that a POST the provider may have received is not sent twice"""
+        client = make_client([requests.ReadTimeout("slow"), FakeResponse(200)])
+        with pytest.raises(requests.ReadTimeout):
+            client.post("https://example.com")
+        assert client.session.calls == 1
+
+    def test_post_dropped_connection_is_not_retried(self):
+        """Test that a connection dropped after sending a POST is raised"""
+        client = make_client([requests.ConnectionError("Connection aborted"), FakeResponse(200)])
+        with pytest.raises(requests.ConnectionError):
+            client.post("https://example.com")
+        assert client.session.calls == 1
+
+    def test_post_retries_errors_before_sending(self):
+        """Test that a POST is retried when the connection never opened"""
+        client = make_client([refused(), requests.ConnectTimeout("connect"), FakeResponse(200)])
+        assert client.post("https://example.com").status_code == 200
+        assert client.session.calls == 3
+
+    def test_post_retries_rejections_but_not_server_errors(self):
+        """Test that a POST is resent after a 503 but a 500 is returned as is"""
+        client = make_client([FakeResponse(503), FakeResponse(500), FakeResponse(200)])
+        assert client.post("https://example.com").status_code == 500
+        assert client.session.calls == 2
+
+    def test_deadline_stops_retries(self):
+        """Test that no retry is made once its backoff would pass the call's deadline"""
+        responses = [FakeResponse(503) for _ in range(6)]
+        for response in responses:
+            response.headers["Retry-After"] = "0.3"
+        # Each retry needs its 0.3s wait plus the 1s connect timeout before the 1.9s deadline
+        client = make_client(responses, max_retries=5, backoff_max=1, deadline=1.9)
+        started = time.monotonic()
+        assert client.get("https://example.com").status_code == 503
+        assert client.session.calls == 3
+        assert time.monotonic() - started < 1.9
+
+    def test_read_timeout_is_capped_by_deadline(self):
+        """Test that an attempt never waits on a read past the call's deadline"""
+        client = make_client([FakeResponse(200)], deadline=0.5)
+        client.config.read_timeout = 30
+        client.get("https://example.com")
+        connect, read = client.session.timeouts[0]
+        assert connect == 1
+        assert read <= 0.5
+
+
+class TestCircuitBreaker:
+    def test_opens_on_error_rate_and_recovers(self):
+        """Test closed -> open on failures, then half-open -> closed after a successful trial"""
+        breaker = CircuitBreaker(error_rate=0.5, min_calls=4, open_seconds=0.05)
+        for success in (True, False, True, False):
+            assert breaker.allow()
+            breaker.record(success, 0.1)
+        assert breaker.state == "open"
+        assert not breaker.allow()
+        assert breaker.retry_after() > 0
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        assert breaker.state == "half_open"
+        assert not breaker.allow()
+        breaker.record(True, 0.1)
+        assert breaker.state == "closed"
+
+    def test_slow_calls_count_as_failures(self):
+        """Test that successful calls over the latency threshold open the breaker"""
+        breaker = CircuitBreaker(error_rate=0.5, min_calls=2, slow_call=1.0)
+        for _ in range(2):
+            breaker.allow()
+            breaker.record(True, 5.0)
+        assert breaker.state == "open"
+
+    def test_failed_trial_reopens(self):
+        """Test that a failing half-open trial opens the breaker again"""
+        breaker = CircuitBreaker(min_calls=1, open_seconds=0.01)
+        breaker.allow()
+        breaker.record(False, 0.1)
+        time.sleep(0.02)
+        assert breaker.allow()
+        breaker.record(False, 0.1)
+        assert breaker.state == "open" and breaker.opened == 2
+
+    def test_open_breaker_fails_fast(self):
+        """Test that an open breaker raises CircuitOpen without calling the provider"""
+        client = make_client([FakeResponse(503)] * 3, circuit_breaker=True, breaker_min_calls=3, breaker_open_seconds=60)
+        assert client.get("https://dnb.example.com").status_code == 503
+        assert client.breaker.state == "open"
+
+        with pytest.raises(CircuitOpen) as raised:
+            client.get("https://dnb.example.com")
+        assert client.session.calls == 3
+        assert raised.value.retry_after > 0
+        assert client.stats()["circuit"]["rejected"] == 1
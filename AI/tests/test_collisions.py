@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from AI.collisions import CollisionIndex
+
+
+def row(row_id, name, street, zip_code="43215"):
+    return {"ID": row_id, "Name": name, "Street": street, "City": "Columbus", "State": "OH", "ZIP": zip_code, "Country": "US"}
+
+
+ACCOUNTS = [
+    row(1, "Buckeye Paving Inc", "500 High Street"),
+    row(2, "Acme Equipment, LLC", "9 Elm Ave", "43004"),
+    row(3, "Scioto Farms", "77 River Road"),
+]
+VENDORS = [
+    row(10, "ACME Equipment LLC", "500 High St"),
+    row(11, "Globex Corporation", "1 Industrial Pkwy", "43085"),
+]
+
+
+class TestCollisionIndex:
+    def test_vendor_collisions_by_name_and_address(self):
+        """Test that accounts sharing the vendor's canonical name or address are returned"""
+        index = CollisionIndex(ACCOUNTS, VENDORS)
+        collisions = index.collisions(VENDORS[0])
+
+        assert collisions["accounts"] == [
+            {"id": 1, "name_match": False, "address_match": True},
+            {"id": 2, "name_match": True, "address_match": False},
+        ]
+        assert collisions["vendors"] == []
+
+    def test_no_collisions(self):
+        """Test that a vendor sharing nothing with the portfolio has no collisions"""
+        index = CollisionIndex(ACCOUNTS, VENDORS)
+        assert index.collisions(VENDORS[1]) == {"accounts": [], "vendors": []}
+
+    def test_other_vendors_collide(self):
+        """Test that a second vendor at the same address is reported"""
+        index = CollisionIndex(ACCOUNTS, VENDORS + [row(12, "Initech", "500 High St.")])
+        assert index.collisions(VENDORS[0])["vendors"] == [{"id": 12, "name_match": False, "address_match": True}]
+
+    def test_upsert_reindexes_changed_row(self):
+        """Test that updating a row moves it to its new keys"""
+        index = CollisionIndex(ACCOUNTS, VENDORS)
+        index.upsert("account", row(1, "Buckeye Paving Inc", "1 Industrial Parkway", "43085"))
+
+        assert [c["id"] for c in index.collisions(VENDORS[0])["accounts"]] == [2]
+        assert [c["id"] for c in index.collisions(VENDORS[1])["accounts"]] == [1]
+
+    def test_remove(self):
+        """Test that removed rows no longer collide"""
+        index = CollisionIndex(ACCOUNTS, VENDORS)
+        index.remove("account", 2)
+        assert [c["id"] for c in index.collisions(VENDORS[0])["accounts"]] == [1]
+        assert len(index) == 4
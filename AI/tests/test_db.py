@@ -0,0 +1,203 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+import db
+from postgrest.exceptions import APIError
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeCall:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return FakeResponse(self.result)
+
+
+class FakeVendorTable:
+    """Vendor table for the read-modify-write fallback: select().eq() reads, update().eq() writes"""
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+        self.values = None
+
+    def select(self, columns):
+        return self
+
+    def update(self, values):
+        self.values = values
+        return self
+
+    def eq(self, column, value):
+        if self.values is None:
+            self.supabase.calls.append(("select", value))
+            return FakeCall([{"Flags": ["old"], "NumFlags": 1}])
+        self.supabase.calls.append(("update", value, self.values))
+        return FakeCall([{"ID": value}])
+
+
+class FakeSupabase:
+    """
+    Records RPC calls; apply_vendor_updates fails when `fail_apply` is set,
+    append_vendor_flags raises `append_error` when it is set
+    """
+
+    def __init__(self, fail_apply=False, append_error=None):
+        self.fail_apply = fail_apply
+        self.append_error = append_error
+        self.calls = []
+        self.postgrest = None
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        if name == "apply_vendor_updates" and self.fail_apply:
+            return FakeCall(RuntimeError("function apply_vendor_updates does not exist"))
+        if name == "append_vendor_flags" and self.append_error is not None:
+            return FakeCall(self.append_error)
+        return FakeCall([{"ID": params["p_vendor_id"]}])
+
+    def table(self, name):
+        return FakeVendorTable(self)
+
+
+@pytest.fixture
+def make_driver(monkeypatch):
+    def make(**kwargs):
+        fake = FakeSupabase(**kwargs)
+        monkeypatch.setattr(db, "create_client", lambda *args: fake)
+        return db.DatabaseDriver(cache_ttl=0), fake
+    return make
+
+
+class TestWriteBuffer:
+    def test_run_writes_are_coalesced(self, make_driver):
+        """Test that a run's field updates and flags are applied in one RPC"""
+        driver, fake = make_driver()
+        with driver.buffered_writes("v1") as buffer:
+            driver.update_flags_many("v1", ["name/address"])
+            driver.update_sos_info("v1", 3.5, True)
+            driver.update_ofac_info("v1", False)
+            driver.update_flags("v1", "Business operating for only 3.5 years")
+            assert fake.calls == []
+
+        assert fake.calls == [("apply_vendor_updates", {
+            "p_vendor_id": "v1",
+            "p_fields": {"SosYearsInBusiness": 3.5, "SosActive": True, "OfacHitFound": False},
+            "p_flags": ["name/address", "Business operating for only 3.5 years"]
+        })]
+        assert (buffer.writes, buffer.flushes) == (4, 1)
+
+    def test_other_vendors_are_not_buffered(self, make_driver):
+        """Test that writes for another vendor go straight to the database"""
+        driver, fake = make_driver()
+        with driver.buffered_writes("v1"):
+            driver.update_flags_many("v2", ["flag"])
+            assert [name for name, _ in fake.calls] == ["append_vendor_flags"]
+
+    def test_flag_threshold_flushes_early(self, make_driver):
+        """Test that reaching max_flags flushes before the run ends"""
+        driver, fake = make_driver()
+        with driver.buffered_writes("v1", max_flags=2):
+            driver.update_flags_many("v1", ["a", "b"])
+            assert len(fake.calls) == 1
+            driver.update_flags_many("v1", ["c"])
+        assert [params["p_flags"] for _, params in fake.calls] == [["a", "b"], ["c"]]
+
+    def test_failed_flush_falls_back_to_individual_writes(self, make_driver):
+        """Test that flags are still appended when apply_vendor_updates is unavailable"""
+        driver, fake = make_driver(fail_apply=True)
+        with driver.buffered_writes("v1"):
+            driver.update_flags_many("v1", ["a"])
+        assert ("append_vendor_flags", {"p_vendor_id": "v1", "p_flags": ["a"]}) in fake.calls
+
+    def test_concurrent_runs_share_one_buffer(self, make_driver):
+        """Test that a second run for the same vendor joins the buffer and the last run to exit flushes it"""
+        driver, fake = make_driver()
+        with driver.buffered_writes("v1") as first:
+            with driver.buffered_writes("v1") as second:
+                assert first is second
+                driver.update_flags_many("v1", ["a"])
+            assert fake.calls == []
+            driver.update_flags_many("v1", ["b"])
+        assert [params["p_flags"] for _, params in fake.calls] == [["a", "b"]]
+
+    def test_overlay_includes_pending_flags(self):
+        """Test that reads during a run see the flags written earlier in it"""
+        buffer = db.VendorWriteBuffer("v1")
+        buffer.add(flags=["a"], fields={"OfacHitFound": True})
+        assert buffer.overlay({"NumFlags": 1, "Flags": ["old"]}) == {"NumFlags": 2, "Flags": ["old", "a"]}
+
+
+class TestAccountAndVendor:
+    def test_single_rpc(self, make_driver, monkeypatch):
+        """Test that the account and vendor are read with one get_account_and_vendor call"""
+        driver, fake = make_driver()
+        rows = {"account": {"ID": "a1", "Equipment": []}, "vendor": {"ID": "v1", "Flags": []}}
+        monkeypatch.setattr(fake, "rpc", lambda name, params: fake.calls.append((name, params)) or FakeCall(rows))
+
+        assert driver.get_account_and_vendor("a1", "v1") == (rows["account"], rows["vendor"])
+        assert fake.calls == [("get_account_and_vendor", {"p_account_id": "a1", "p_vendor_id": "v1"})]
+
+
+
+class TestUpdateFlagsMany:
+    def test_one_atomic_rpc(self, make_driver):
+        """Test that flags are appended with one append_vendor_flags call"""
+        driver, fake = make_driver()
+        assert driver.update_flags_many("v1", ["a", "b"]) is True
+        assert fake.calls == [("append_vendor_flags", {"p_vendor_id": "v1", "p_flags": ["a", "b"]})]
+
+    def test_no_flags_is_a_no_op(self, make_driver):
+        driver, fake = make_driver()
+        assert driver.update_flags_many("v1", []) is True
+        assert fake.calls == []
+
+    def test_missing_vendor(self, make_driver, monkeypatch):
+        """Test that a vendor the function did not update returns False"""
+        driver, fake = make_driver()
+        monkeypatch.setattr(fake, "rpc", lambda name, params: FakeCall([]))
+        assert driver.update_flags_many("missing", ["a"]) is False
+
+    @pytest.mark.parametrize("code", ["PGRST202", "42883"])
+    def test_missing_function_falls_back(self, make_driver, code):
+        """Test that the read-modify-write fallback runs only when append_vendor_flags is not installed"""
+        driver, fake = make_driver(append_error=APIError({"code": code, "message": "function does not exist"}))
+        assert driver.update_flags_many("v1", ["a"]) is True
+        assert fake.calls[1:] == [("select", "v1"), ("update", "v1", {
+            "Flags": ["old", "a"], "NumFlags": 2, "DateScanned": fake.calls[2][2]["DateScanned"]
+        })]
+
+    @pytest.mark.parametrize("error", [
+        APIError({"code": "57014", "message": "canceling statement due to statement timeout"}),
+        ConnectionError("connection reset by peer")
+    ])
+    def test_other_errors_do_not_fall_back(self, make_driver, error):
+        """Test that a timeout or network error fails the write instead of racing concurrent appends"""
+        driver, fake = make_driver(append_error=error)
+        assert driver.update_flags_many("v1", ["a"]) is False
+        assert [call[0] for call in fake.calls] == ["append_vendor_flags"]
+
+
+class TestFailedQueries:
+    def test_failures_return_defaults(self, make_driver, monkeypatch):
+        """Test that failed equipment reads return [] and failed field writes return False"""
+        driver, fake = make_driver()
+
+        def unavailable(name):
+            raise ConnectionError("connection reset by peer")
+        monkeypatch.setattr(fake, "table", unavailable)
+
+        assert driver.get_equipment_by_account_id(1) == []
+        assert driver.update_ofac_info("v1", True) is False
+        assert driver.update_sos_info("v1", 12, True) is False
@@ -0,0 +1,153 @@
+import json
+import sqlite3
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+import db
+from db_sql import SqlDatabaseDriver
+from AI.collisions import CollisionIndex
+
+SCHEMA = """
+CREATE TABLE "Account" ("ID" INTEGER PRIMARY KEY, "Name" TEXT, "Street" TEXT, "City" TEXT, "State" TEXT, "ZIP" TEXT, "Country" TEXT);
+CREATE TABLE "Equipment" ("ID" INTEGER PRIMARY KEY, "AccountID" INTEGER, "Description" TEXT);
+CREATE TABLE "Vendor" ("ID" INTEGER PRIMARY KEY, "Name" TEXT, "Street" TEXT, "City" TEXT, "State" TEXT, "ZIP" TEXT,
+                       "Country" TEXT, "Website" TEXT, "Flags" TEXT, "NumFlags" INTEGER, "DateScanned" DATE,
+                       "SosYearsInBusiness" REAL, "SosActive" BOOLEAN, "OfacHitFound" BOOLEAN);
+CREATE TABLE "States" ("State" TEXT PRIMARY KEY, "Link" TEXT);
+"""
+
+
+@pytest.fixture
+def driver(tmp_path):
+    """Returns a SqlDatabaseDriver over a small SQLite database"""
+    path = tmp_path / "local.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.execute("""INSERT INTO "Account" VALUES (1, 'Buckeye Paving', '500 High St', 'Columbus', 'OH', '43215', 'US ')""")
+    conn.execute("""INSERT INTO "Equipment" VALUES (1, 1, 'Paver'), (2, 1, 'Roller')""")
+    for i, state in enumerate(("OH", "OH", "NY", "OH", "TX"), start=1):
+        flags = json.dumps(["existing"]) if i == 2 else None
+        conn.execute("""INSERT INTO "Vendor" ("ID", "Name", "State", "Country", "Flags", "NumFlags")
+                        VALUES (?, ?, ?, 'US ', ?, ?)""", (i, f"Vendor {i}", state, flags, 1 if flags else 0))
+    conn.execute("""INSERT INTO "States" VALUES ('ohio', 'https://businesssearch.ohiosos.gov/')""")
+    conn.commit()
+    conn.close()
+    return SqlDatabaseDriver(f"sqlite:///{path}", cache_ttl=0)
+
+
+class TestSqlDatabaseDriver:
+    def test_account_with_equipment(self, driver):
+        """Test that the account and its equipment are loaded together"""
+        account = driver.get_account_by_id(1)
+        assert account["Name"] == "Buckeye Paving"
+        assert [e["Description"] for e in account["Equipment"]] == ["Paver", "Roller"]
+        assert driver.get_account_by_id(99) is None
+
+    def test_account_and_vendor_together(self, driver):
+        """Test that the account, its equipment and the vendor come back from one call"""
+        account, vendor = driver.get_account_and_vendor(1, 3)
+        assert len(account["Equipment"]) == 2
+        assert vendor["Name"] == "Vendor 3"
+        assert driver.get_account_and_vendor(1, 99) == (account, None)
+        assert driver.get_account_and_vendor(99, 3)[0] is None
+        assert driver.get_account_and_vendor(99, 3)[1]["Name"] == "Vendor 3"
+
+    def test_bulk_reads(self, driver):
+        """Test the `in` filter bulk reads"""
+        assert sorted(driver.get_vendors_by_ids([5, 1, 99, 1])) == [1, 5]
+        accounts = driver.get_accounts_by_ids(["1", "2"])
+        assert list(accounts) == [1]
+        assert len(accounts[1]["Equipment"]) == 2
+
+    def test_single_row_reads(self, driver):
+        """Test vendor, flags, country and state link reads"""
+        assert driver.get_vendor_by_id(2)["Flags"] == ["existing"]
+        assert driver.get_flags(2) == {"NumFlags": 1, "Flags": ["existing"]}
+        assert driver.get_vendor_country(1) == "US"
+        assert driver.get_state_link("ohio") == "https://businesssearch.ohiosos.gov/"
+        assert driver.get_state_links() == {"ohio": "https://businesssearch.ohiosos.gov/"}
+
+    def test_pages_and_stream(self, driver):
+        """Test keyset pages, projection, filters and the streamed scan"""
+        rows, cursor = driver.get_page("Vendor", limit=2, fields=["Name"])
+        assert rows == [{"ID": 1, "Name": "Vendor 1"}, {"ID": 2, "Name": "Vendor 2"}]
+        rows, cursor = driver.get_page("Vendor", limit=2, cursor=str(cursor), filters={"state": ["OH", "Ohio"]})
+        assert [row["ID"] for row in rows] == [4]
+        assert cursor is None
+        assert [row["ID"] for row in driver.iter_rows("Vendor", page_size=2)] == [1, 2, 3, 4, 5]
+
+    def test_stream_failure_raises(self, driver):
+        """Test that a failed streamed scan raises instead of ending quietly"""
+        with pytest.raises(Exception):
+            list(driver.iter_rows("Vendor", fields=["NoSuchColumn"]))
+
+    def test_failures_return_defaults(self, driver, monkeypatch):
+        """Test that failed equipment reads return [] and failed field writes return False"""
+        assert len(driver.get_equipment_by_account_id(1)) == 2
+        assert driver._update_vendor_fields(1, {"NoSuchColumn": 1}) is False
+
+        def missing(name):
+            raise RuntimeError(f"no such table: {name}")
+        monkeypatch.setattr(driver, "_table", missing)
+        assert driver.get_equipment_by_account_id(1) == []
+        assert driver.update_ofac_info(1, True) is False
+
+    def test_flag_append(self, driver):
+        """Test that appended flags are added to existing ones"""
+        assert driver.update_flags_many(2, ["a", "b"]) is True
+        assert driver.get_flags(2) == {"NumFlags": 3, "Flags": ["existing", "a", "b"]}
+        assert driver.get_vendor_by_id(2)["DateScanned"] is not None
+        assert driver.update_flags_many(99, ["a"]) is False
+
+    def test_buffered_run_writes(self, driver):
+        """Test that a buffered run's writes land in one transaction"""
+        with driver.buffered_writes(1):
+            driver.update_sos_info(1, 12.5, True)
+            driver.update_ofac_info(1, False)
+            driver.update_flags(1, "flag")
+        vendor = driver.get_vendor_by_id(1)
+        assert (vendor["SosYearsInBusiness"], vendor["SosActive"], vendor["OfacHitFound"]) == (12.5, True, False)
+        assert vendor["Flags"] == ["flag"]
+
+    def test_bulk_ofac_update(self, driver):
+        """Test the executemany OFAC update"""
+        assert driver.update_ofac_info_many({1: True, 2: False, 3: True}) == 3
+        assert [row["OfacHitFound"] for row in driver.iter_rows("Vendor", fields=["OfacHitFound"])][:3] == [True, False, True]
+
+
+@pytest.fixture
+def tracked_index():
+    index = CollisionIndex()
+    db.track_collisions(index)
+    yield index
+    db.track_collisions(None)
+
+
+class TestCollisionTracking:
+    def test_fetched_rows_are_indexed(self, driver, tracked_index):
+        """Test that rows read through the driver are upserted into the tracked collision index"""
+        account, vendor = driver.get_account_and_vendor(1, 1)
+        assert ("account", 1) in tracked_index._keys and ("vendor", 1) in tracked_index._keys
+        driver.get_vendors_by_ids([2, 3])
+        assert len(tracked_index) == 4
+
+    def test_name_write_reindexes_vendor(self, driver, tracked_index):
+        """Test that writing a vendor's name moves it to its new key in the index"""
+        driver.get_vendor_by_id(1)
+        assert driver._write_fields(1, {"Name": "Buckeye Paving"}) is True
+        account = driver.get_account_by_id(1)
+        assert tracked_index.collisions(account, kind="account")["vendors"] == [
+            {"id": 1, "name_match": True, "address_match": False}
+        ]
+
+    def test_screening_writes_skip_reindex(self, driver, tracked_index, monkeypatch):
+        """Test that writes to columns the index ignores do not re-read the vendor"""
+        fetches = []
+        monkeypatch.setattr(driver, "_fetch_vendor", lambda vendor_id: fetches.append(vendor_id))
+        assert driver.update_sos_info(1, 4.0, True) is True
+        assert fetches == []
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from AI.html_distill import distill_html
+
+RESULTS_PAGE = """
+<html>
+<head><title>Business Search</title><style>.x { color: red; }</style><script>var tracking = 1;</script></head>
+<body>
+  <nav><a href="/">Home</a><a href="/help">Help</a></nav>
+  <form>
+    <input type="hidden" name="__VIEWSTATE" value="dDwtMTA4MTY1NzE3Mjs7Pg==">
+    <div style="display: none">Session expired</div>
+    <h2>Search Results</h2>
+    <table class="search-results">
+      <tr><th>Entity Name</th><th>Status</th><th>Formation Date</th></tr>
+      <tr><td>ACME EQUIPMENT LLC</td><td>Active</td><td>03/14/2009</td></tr>
+      <tr><td>ACME EQUIPMENT LEASING INC</td><td>Dissolved</td><td>01/02/2015</td></tr>
+    </table>
+  </form>
+  <footer>Copyright State of Ohio</footer>
+</body>
+</html>
+"""
+
+
+class TestDistillHtml:
+    def test_keeps_results_table_rows(self):
+        """Test that table rows are kept as pipe-separated cells"""
+        text = distill_html(RESULTS_PAGE)["text"]
+        assert "Entity Name | Status | Formation Date" in text
+        assert "ACME EQUIPMENT LLC | Active | 03/14/2009" in text
+        assert "Search Results" in text
+
+    def test_drops_non_content_markup(self):
+        """Test that scripts, styles, navigation, footers and hidden elements are removed"""
+        text = distill_html(RESULTS_PAGE)["text"]
+        for removed in ("tracking", "color: red", "Help", "Copyright", "Session expired", "VIEWSTATE", "Business Search"):
+            assert removed not in text
+
+    def test_telemetry(self):
+        """Test that telemetry reports the size reduction and table rows"""
+        telemetry = distill_html(RESULTS_PAGE)["telemetry"]
+        assert telemetry["original_chars"] == len(RESULTS_PAGE)
+        assert telemetry["distilled_chars"] < telemetry["original_chars"] / 4
+        assert telemetry["table_rows"] == 3
+        assert telemetry["truncated"] is False
+
+    def test_token_budget_truncates(self):
+        """Test that lines beyond the token budget are dropped and reported"""
+        rows = "".join(f"<tr><td>VENDOR NUMBER {i}</td><td>Active</td></tr>" for i in range(500))
+        result = distill_html(f"<table>{rows}</table>", max_tokens=100)
+
+        assert len(result["text"]) <= 400
+        assert result["telemetry"]["truncated"] is True
+        assert result["telemetry"]["dropped_lines"] > 0
@@ -0,0 +1,178 @@
+import pytest
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from AI.job_queue import JobQueue
+from AI.jobs import QueuedJobManager
+from AI.worker import Worker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(tmp_path / "queue.sqlite3", visibility_timeout=60, max_attempts=2, retry_backoff=0.05)
+    yield queue
+    queue.close()
+
+
+def fake_run(account_id, vendor_id, refresh=False, on_progress=None):
+    on_progress("task_one", "running")
+    on_progress("task_one", "done")
+    return {"results": {"task_one": {"account": account_id}}, "errors": {}, "timings": {"task_one": 0.1}, "total_seconds": 0.1}
+
+
+class TestJobQueue:
+    def test_lease_and_ack(self, queue):
+        """Test that a leased job is hidden from other workers and done once acked"""
+        job_id = queue.enqueue("vendor_screen", {"vendor_id": "v1"})
+        job = queue.lease()
+        assert job.id == job_id and job.payload == {"vendor_id": "v1"} and job.attempts == 1
+        assert queue.lease() is None
+
+        assert queue.ack(job.id, job.token, {"ok": True})
+        assert queue.get(job_id)["status"] == "done"
+        assert queue.get(job_id)["result"] == {"ok": True}
+
+    def test_nack_retries_with_backoff_then_dies(self, queue):
+        """Test that a failed job waits out its backoff, is retried, and is dead after max_attempts"""
+        job_id = queue.enqueue("vendor_screen", {})
+        job = queue.lease()
+        assert queue.nack(job.id, job.token, "timeout")
+        assert queue.lease() is None
+
+        time.sleep(0.1)
+        job = queue.lease()
+        assert job.attempts == 2
+        assert queue.nack(job.id, job.token, "timeout again")
+        assert queue.get(job_id)["status"] == "dead"
+        assert queue.get(job_id)["last_error"] == "timeout again"
+
+    def test_expired_lease_is_released(self, queue):
+        """Test that a job whose lease ran out can be leased again and the old token is rejected"""
+        queue.enqueue("vendor_screen", {})
+        first = queue.lease(visibility_timeout=0.01)
+        time.sleep(0.05)
+        second = queue.lease()
+        assert second.id == first.id and second.token != first.token
+        assert not queue.ack(first.id, first.token)
+        assert queue.ack(second.id, second.token)
+
+    def test_jobs_survive_reopening(self, tmp_path):
+        """Test that queued jobs are still there after the queue file is reopened"""
+        path = tmp_path / "queue.sqlite3"
+        first = JobQueue(path)
+        first.enqueue("vendor_screen", {"vendor_id": "v1"})
+        first.close()
+
+        second = JobQueue(path)
+        assert second.lease().payload == {"vendor_id": "v1"}
+        second.close()
+
+
+class TestWorker:
+    def test_worker_runs_queued_batch(self, queue):
+        """Test that a worker runs every pair of a queued batch and the snapshot reports the results"""
+        manager = QueuedJobManager(queue)
+        job_id = manager.submit([{"account_id": "a1", "vendor_id": "v1"}, {"account_id": "a2", "vendor_id": "v2"}])
+        assert manager.get(job_id)["status"] == "queued"
+
+        worker = Worker(queue, concurrency=2, poll_interval=0.01, run=fake_run)
+        while (job := queue.lease()) is not None:
+            worker.process(job)
+
+        snapshot = manager.get(job_id)
+        assert snapshot["status"] == "done"
+        assert snapshot["progress"] == {"total": 2, "done": 2, "failed": 0}
+        assert snapshot["items"][1]["tasks"] == {"task_one": "done"}
+        assert snapshot["items"][1]["results"] == {"task_one": {"account": "a2"}}
+
+    def test_raising_screen_is_retried(self, queue):
+        """Test that a screen that raises is nacked and shows as retrying"""
+        def broken(*args, **kwargs):
+            raise RuntimeError("boom")
+
+        manager = QueuedJobManager(queue)
+        job_id = manager.submit([{"account_id": "a1", "vendor_id": "v1"}])
+        assert not Worker(queue, run=broken).process(queue.lease())
+
+        item = manager.get(job_id)["items"][0]
+        assert item["status"] == "retrying"
+        assert item["errors"] == {"pipeline": "boom"}
+
+    def test_unsaved_results_are_retried(self, queue):
+        """Test that a screen whose vendor writes failed is nacked instead of acked as done"""
+        def unsaved(*args, **kwargs):
+            return {"results": {}, "errors": {"writes": "1 of 1 vendor writes failed"}, "timings": {}, "total_seconds": 0.0}
+
+        manager = QueuedJobManager(queue)
+        job_id = manager.submit([{"account_id": "a1", "vendor_id": "v1"}])
+        assert not Worker(queue, run=unsaved).process(queue.lease())
+
+        item = manager.get(job_id)["items"][0]
+        assert item["status"] == "retrying"
+        assert item["errors"] == {"pipeline": "1 of 1 vendor writes failed"}
+
+    def test_deferred_tasks_are_retried_after_delay(self, queue):
+        """Test that deferred tasks are re-queued after retry_after and rerun alone, keeping the other results"""
+        calls = []
+
+        def run(account_id, vendor_id, refresh=False, on_progress=None, only=None, completed=None):
+            calls.append(only)
+            if only is None:
+                return {
+                    "results": {"task_one": {"ok": True}, "task_two": {"validated": None, "deferred": True, "retry_after": 0.2}},
+                    "errors": {}, "timings": {"task_one": 0.1, "task_two": 0.0}, "total_seconds": 0.1,
+                    "deferred": ["task_two"]
+                }
+            return {"results": {"task_two": {"validated": True}}, "errors": {}, "timings": {"task_two": 0.2},
+                    "total_seconds": 0.2, "deferred": []}
+
+        manager = QueuedJobManager(queue)
+        job_id = manager.submit([{"account_id": "a1", "vendor_id": "v1"}])
+        worker = Worker(queue, run=run)
+        assert not worker.process(queue.lease())
+
+        item = manager.get(job_id)["items"][0]
+        assert item["status"] == "retrying"
+        assert item["deferred"] == ["task_two"]
+        assert queue.lease() is None
+
+        time.sleep(0.25)
+        assert worker.process(queue.lease())
+        assert calls == [None, ["task_two"]]
+        item = manager.get(job_id)["items"][0]
+        assert item["status"] == "done"
+        assert item["results"] == {"task_one": {"ok": True}, "task_two": {"validated": True}}
+        assert item["deferred"] == []
+
+    def test_deferred_screen_is_acked_when_out_of_attempts(self, queue):
+        """Test that a screen still deferred on its last attempt is acked with its results"""
+        def run(account_id, vendor_id, refresh=False, on_progress=None, only=None, completed=None):
+            return {"results": {"task_two": {"deferred": True, "retry_after": 0.01}}, "errors": {}, "timings": {},
+                    "total_seconds": 0.0, "deferred": ["task_two"]}
+
+        manager = QueuedJobManager(queue)
+        job_id = manager.submit([{"account_id": "a1", "vendor_id": "v1"}])
+        worker = Worker(queue, run=run)
+        assert not worker.process(queue.lease())
+        time.sleep(0.02)
+        assert worker.process(queue.lease())
+
+        item = manager.get(job_id)["items"][0]
+        assert (item["status"], item["attempts"], item["deferred"]) == ("done", 2, ["task_two"])
+
+    def test_threads_drain_on_stop(self, queue):
+        """Test that started worker threads pick up queued jobs and exit after stop"""
+        queue.enqueue_many("vendor_screen", [{"account_id": "a", "vendor_id": f"v{i}"} for i in range(4)])
+        worker = Worker(queue, concurrency=2, poll_interval=0.01, run=fake_run)
+        worker.start()
+        deadline = time.time() + 5
+        while queue.stats()["done"] < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        worker.stop()
+        worker.join()
+        assert queue.stats()["done"] == 4
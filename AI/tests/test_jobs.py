@@ -0,0 +1,94 @@
+import pytest
+import sys
+import threading
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from AI.jobs import JobManager, screen_status, retryable
+
+
+def fake_run(account_id, vendor_id, refresh=False, on_progress=None):
+    """Stands in for run_vendor_pipeline: reports two tasks and fails for vendor "missing" """
+    if vendor_id == "missing":
+        return {"results": {}, "errors": {"context": "Vendor with ID missing not found"}, "timings": {}, "total_seconds": 0.0}
+    for name in ("task_one", "task_two"):
+        on_progress(name, "pending")
+    for name in ("task_one", "task_two"):
+        on_progress(name, "running")
+        on_progress(name, "done")
+    return {
+        "results": {"task_one": {"account": account_id}, "task_two": {"refresh": refresh}},
+        "errors": {},
+        "timings": {"task_one": 0.1, "task_two": 0.2},
+        "total_seconds": 0.2
+    }
+
+
+class TestJobManager:
+    def test_batch_reports_per_vendor_results(self):
+        """Test that each pair's task progress and results are reported once the job finishes"""
+        manager = JobManager(max_workers=2, run=fake_run)
+        job_id = manager.submit([
+            {"account_id": "a1", "vendor_id": "v1"},
+            {"account_id": "a2", "vendor_id": "missing"},
+        ], refresh=True)
+        manager.shutdown()
+
+        job = manager.get(job_id)
+        assert job["status"] == "done"
+        assert job["progress"] == {"total": 2, "done": 1, "failed": 1}
+        first, second = job["items"]
+        assert first["tasks"] == {"task_one": "done", "task_two": "done"}
+        assert first["results"]["task_two"] == {"refresh": True}
+        assert second["status"] == "failed"
+        assert "context" in second["errors"]
+
+    def test_submit_returns_before_screens_finish(self):
+        """Test that submit returns while screens are still running and progress is visible meanwhile"""
+        release = threading.Event()
+
+        def slow_run(account_id, vendor_id, refresh=False, on_progress=None):
+            on_progress("task_one", "running")
+            release.wait(5)
+            return {"results": {"task_one": None}, "errors": {}, "timings": {}, "total_seconds": 0.0}
+
+        manager = JobManager(max_workers=1, run=slow_run)
+        job_id = manager.submit([{"account_id": "a1", "vendor_id": "v1"}, {"account_id": "a1", "vendor_id": "v2"}])
+        job = manager.get(job_id)
+        assert job["status"] in ("queued", "running")
+        assert job["items"][1]["status"] == "queued"
+
+        release.set()
+        manager.shutdown()
+        assert manager.get(job_id)["progress"]["done"] == 2
+
+    def test_raising_run_marks_pair_failed(self):
+        """Test that an exception in a screen fails only that pair"""
+        def broken(*args, **kwargs):
+            raise RuntimeError("boom")
+
+        manager = JobManager(max_workers=1, run=broken)
+        job_id = manager.submit([{"account_id": "a1", "vendor_id": "v1"}])
+        manager.shutdown()
+
+        item = manager.get(job_id)["items"][0]
+        assert item["status"] == "failed"
+        assert item["errors"] == {"pipeline": "boom"}
+
+    def test_unknown_job(self):
+        """Test that an unknown job ID returns None"""
+        manager = JobManager(max_workers=1, run=fake_run)
+        assert manager.get("nope") is None
+        manager.shutdown()
+
+
+class TestScreenStatus:
+    def test_unsaved_results_fail_and_retry(self):
+        """Test that a screen whose writes failed is failed and retryable, and a clean one is neither"""
+        outcome = {"errors": {"writes": "1 of 1 vendor writes failed"}}
+        assert (screen_status(outcome), retryable(outcome)) == ("failed", True)
+        outcome = {"errors": {"task_two": "timeout"}}
+        assert (screen_status(outcome), retryable(outcome)) == ("done", False)
@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from AI.matching import canonical_address, canonical_name, compare_entities, name_similarity
+
+VENDOR = {
+    "Name": "Acme Equipment, LLC",
+    "Street": "123 North Main Street, Suite 200",
+    "City": "Columbus",
+    "State": "Ohio",
+    "ZIP": "43215-1234",
+    "Country": "USA"
+}
+
+
+class TestCanonicalForms:
+    def test_name_ignores_case_punctuation_and_suffix(self):
+        """Test that legal suffixes, case and punctuation do not change the canonical name"""
+        assert canonical_name("Acme Equipment, LLC") == canonical_name("ACME Equipment LLC") == "ACME EQUIPMENT"
+
+    def test_address_abbreviations_units_and_zip(self):
+        """Test USPS abbreviations, unit extraction, state codes and ZIP+4 truncation"""
+        long_form = canonical_address("123 North Main Street, Suite 200", "Columbus", "Ohio", "43215-1234", "USA")
+        short_form = canonical_address("123 N Main St Ste. 200", "COLUMBUS", "OH", "43215", "US")
+        assert long_form == short_form
+        assert long_form.street == "123 N MAIN ST"
+        assert long_form.unit == "200"
+        assert long_form.zip == "43215"
+
+    def test_hyphenated_words_are_kept(self):
+        """Test that abbreviations inside a hyphenated word are not expanded and dropped as suffixes"""
+        assert canonical_name("Co-op Services Co") == "CO OP SERVICES"
+        assert canonical_name("A&B Co.") == "A AND B"
+
+    def test_hash_unit(self):
+        """Test that "#200" is read as a unit"""
+        assert canonical_address("123 Main St #200", "Columbus", "OH", "43215").unit == "200"
+
+
+class TestCompareEntities:
+    def test_equivalent_rows_match(self):
+        """Test that differently formatted copies of the same entity match on both name and address"""
+        account = dict(VENDOR, Name="ACME Equipment LLC", Street="123 N Main St Ste 200", State="OH", ZIP="43215")
+        scores = compare_entities(VENDOR, account)
+        assert scores["name_score"] == 100.0
+        assert scores["address_score"] == 100.0
+        assert scores["name_match"] and scores["address_match"]
+
+    def test_different_entities_do_not_match(self):
+        """Test that a different name at a different address is not a match"""
+        account = dict(VENDOR, Name="Globex Corporation", Street="9 Elm Avenue", ZIP="43004")
+        scores = compare_entities(VENDOR, account)
+        assert not scores["name_match"]
+        assert scores["address_score"] == 0.0
+
+    def test_different_unit_does_not_match(self):
+        """Test that another suite in the same building is a different address"""
+        account = dict(VENDOR, Street="123 N Main St Ste 300")
+        assert compare_entities(VENDOR, account)["address_score"] == 0.0
+        assert compare_entities(VENDOR, dict(VENDOR, Street="123 N Main St"))["address_match"]
+
+    def test_neighbouring_house_numbers_do_not_match(self):
+        """Test that nearby buildings on the same street in the same ZIP are not a match"""
+        for street in ("125 N Main St Ste 200", "1230 North Main Street, Suite 200", "12 N Main St Ste 200"):
+            scores = compare_entities(VENDOR, dict(VENDOR, Street=street))
+            assert scores["address_score"] == 0.0
+            assert not scores["address_match"]
+
+    def test_similar_street_names_do_not_match(self):
+        """Test that a similar street name at the same house number scores below the threshold"""
+        for street in ("123 N Maple St Ste 200", "123 N Main Ave Ste 200"):
+            assert not compare_entities(VENDOR, dict(VENDOR, Street=street))["address_match"]
+        assert compare_entities(VENDOR, dict(VENDOR, Street="123 North Main Street Ste 200", City="Colombus"))["address_match"]
+
+    def test_thresholds_are_configurable(self):
+        """Test that a near-miss name matches only under a lower threshold"""
+        assert 80 < name_similarity("Apex Equipment", "Acme Equipment") < 92
+        account = dict(VENDOR, Name="Apex Equipment")
+        assert not compare_entities(VENDOR, account)["name_match"]
+        assert compare_entities(VENDOR, account, name_threshold=80)["name_match"]
@@ -0,0 +1,141 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from AI.ofac import OfacIndex, load_entries, fold_text, normalize_name, soundex, jaro_winkler, block_keys, shard_for
+
+SDN_ROWS = """36,"AEROCARIBBEAN AIRLINES",-0- ,"CUBA",-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0-
+173,"ANGLO-CARIBBEAN CO., LTD.",-0- ,"CUBA",-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0-
+306,"BANCO NACIONAL DE CUBA",-0- ,"CUBA",-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0-
+2674,"HUSSEIN, Saddam","individual","IRAQ2",-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0-
+"""
+ALT_ROWS = """306,220,"aka","NATIONAL BANK OF CUBA",-0-
+"""
+
+
+@pytest.fixture
+def ofac_dir(tmp_path):
+    """Returns a directory with a small SDN list in the published CSV format"""
+    (tmp_path / "SDN.CSV").write_text(SDN_ROWS, encoding="latin-1")
+    (tmp_path / "ALT.CSV").write_text(ALT_ROWS, encoding="latin-1")
+    return tmp_path
+
+
+@pytest.fixture
+def ofac_index(ofac_dir):
+    """Returns an OfacIndex built from the sample list"""
+    return OfacIndex(load_entries(ofac_dir))
+
+
+class TestNormalization:
+    def test_legal_suffixes_and_punctuation_removed(self):
+        """Test that punctuation and legal suffixes do not affect the normalized name"""
+        assert normalize_name("Anglo-Caribbean Co., Ltd.") == normalize_name("ANGLO CARIBBEAN")
+
+    def test_legal_suffixes_kept_on_request(self):
+        """Test that suffixes can be kept to tell "X LLC" from "X Inc" """
+        assert normalize_name("Front Range Haulers, LLC", drop_suffixes=False) == "FRONT RANGE HAULERS LLC"
+        assert normalize_name("Front Range Haulers, LLC") == normalize_name("Front Range Haulers Inc.")
+
+    def test_fold_text(self):
+        """Test that accents, case and punctuation are folded the same way everywhere"""
+        assert fold_text("  Société Générale, S.A. ") == "SOCIETE GENERALE S A"
+        assert fold_text("Suite #4-B", keep="#") == "SUITE #4 B"
+        assert fold_text(None) == ""
+
+    def test_soundex(self):
+        """Test standard Soundex codes"""
+        assert soundex("Robert") == "R163"
+        assert soundex("Rupert") == "R163"
+        assert soundex("Ashcraft") == "A261"
+
+    def test_jaro_winkler(self):
+        """Test Jaro-Winkler on the textbook example"""
+        assert jaro_winkler("MARTHA", "MARHTA") == pytest.approx(0.961, abs=0.001)
+
+
+class TestOfacIndex:
+    def test_load_entries_with_aliases(self, ofac_dir):
+        """Test that SDN rows and their aliases are loaded"""
+        entries = load_entries(ofac_dir)
+        assert len(entries) == 4
+        assert entries["sdn:306"].aliases == ("NATIONAL BANK OF CUBA",)
+        assert entries["sdn:2674"].sdn_type == "individual"
+
+    def test_exact_entity_match(self, ofac_index):
+        """Test that an entity name with a different legal suffix matches"""
+        matches = ofac_index.screen("Aerocaribbean Airlines LLC")
+        assert [m["entry_id"] for m in matches] == ["sdn:36"]
+        assert matches[0]["score"] == 100.0
+
+    def test_alias_match(self, ofac_index):
+        """Test that a vendor matching only an alias is returned with the primary name"""
+        matches = ofac_index.screen("National Bank of Cuba")
+        assert matches[0]["name"] == "BANCO NACIONAL DE CUBA"
+
+    def test_individual_name_order(self, ofac_index):
+        """Test that "First Last" matches an entry published as "LAST, First" """
+        matches = ofac_index.screen("Saddam Hussein")
+        assert matches[0]["entry_id"] == "sdn:2674"
+
+    def test_fuzzy_match_above_threshold(self, ofac_index):
+        """Test that a name with a dropped word still scores above 80"""
+        matches = ofac_index.screen("Banco Nacional Cuba")
+        assert matches[0]["entry_id"] == "sdn:306"
+        assert 80 <= matches[0]["score"] < 100
+
+    def test_unrelated_name_has_no_match(self, ofac_index):
+        """Test that an unrelated vendor is not matched"""
+        assert ofac_index.screen("Acme Equipment Leasing") == []
+
+    def test_screen_many(self, ofac_index):
+        """Test batch screening returns a result for every name"""
+        results = ofac_index.screen_many(["Acme Equipment", "AEROCARIBBEAN AIRLINES INC", "Aerocaribbean Airlines"])
+        assert results["Acme Equipment"] == []
+        assert results["AEROCARIBBEAN AIRLINES INC"][0]["entry_id"] == "sdn:36"
+        assert results["Aerocaribbean Airlines"][0]["entry_id"] == "sdn:36"
+
+
+class TestOfacRefresh:
+    def test_with_changes_matches_full_rebuild(self, ofac_dir, ofac_index):
+        """Test that an incremental update screens the same as an index built from scratch"""
+        (ofac_dir / "SDN.CSV").write_text(
+            SDN_ROWS.replace('36,"AEROCARIBBEAN AIRLINES"', '36,"AEROCARIBBEAN AIRWAYS"')
+            + '9999,"ACME EQUIPMENT LEASING",-0- ,"SDGT",-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0-\n',
+            encoding="latin-1"
+        )
+        new_entries = load_entries(ofac_dir)
+        updated, diff = ofac_index.with_changes(new_entries)
+        rebuilt = OfacIndex(new_entries)
+
+        assert diff["added"] == {"sdn:9999"}
+        assert diff["changed"] == {"sdn:36"}
+        assert diff["removed"] == set()
+        assert updated.shards == rebuilt.shards
+        assert updated.screen("Acme Equipment Leasing LLC")[0]["entry_id"] == "sdn:9999"
+
+    def test_update_copies_few_shards(self, ofac_dir, ofac_index):
+        """Test that adding one entry rebuilds only the shards holding its keys and shares the rest"""
+        (ofac_dir / "SDN.CSV").write_text(
+            SDN_ROWS + '9999,"ACME EQUIPMENT LEASING",-0- ,"SDGT",-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0-\n',
+            encoding="latin-1"
+        )
+        updated, diff = ofac_index.with_changes(load_entries(ofac_dir))
+
+        keys = {key for name in updated.names["sdn:9999"] for key in block_keys(name)}
+        assert diff["rebuilt_shards"] == len({shard_for(key) for key in keys})
+        shared = [shard for shard in ofac_index.shards if updated.shards.get(shard) is ofac_index.shards[shard]]
+        assert len(shared) >= len(ofac_index.shards) - diff["rebuilt_shards"]
+
+    def test_old_index_is_unchanged(self, ofac_dir, ofac_index):
+        """Test that building the updated index leaves the index in use untouched"""
+        (ofac_dir / "SDN.CSV").write_text(SDN_ROWS.splitlines()[0] + "\n", encoding="latin-1")
+        updated, diff = ofac_index.with_changes(load_entries(ofac_dir))
+
+        assert diff["removed"] == {"sdn:173", "sdn:306", "sdn:2674"}
+        assert updated.screen("Saddam Hussein") == []
+        assert ofac_index.screen("Saddam Hussein")[0]["entry_id"] == "sdn:2674"
@@ -0,0 +1,178 @@
+import pytest
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+import db
+# AI.tasks creates a database driver on import; a placeholder project is enough because the tests replace it
+db.PROJECTURL = db.PROJECTURL or "http://localhost"
+db.ANONKEY = db.ANONKEY or "test-key"
+
+from AI import pipeline, tasks
+from AI.job_queue import JobQueue
+from AI.jobs import QueuedJobManager
+from AI.pipeline import PipelineTask, run_graph, validate_graph, select_tasks
+from AI.worker import Worker
+
+
+class TestPipelineGraph:
+    def test_independent_tasks_overlap(self):
+        """Test that tasks without dependencies run at the same time"""
+        pipeline_tasks = [
+            PipelineTask(f"task_{i}", lambda deps: time.sleep(0.2) or "done")
+            for i in range(4)
+        ]
+        run = run_graph(pipeline_tasks)
+
+        assert run["total_seconds"] < 0.6
+        assert set(run["results"]) == {"task_0", "task_1", "task_2", "task_3"}
+        assert all(seconds >= 0.2 for seconds in run["timings"].values())
+
+    def test_dependency_result_is_passed(self):
+        """Test that a task receives the results of the tasks it depends on"""
+        pipeline_tasks = [
+            PipelineTask("task_two", lambda deps: {"dnb_state": "Ohio"}),
+            PipelineTask("task_three", lambda deps: deps["task_two"]["dnb_state"], depends_on=("task_two",)),
+        ]
+        run = run_graph(pipeline_tasks)
+
+        assert run["results"]["task_three"] == "Ohio"
+        assert run["errors"] == {}
+
+    def test_failed_task_is_recorded(self):
+        """Test that a failing task is reported and its dependents still run"""
+        def fail(deps):
+            raise RuntimeError("boom")
+
+        pipeline_tasks = [
+            PipelineTask("task_six", fail),
+            PipelineTask("task_seven", lambda deps: deps["task_six"] is None, depends_on=("task_six",)),
+        ]
+        run = run_graph(pipeline_tasks)
+
+        assert run["errors"] == {"task_six": "boom"}
+        assert run["results"]["task_seven"] is True
+
+    def test_progress_is_reported(self):
+        """Test that on_progress sees every task go from pending through running to done or failed"""
+        events = []
+
+        def fail(deps):
+            raise RuntimeError("boom")
+
+        pipeline_tasks = [
+            PipelineTask("task_two", lambda deps: "ok"),
+            PipelineTask("task_three", fail, depends_on=("task_two",)),
+        ]
+        run_graph(pipeline_tasks, on_progress=lambda name, status: events.append((name, status)))
+
+        assert [s for name, s in events if name == "task_two"] == ["pending", "running", "done"]
+        assert [s for name, s in events if name == "task_three"] == ["pending", "running", "failed"]
+
+    def test_cycle_is_rejected(self):
+        """Test that a dependency cycle raises ValueError"""
+        pipeline_tasks = [
+            PipelineTask("a", lambda deps: None, depends_on=("b",)),
+            PipelineTask("b", lambda deps: None, depends_on=("a",)),
+        ]
+        with pytest.raises(ValueError):
+            validate_graph(pipeline_tasks)
+
+
+class TestSelectTasks:
+    def test_downstream_tasks_are_included(self):
+        """Test that rerunning a task also reruns the tasks that depend on it, and drops other dependencies"""
+        graph = [
+            PipelineTask("a", lambda deps: 1),
+            PipelineTask("b", lambda deps: 2),
+            PipelineTask("c", lambda deps: 3, depends_on=("b",)),
+            PipelineTask("d", lambda deps: 4, depends_on=("a", "c")),
+        ]
+        selected = select_tasks(graph, ["b"])
+        assert [(t.name, t.depends_on) for t in selected] == [("b", ()), ("c", ("b",)), ("d", ("c",))]
+        assert run_graph(selected)["results"] == {"b": 2, "c": 3, "d": 4}
+
+    def test_completed_downstream_tasks_are_skipped(self):
+        """Test that downstream tasks that already finished are not rerun"""
+        graph = [
+            PipelineTask("b", lambda deps: 2),
+            PipelineTask("c", lambda deps: 3, depends_on=("b",)),
+            PipelineTask("d", lambda deps: 4, depends_on=("c",)),
+            PipelineTask("e", lambda deps: 5, depends_on=("b", "c")),
+        ]
+        assert [t.name for t in select_tasks(graph, ["b"], completed=["c", "e"])] == ["b"]
+        assert [t.name for t in select_tasks(graph, ["b"], completed=["e"])] == ["b", "c", "d"]
+        assert [t.name for t in select_tasks(graph, ["b", "e"], completed=["c", "e"])] == ["b", "e"]
+
+    def test_unknown_task_is_rejected(self):
+        with pytest.raises(ValueError):
+            select_tasks([PipelineTask("a", lambda deps: 1)], ["z"])
+
+
+class TestVendorPipeline:
+    @pytest.fixture
+    def driver(self, monkeypatch):
+        driver = db.DatabaseDriver(cache_ttl=0)
+        monkeypatch.setattr(tasks, "db_driver", driver)
+        monkeypatch.setattr(tasks, "load_vendor_context", lambda driver, vendor_id, account_id=None: object())
+        monkeypatch.setattr(pipeline, "build_vendor_pipeline", lambda account_id, vendor_id, context, refresh=False: [
+            PipelineTask("task_one", lambda deps: driver.update_flags_many(vendor_id, ["name/address"]))
+        ])
+        return driver
+
+    def test_saved_writes_are_reported(self, driver, monkeypatch):
+        """Test that a run reports its coalesced writes and no write error when the flush succeeds"""
+        monkeypatch.setattr(driver, "_apply_vendor_updates", lambda vendor_id, fields, flags: True)
+        outcome = pipeline.run_vendor_pipeline("a1", "v1")
+        assert outcome["writes"] == {"buffered": 1, "flushed": 1, "failed": 0}
+        assert "writes" not in outcome["errors"]
+
+    def test_failed_flush_is_an_error(self, driver, monkeypatch):
+        """Test that a run whose buffered writes could not be saved reports it in errors["writes"]"""
+        monkeypatch.setattr(driver, "_apply_vendor_updates", lambda vendor_id, fields, flags: False)
+        outcome = pipeline.run_vendor_pipeline("a1", "v1")
+        assert outcome["writes"]["failed"] == 1
+        assert outcome["errors"]["writes"] == "1 of 1 vendor writes failed"
+
+    def test_requeued_screen_does_not_repeat_writes(self, driver, monkeypatch, tmp_path):
+        """Test that rerunning a deferred task_two through the worker does not re-add task_three's flags or resend the email"""
+        calls = []
+        monkeypatch.setattr(driver, "_apply_vendor_updates", lambda vendor_id, fields, flags: calls.append(("write", flags)) or True)
+
+        def task_two(deps):
+            calls.append("task_two")
+            if calls.count("task_two") == 1:
+                return {"validated": None, "deferred": True, "retry_after": 0.01}
+            return {"validated": True, "dnb_state": "OH"}
+
+        def task_three(deps):
+            calls.append("task_three")
+            return driver.update_flags_many("v1", ["Business not found in Secretary of State registry"])
+
+        monkeypatch.setattr(pipeline, "build_vendor_pipeline", lambda account_id, vendor_id, context, refresh=False: [
+            PipelineTask("task_two", task_two),
+            PipelineTask("task_three", task_three, depends_on=("task_two",)),
+            PipelineTask("task_seven", lambda deps: calls.append("email") or True, depends_on=("task_two", "task_three")),
+        ])
+
+        queue = JobQueue(tmp_path / "queue.sqlite3", visibility_timeout=60, max_attempts=3, retry_backoff=0.01)
+        manager = QueuedJobManager(queue)
+        job_id = manager.submit([{"account_id": "a1", "vendor_id": "v1"}])
+        worker = Worker(queue, run=pipeline.run_vendor_pipeline)
+        assert not worker.process(queue.lease())
+        time.sleep(0.05)
+        assert worker.process(queue.lease())
+
+        assert calls.count("task_two") == 2
+        assert calls.count("task_three") == 1
+        assert calls.count("email") == 1
+        assert [call for call in calls if isinstance(call, tuple)] == [("write", ["Business not found in Secretary of State registry"])]
+        item = manager.get(job_id)["items"][0]
+        assert item["status"] == "done"
+        assert item["deferred"] == []
+        assert item["results"]["task_two"]["validated"] is True
+        queue.close()
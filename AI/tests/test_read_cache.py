@@ -0,0 +1,84 @@
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from db import ReadCache, read_cached, invalidates
+
+
+class FakeDriver:
+    """Counts the queries the cached methods would send to Supabase"""
+
+    def __init__(self, ttl=60):
+        self.read_cache = ReadCache(ttl, max_entries=2)
+        self.rows = {"v1": {"ID": "v1", "Flags": []}, "v2": {"ID": "v2", "Flags": []}, "v3": {"ID": "v3", "Flags": []}}
+        self.queries = 0
+
+    @read_cached("vendor")
+    def get_vendor_by_id(self, vendor_id):
+        self.queries += 1
+        row = self.rows.get(vendor_id)
+        return dict(row) if row else None
+
+    @invalidates("vendor")
+    def update_flags(self, vendor_id, flag):
+        self.rows[vendor_id]["Flags"] = self.rows[vendor_id]["Flags"] + [flag]
+        return True
+
+
+class TestReadCache:
+    def test_repeated_reads_hit_the_cache(self):
+        """Test that a row read twice costs one query"""
+        driver = FakeDriver()
+        driver.get_vendor_by_id("v1")
+        driver.get_vendor_by_id("v1")
+
+        assert driver.queries == 1
+        assert driver.read_cache.stats()["hit_rate"] == 0.5
+
+    def test_write_invalidates(self):
+        """Test that a write through the driver is visible on the next read"""
+        driver = FakeDriver()
+        driver.get_vendor_by_id("v1")
+        driver.update_flags("v1", "name/address")
+
+        assert driver.get_vendor_by_id("v1")["Flags"] == ["name/address"]
+        assert driver.queries == 2
+
+    def test_cached_rows_are_copies(self):
+        """Test that mutating a returned row does not change the cached row"""
+        driver = FakeDriver()
+        driver.get_vendor_by_id("v1")["Flags"].append("mutated")
+        assert driver.get_vendor_by_id("v1")["Flags"] == []
+
+    def test_missing_rows_are_not_cached(self):
+        """Test that a missing row is looked up again"""
+        driver = FakeDriver()
+        driver.get_vendor_by_id("nope")
+        driver.get_vendor_by_id("nope")
+        assert driver.queries == 2
+
+    def test_expired_and_evicted_entries(self):
+        """Test TTL expiry and LRU eviction"""
+        driver = FakeDriver(ttl=0.001)
+        driver.get_vendor_by_id("v1")
+        time.sleep(0.01)
+        driver.get_vendor_by_id("v1")
+        assert driver.queries == 2
+
+        driver = FakeDriver()
+        for vendor_id in ("v1", "v2", "v3", "v1"):
+            driver.get_vendor_by_id(vendor_id)
+        assert driver.queries == 4
+        assert driver.read_cache.stats()["evictions"] == 2
+
+    def test_stale_read_is_not_stored_after_invalidation(self):
+        """Test that a value fetched before a write is not cached after the write invalidates the key"""
+        cache = ReadCache(60)
+        hit, _, version = cache.get(("vendor", "v1"))
+        cache.invalidate(("vendor", "v1"))
+        cache.set(("vendor", "v1"), {"Flags": []}, version)
+        assert cache.get(("vendor", "v1"))[0] is False
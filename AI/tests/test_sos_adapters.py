@@ -0,0 +1,100 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from AI import sos_adapters
+from AI.sos_adapters import TableSosAdapter, get_adapter, register_adapter
+
+# Results tables in the layouts registries commonly use; not saved from a live registry
+ENTITY_RESULTS = """
+<table>
+  <tr><th>Business Name</th><th>Entity #</th><th>Filing Type</th><th>Original Filing Date</th><th>Status</th></tr>
+  <tr><td>ACME EQUIPMENT, LLC</td><td>1234567</td><td>DOMESTIC LIMITED LIABILITY COMPANY</td><td>03/14/2009</td><td>Active</td></tr>
+  <tr><td>ACME EQUIPMENT LEASING INC</td><td>7654321</td><td>FOR PROFIT CORPORATION</td><td>01/02/2015</td><td>Cancelled</td></tr>
+</table>
+"""
+
+SUFFIX_TIE_RESULTS = """
+<table>
+  <tr><th>#</th><th>ID Number</th><th>Name</th><th>Status</th><th>Form</th><th>Formation Date</th></tr>
+  <tr><td>1</td><td>20081234567</td><td>Front Range Haulers, LLC</td><td>Good Standing</td><td>Limited Liability Company</td><td>07/01/2008</td></tr>
+  <tr><td>2</td><td>20191234567</td><td>Front Range Haulers Inc.</td><td>Delinquent</td><td>Corporation</td><td>02/11/2019</td></tr>
+</table>
+"""
+
+ISO_DATE_RESULTS = """
+<table>
+  <thead><tr><th>Business Name</th><th>Entity Type</th><th>Registration Date</th><th>Status</th></tr></thead>
+  <tbody>
+    <tr><td>Keystone Crane Services Inc</td><td>Business Corporation</td><td>1998-04-20</td><td>Active</td></tr>
+  </tbody>
+</table>
+"""
+
+
+class FixtureAdapter(TableSosAdapter):
+    active_statuses = TableSosAdapter.active_statuses + ("good standing",)
+
+
+@pytest.fixture
+def adapter(monkeypatch):
+    monkeypatch.setattr(sos_adapters, "SOS_ADAPTERS", {})
+    register_adapter("New Mexico")(FixtureAdapter)
+    return get_adapter("New Mexico")
+
+
+class TestSosAdapters:
+    def test_no_state_is_registered(self):
+        """Test that states without a verified adapter are read by Perplexity"""
+        for state in ("Ohio", "Colorado", "Pennsylvania", "Iowa", "Wyoming"):
+            assert get_adapter(state) is None
+
+    def test_adapter_lookup_ignores_case_and_spacing(self, adapter):
+        """Test that adapters are found by state name in any case"""
+        assert get_adapter("NEW MEXICO") is get_adapter("newmexico") is adapter
+        assert adapter.state == "New Mexico"
+
+    def test_parse_active_business(self, adapter):
+        """Test that the matching row's date and status are parsed"""
+        results = adapter.parse(ENTITY_RESULTS, "Acme Equipment LLC")
+
+        assert results["found"] is True
+        assert results["registration_date"] == "03/14/2009"
+        assert results["years_in_business"] > 15
+        assert results["status"] == "Active"
+        assert results["active"] is True
+
+    def test_parse_inactive_business(self, adapter):
+        """Test that a non-active status is reported as inactive"""
+        results = adapter.parse(ENTITY_RESULTS, "Acme Equipment Leasing, Inc.")
+
+        assert results["found"] is True
+        assert results["active"] is False
+
+    def test_parse_vendor_not_in_results(self, adapter):
+        """Test that a results table without an exact name match is inconclusive rather than not found"""
+        assert adapter.parse(ENTITY_RESULTS, "Globex Corporation") is None
+        assert adapter.parse(ENTITY_RESULTS, "Acme Equipment Rentals") is None
+
+    def test_parse_failure_returns_none(self, adapter):
+        """Test that a page without a recognizable results table falls back to the LLM"""
+        assert adapter.parse("<p>No results table here</p>", "Acme Equipment LLC") is None
+        bad_date = ENTITY_RESULTS.replace("03/14/2009", "sometime in 2009")
+        assert adapter.parse(bad_date, "Acme Equipment LLC") is None
+
+    def test_legal_suffix_breaks_ties(self, adapter):
+        """Test that "X LLC" and "X Inc" rows are told apart by their suffix"""
+        results = adapter.parse(SUFFIX_TIE_RESULTS, "Front Range Haulers LLC")
+        assert (results["registration_date"], results["status"], results["active"]) == ("07/01/2008", "Good Standing", True)
+
+        results = adapter.parse(SUFFIX_TIE_RESULTS, "Front Range Haulers, Inc")
+        assert (results["registration_date"], results["active"]) == ("02/11/2019", False)
+        assert adapter.parse(SUFFIX_TIE_RESULTS, "Front Range Haulers") is None
+
+    def test_iso_dates_and_thead(self, adapter):
+        results = adapter.parse(ISO_DATE_RESULTS, "Keystone Crane Services, Inc.")
+        assert (results["found"], results["registration_date"], results["active"]) == (True, "04/20/1998", True)
@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from AI.state_registry import StateRegistry, StateRegistryRefresher, load_state_links, resolve_state
+import AI.state_registry as state_registry
+
+
+class FakeStatesDriver:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get_state_links(self):
+        return self.rows
+
+
+class TestStateRegistry:
+    def test_resolves_spelling_variants(self):
+        """Test that names, postal codes and case/spacing variants resolve to the full name"""
+        for variant in ("New York", "new york", "NEWYORK", " newyork ", "NY", "ny", "N.Y."):
+            assert resolve_state(variant) == "New York"
+        assert resolve_state("Ontario") is None
+        assert resolve_state(None) is None
+
+    def test_lookup_csv_loads_every_state(self):
+        """Test that the bundled CSV loads, including rows with stray quotes and trailing spaces"""
+        links = load_state_links()
+        assert len(links) == 50
+        assert links["Rhode Island"].startswith("https://business.sos.ri.gov")
+        assert links["Wyoming"].startswith("https://wyobiz.wy.gov")
+
+    def test_get_url(self):
+        """Test URL lookup by any accepted spelling"""
+        registry = StateRegistry({"Ohio": "https://ohio.example", "newyork": "https://ny.example"})
+        assert registry.get_url("OH") == "https://ohio.example"
+        assert registry.get_url("New York") == "https://ny.example"
+        assert registry.get_url("Texas") is None
+
+    def test_refresh_overrides_csv_links(self, monkeypatch):
+        """Test that database links replace CSV links and missing states keep theirs"""
+        monkeypatch.setattr(state_registry, "_registry", StateRegistry({"Ohio": "https://old.example", "Iowa": "https://iowa.example"}))
+        refresher = StateRegistryRefresher(FakeStatesDriver({"ohio": "https://new.example"}), interval=60)
+        refresher.refresh()
+
+        registry = state_registry.get_state_registry()
+        assert registry.get_url("Ohio") == "https://new.example"
+        assert registry.get_url("Iowa") == "https://iowa.example"
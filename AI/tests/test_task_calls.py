@@ -0,0 +1,546 @@
+import pytest
+import sys
+import time
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+# Add project root to path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+import db
+# AI.tasks creates a database driver on import; a placeholder project is enough because the tests replace it
+db.PROJECTURL = db.PROJECTURL or "http://localhost"
+db.ANONKEY = db.ANONKEY or "test-key"
+
+from AI import tasks
+from AI.browser_pool import run_async
+from AI.cache import ResponseCache
+from AI.clients import ProviderThrottled
+from AI.ofac import OfacIndex, SdnEntry
+from requests import HTTPError, ReadTimeout, RequestException
+
+
+class FakeTaskDriver:
+    """Records vendor writes made by the tasks"""
+
+    def __init__(self):
+        self.flags = []
+        self.sos = []
+        self.ofac = {}
+
+    def update_flags_many(self, vendor_id, flags):
+        self.flags.append((vendor_id, list(flags)))
+        return True
+
+    def update_sos_info(self, vendor_id, years, active):
+        self.sos.append((vendor_id, years, active))
+        return True
+
+    def update_ofac_info_many(self, hits):
+        self.ofac.update(hits)
+        return True
+
+    def get_accounts(self):
+        return [{"ID": 1, "Name": "Acme Equipment LLC", "Street": "9 Elm Ave", "State": "OH", "ZIP": "43004"}]
+
+    def get_vendors(self):
+        return [{"ID": 10, "Name": "ACME Equipment", "Street": "1 Main St", "State": "OH", "ZIP": "43215"}]
+
+
+class FakeContext:
+    def __init__(self, **vendor):
+        self.vendor = {"Name": "Acme Equipment", "City": "Columbus", "State": "Ohio", **vendor}
+        self.country = "US"
+        self.vendor_name = self.vendor["Name"]
+        self.vendor_address = "500 High St, Columbus, OH 43215"
+
+
+@pytest.fixture
+def task_driver(monkeypatch):
+    driver = FakeTaskDriver()
+    monkeypatch.setattr(tasks, "db_driver", driver)
+    return driver
+
+
+class FakeBrowserPool:
+    @asynccontextmanager
+    async def page(self):
+        yield object()
+
+
+class FakeSearch:
+    async def search(self, page, url, vendor_name):
+        return "<html><body>Acme Equipment - Active</body></html>"
+
+
+class TestTaskThree:
+    def test_perplexity_calls_do_not_block_other_checks(self, monkeypatch, task_driver):
+        """Test that SOS checks from several threads overlap while each waits on a slow Perplexity call"""
+        def slow_analysis(html_content, refresh=False):
+            time.sleep(0.2)
+            return {"found": True, "years_in_business": 12, "status": "Active", "active": True}
+
+        monkeypatch.setattr(tasks, "get_browser_pool", lambda: FakeBrowserPool())
+        monkeypatch.setattr(tasks, "get_adapter", lambda state: None)
+        monkeypatch.setattr(tasks, "GENERIC_SOS_ADAPTER", FakeSearch())
+        monkeypatch.setattr(tasks, "analyze_secretary_of_state_page", slow_analysis)
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda i=i: results.append(run_async(tasks.task_three(f"v{i}", context=FakeContext()))))
+            for i in range(4)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert time.perf_counter() - started < 0.6
+        assert all(result["success"] and result["flags_added"] == [] for result in results)
+        assert len(task_driver.sos) == 4
+
+    def test_perplexity_throttled_defers(self, monkeypatch, task_driver):
+        """Test that a rate limited Secretary of State analysis is deferred without writing SOS info or flags"""
+        def throttled(html_content, refresh=False):
+            raise ProviderThrottled("perplexity is rate limiting requests")
+
+        monkeypatch.setattr(tasks, "get_browser_pool", lambda: FakeBrowserPool())
+        monkeypatch.setattr(tasks, "get_adapter", lambda state: None)
+        monkeypatch.setattr(tasks, "GENERIC_SOS_ADAPTER", FakeSearch())
+        monkeypatch.setattr(tasks, "analyze_secretary_of_state_page", throttled)
+
+        result = run_async(tasks.task_three("v1", context=FakeContext()))
+        assert result["deferred"] is True
+        assert (task_driver.sos, task_driver.flags) == ([], [])
+
+
+@pytest.fixture
+def collision_index(monkeypatch):
+    monkeypatch.setattr(tasks, "_collision_index", None)
+    yield
+    db.track_collisions(None)
+
+
+class TestCollisionIndexStartup:
+    def test_load_registers_index_with_drivers(self, task_driver, collision_index):
+        """Test that the startup build is used by task_one and kept current through the drivers"""
+        index = tasks.load_collision_index()
+        assert tasks.get_collision_index() is index
+        assert db._collision_index is index
+        assert tasks.find_portfolio_collisions(FakeContext(ID=10, Street="1 Main St", ZIP="43215", State="OH"))["accounts"] == [
+            {"id": 1, "name_match": True, "address_match": False}
+        ]
+
+    def test_load_failure_returns_none(self, task_driver, collision_index, monkeypatch):
+        """Test that a failed startup build is reported and left for the first screen to retry"""
+        def fail():
+            raise RuntimeError("connection refused")
+        monkeypatch.setattr(task_driver, "get_accounts", fail, raising=False)
+        assert tasks.load_collision_index() is None
+        assert tasks._collision_index is None
+
+
+class FakeOfacIndex:
+    """Matches the given names"""
+
+    def __init__(self, *names):
+        self.names = names
+
+    def screen_many(self, names):
+        return {name: [{"name": name, "score": 100}] if name in self.names else [] for name in names}
+
+
+class TestTaskFourBatch:
+    def test_flags_only_new_hits(self, monkeypatch, task_driver):
+        """Test that vendors already marked or flagged as OFAC hits are not flagged again"""
+        flag = "Vendor found on OFAC Sanctions List"
+        vendors = [
+            {"ID": 1, "Name": "Bad Co", "OfacHitFound": False, "Flags": []},
+            {"ID": 2, "Name": "Bad Co", "OfacHitFound": True, "Flags": [flag]},
+            {"ID": 3, "Name": "Bad Co", "OfacHitFound": None, "Flags": [flag]},
+            {"ID": 4, "Name": "Good Co", "OfacHitFound": False, "Flags": None}
+        ]
+        monkeypatch.setattr(tasks, "get_ofac_index", lambda: FakeOfacIndex("Bad Co"))
+
+        result = tasks.task_four_batch(vendors)
+        assert sorted(result["hits"]) == [1, 2, 3]
+        assert result["flagged"] == [1]
+        assert task_driver.flags == [(1, [flag])]
+        assert task_driver.ofac == {1: True, 2: True, 3: True, 4: False}
+
+    def test_repeated_runs_flag_once(self, monkeypatch, task_driver):
+        """Test that a second run over the updated rows adds no flag"""
+        flag = "Vendor found on OFAC Sanctions List"
+        monkeypatch.setattr(tasks, "get_ofac_index", lambda: FakeOfacIndex("Bad Co"))
+        tasks.task_four_batch([{"ID": 1, "Name": "Bad Co", "OfacHitFound": False, "Flags": []}])
+        tasks.task_four_batch([{"ID": 1, "Name": "Bad Co", "OfacHitFound": True, "Flags": [flag]}])
+        assert task_driver.flags == [(1, [flag])]
+
+
+class TestOfacRescreen:
+    def test_new_entries_flag_only_unflagged_matches(self, monkeypatch, task_driver):
+        """Test that a list update rescreens matching rows in one batch and does not re-flag known hits"""
+        flag = "Vendor found on OFAC Sanctions List"
+        entry = SdnEntry("sdn:1", "BOREALIS TRADING CO")
+        vendors = [
+            {"ID": 1, "Name": "Borealis Trading LLC", "OfacHitFound": False, "Flags": []},
+            {"ID": 2, "Name": "Borealis Trading Company", "OfacHitFound": True, "Flags": [flag]},
+            {"ID": 3, "Name": "Acme Equipment", "OfacHitFound": False, "Flags": []}
+        ]
+        monkeypatch.setattr(task_driver, "get_vendors", lambda: vendors)
+
+        def per_vendor(*args, **kwargs):
+            raise AssertionError("vendors must not be reloaded one at a time")
+        monkeypatch.setattr(tasks, "task_four", per_vendor)
+
+        assert tasks.rescreen_vendors_for_new_ofac_entries([entry], OfacIndex({entry.entry_id: entry})) == [1, 2]
+        assert task_driver.flags == [(1, [flag])]
+        assert task_driver.ofac == {1: True, 2: True}
+
+
+class FakeHttpResponse:
+    def __init__(self, status_code, body=None, text=""):
+        self.status_code = status_code
+        self.body = body
+        self.text = text
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(f"{self.status_code} error", response=self)
+
+
+class FakeClient:
+    """Returns queued responses from get/post, raising any queued exceptions, and records the calls"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def _next(self):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def post(self, url, **kwargs):
+        self.calls.append(("post", url, kwargs))
+        return self._next()
+
+    def get(self, url, **kwargs):
+        self.calls.append(("get", url, kwargs))
+        return self._next()
+
+
+@pytest.fixture
+def response_cache(monkeypatch, tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3")
+    monkeypatch.setattr(tasks, "get_cache", lambda: cache)
+    return cache
+
+
+def cached_ttl(cache, namespace, key):
+    """Seconds the entry was stored for"""
+    row = cache._conn.execute(
+        "SELECT expires_at - created_at FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key)
+    ).fetchone()
+    return round(row[0]) if row else None
+
+
+GEOCODE_OK = {"status": "OK", "results": [{"geometry": {"location_type": "ROOFTOP"}, "place_id": "place-1"}]}
+
+
+class TestGoogleCaching:
+    def test_normalize_address(self):
+        """Test that case, punctuation and spacing do not change the cache key"""
+        assert tasks.normalize_address("500 High St., Columbus,  OH 43215") == "500 high st columbus oh 43215"
+        assert tasks.normalize_address("500 HIGH ST COLUMBUS OH 43215") == tasks.normalize_address("500 High St., Columbus, OH 43215")
+
+    def test_geocode_is_cached_by_normalized_address(self, monkeypatch, response_cache):
+        """Test that the same address in a different format is served from the cache"""
+        client = FakeClient(FakeHttpResponse(200, GEOCODE_OK))
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+
+        first = tasks.geocode_address("500 High St., Columbus, OH 43215")
+        second = tasks.geocode_address("500 HIGH ST COLUMBUS OH 43215")
+        assert first == second == {"status": "OK", "location_type": "ROOFTOP", "place_id": "place-1"}
+        assert len(client.calls) == 1
+        assert cached_ttl(response_cache, "google_geocode", "500 high st columbus oh 43215") == tasks.GOOGLE_CACHE_TTLS["geocode"]
+
+    def test_zero_results_uses_negative_ttl(self, monkeypatch, response_cache):
+        """Test that an unknown address is cached for the shorter ZERO_RESULTS TTL"""
+        client = FakeClient(FakeHttpResponse(200, {"status": "ZERO_RESULTS", "results": []}))
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+
+        assert tasks.geocode_address("1 Nowhere Rd")["place_id"] is None
+        assert tasks.geocode_address("1 Nowhere Rd")["status"] == "ZERO_RESULTS"
+        assert len(client.calls) == 1
+        assert cached_ttl(response_cache, "google_geocode", "1 nowhere rd") == tasks.GOOGLE_CACHE_TTLS["zero_results"]
+
+    def test_other_statuses_are_not_cached(self, monkeypatch, response_cache):
+        """Test that a failed geocode is looked up again next time"""
+        client = FakeClient(FakeHttpResponse(200, {"status": "INVALID_REQUEST"}), FakeHttpResponse(200, GEOCODE_OK))
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+
+        assert tasks.geocode_address("500 High St")["status"] == "INVALID_REQUEST"
+        assert tasks.geocode_address("500 High St")["status"] == "OK"
+        assert len(client.calls) == 2
+
+    def test_refresh_bypasses_and_updates_cache(self, monkeypatch, response_cache):
+        """Test that refresh calls the API again and stores the new result"""
+        moved = {"status": "OK", "results": [{"geometry": {"location_type": "APPROXIMATE"}, "place_id": "place-2"}]}
+        client = FakeClient(FakeHttpResponse(200, GEOCODE_OK), FakeHttpResponse(200, moved))
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+
+        tasks.geocode_address("500 High St")
+        assert tasks.geocode_address("500 High St", refresh=True)["place_id"] == "place-2"
+        assert tasks.geocode_address("500 High St")["place_id"] == "place-2"
+        assert len(client.calls) == 2
+
+    def test_place_types_are_cached(self, monkeypatch, response_cache):
+        """Test that Place Details types are cached per place_id and refresh bypasses them"""
+        client = FakeClient(
+            FakeHttpResponse(200, {"status": "OK", "result": {"types": ["store"]}}),
+            FakeHttpResponse(200, {"status": "OK", "result": {"types": ["point_of_interest"]}})
+        )
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+
+        assert tasks.get_place_types("place-1") == ["store"]
+        assert tasks.get_place_types("place-1") == ["store"]
+        assert len(client.calls) == 1
+        assert client.calls[0][2]["params"]["place_id"] == "place-1"
+        assert tasks.get_place_types("place-1", refresh=True) == ["point_of_interest"]
+        assert len(client.calls) == 2
+
+    def test_failed_place_details_are_not_cached(self, monkeypatch, response_cache):
+        """Test that a non-OK Place Details response returns None and is not stored"""
+        client = FakeClient(FakeHttpResponse(200, {"status": "NOT_FOUND"}), FakeHttpResponse(200, {"status": "OK", "result": {"types": ["store"]}}))
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+
+        assert tasks.get_place_types("place-1") is None
+        assert tasks.get_place_types("place-1") == ["store"]
+
+
+DNB_FOUND = {"isSuccess": True, "data": [{"name": "Acme Equipment"}]}
+
+
+class TestDnbCaching:
+    def test_cache_key_normalizes_search(self):
+        """Test that case and spacing do not change the key and only Canada keeps the country"""
+        key = tasks.dnb_cache_key("Acme  Equipment", "Columbus", "OH")
+        assert tasks.dnb_cache_key("ACME Equipment ", " columbus", "oh") == key
+        assert tasks.dnb_cache_key("Acme Equipment", "Columbus", "OH", "US") == key
+        assert tasks.dnb_cache_key("Acme Equipment", "Columbus", "OH", "CA") != key
+        assert tasks.dnb_cache_key("Acme Equipment", "Dayton", "OH") != key
+
+    def test_success_is_cached(self, monkeypatch, response_cache):
+        """Test that a repeat search with differently formatted input is served from the cache"""
+        client = FakeClient(FakeHttpResponse(200, DNB_FOUND))
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+
+        assert tasks.task_two_endpoint("Acme Equipment", "Columbus", "OH") == DNB_FOUND
+        assert tasks.task_two_endpoint("ACME  EQUIPMENT", "columbus", "oh") == DNB_FOUND
+        assert len(client.calls) == 1
+        key = tasks.dnb_cache_key("Acme Equipment", "Columbus", "OH")
+        assert cached_ttl(response_cache, "dnb", key) == tasks.DNB_CACHE_TTL
+
+    def test_unsuccessful_search_uses_short_ttl(self, monkeypatch, response_cache):
+        """Test that isSuccess false is cached for DNB_NEGATIVE_CACHE_TTL only"""
+        not_found = {"isSuccess": False, "data": []}
+        client = FakeClient(FakeHttpResponse(200, not_found))
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+
+        assert tasks.task_two_endpoint("Unknown Co", "Columbus", "OH") == not_found
+        assert tasks.task_two_endpoint("Unknown Co", "Columbus", "OH") == not_found
+        assert len(client.calls) == 1
+        key = tasks.dnb_cache_key("Unknown Co", "Columbus", "OH")
+        assert cached_ttl(response_cache, "dnb", key) == tasks.DNB_NEGATIVE_CACHE_TTL
+        assert tasks.DNB_NEGATIVE_CACHE_TTL < tasks.DNB_CACHE_TTL
+
+    def test_http_error_is_not_cached(self, monkeypatch, response_cache):
+        """Test that a failed DNB call raises and the next call tries again"""
+        client = FakeClient(FakeHttpResponse(502), FakeHttpResponse(200, DNB_FOUND))
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+
+        with pytest.raises(HTTPError):
+            tasks.task_two_endpoint("Acme Equipment", "Columbus", "OH")
+        assert tasks.task_two_endpoint("Acme Equipment", "Columbus", "OH") == DNB_FOUND
+        assert len(client.calls) == 2
+
+    def test_refresh_bypasses_cache_and_country_is_sent_for_canada(self, monkeypatch, response_cache):
+        """Test that refresh calls DNB again, and only Canadian searches send the country"""
+        client = FakeClient(FakeHttpResponse(200, DNB_FOUND), FakeHttpResponse(200, DNB_FOUND))
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+
+        tasks.task_two_endpoint("Acme Equipment", "Toronto", "ON", "CA")
+        tasks.task_two_endpoint("Acme Equipment", "Toronto", "ON", "CA", refresh=True)
+        assert len(client.calls) == 2
+        assert client.calls[0][2]["json"] == {"name": "Acme Equipment", "city": "Toronto", "state": "ON", "country": "CA"}
+
+
+def perplexity_answer(content):
+    return FakeHttpResponse(200, {"choices": [{"message": {"content": content}}]})
+
+
+SOS_ANSWER = '{"found": true, "registration_date": "01/02/2001", "years_in_business": 25, "status": "Active", "active": true, "explanation": "ok"}'
+
+
+class TestSecretaryOfStateAnalysis:
+    def test_only_parsed_answers_are_cached(self, monkeypatch, response_cache):
+        """Test that an answer that is not JSON is not cached and the next screen asks again"""
+        client = FakeClient(perplexity_answer("I could not find that business."), perplexity_answer(SOS_ANSWER))
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+        html = "<html><body>Acme Equipment - Active</body></html>"
+
+        assert tasks.analyze_secretary_of_state_page(html)["error"] == "Error parsing Perplexity response"
+        assert tasks.analyze_secretary_of_state_page(html)["years_in_business"] == 25
+        assert tasks.analyze_secretary_of_state_page(html)["years_in_business"] == 25
+        assert len(client.calls) == 2
+
+    def test_unparsed_answer_is_not_recorded_as_not_found(self, monkeypatch, response_cache, task_driver):
+        """Test that task_three reports a parse failure instead of writing "not found" SOS info"""
+        client = FakeClient(perplexity_answer("I could not find that business."))
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+        monkeypatch.setattr(tasks, "get_browser_pool", lambda: FakeBrowserPool())
+        monkeypatch.setattr(tasks, "get_adapter", lambda state: None)
+        monkeypatch.setattr(tasks, "GENERIC_SOS_ADAPTER", FakeSearch())
+
+        result = run_async(tasks.task_three("v1", context=FakeContext()))
+        assert result["success"] is False
+        assert task_driver.sos == []
+        assert task_driver.flags == [("v1", ["Error checking Secretary of State"])]
+
+
+class TestPerplexity:
+    def test_non_200_raises(self, monkeypatch):
+        """Test that a failed Perplexity call raises instead of returning None"""
+        monkeypatch.setattr(tasks, "get_client", lambda name: FakeClient(FakeHttpResponse(500, text="upstream error")))
+        with pytest.raises(HTTPError, match="500"):
+            tasks.call_perplexity_dict("prompt")
+
+    def test_json_block_is_parsed(self, monkeypatch):
+        body = {"choices": [{"message": {"content": 'Here you go: {"adverse_findings": false} done'}}]}
+        monkeypatch.setattr(tasks, "get_client", lambda name: FakeClient(FakeHttpResponse(200, body)))
+        assert tasks.call_perplexity_dict("prompt") == {"adverse_findings": False}
+
+
+class TestTaskFive:
+    def test_flags_are_written_once(self, monkeypatch, task_driver):
+        """Test that search and maps flags are appended in one write"""
+        monkeypatch.setattr(tasks, "google_search_validation", lambda name, address, refresh=False: ["No business website could be found"])
+        monkeypatch.setattr(tasks, "google_maps_validation", lambda address, refresh=False: ["Address appears to be a P.O. box or mail drop."])
+
+        result = tasks.task_five("v1", context=FakeContext())
+        assert result == {"flags": ["No business website could be found", "Address appears to be a P.O. box or mail drop."], "num_flags": 2}
+        assert task_driver.flags == [("v1", result["flags"])]
+
+    def test_maps_throttled_defers_and_keeps_search_flags(self, monkeypatch, task_driver):
+        """Test that a Google Maps rate limit returns the deferred marker with the Perplexity flags and writes nothing"""
+        def throttled(address, refresh=False):
+            raise ProviderThrottled("google is rate limiting requests")
+
+        monkeypatch.setattr(tasks, "google_search_validation", lambda name, address, refresh=False: ["No business website could be found"])
+        monkeypatch.setattr(tasks, "google_maps_validation", throttled)
+
+        result = tasks.task_five("v1", context=FakeContext())
+        assert result["deferred"] is True
+        assert result["flags"] == ["No business website could be found"]
+        assert result["num_flags"] == 1
+        assert task_driver.flags == []
+
+    def test_perplexity_throttled_defers(self, monkeypatch, task_driver):
+        """Test that a Perplexity rate limit is passed through google_search_validation and deferred"""
+        def throttled(*args, **kwargs):
+            raise ProviderThrottled("perplexity is rate limiting requests")
+
+        monkeypatch.setattr(tasks, "call_perplexity_dict", throttled)
+        result = tasks.task_five("v1", context=FakeContext())
+        assert (result["deferred"], result["flags"]) == (True, [])
+
+
+class TestTaskSix:
+    def test_perplexity_throttled_defers(self, monkeypatch, task_driver):
+        """Test that a rate limited adverse news search is deferred instead of failing the screen"""
+        def throttled(*args, **kwargs):
+            raise ProviderThrottled("perplexity is rate limiting requests")
+
+        monkeypatch.setattr(tasks, "call_perplexity_dict", throttled)
+        result = tasks.task_six("v1", context=FakeContext())
+        assert (result["deferred"], result["flags"], result["num_flags"]) == (True, [], 0)
+        assert task_driver.flags == []
+
+    def test_findings_are_flagged(self, monkeypatch, task_driver):
+        monkeypatch.setattr(tasks, "call_perplexity_dict", lambda prompt, cache_ttl=None, refresh=False: {
+            "adverse_findings": True, "flag_reasons": ["Bankruptcy filing in 2020"]
+        })
+        assert tasks.task_six("v1", context=FakeContext()) == {"flags": ["Bankruptcy filing in 2020"], "num_flags": 1}
+        assert task_driver.flags == [("v1", ["Bankruptcy filing in 2020"])]
+
+
+@pytest.fixture
+def sos_page(monkeypatch):
+    monkeypatch.setattr(tasks, "get_browser_pool", lambda: FakeBrowserPool())
+    monkeypatch.setattr(tasks, "get_adapter", lambda state: None)
+    monkeypatch.setattr(tasks, "GENERIC_SOS_ADAPTER", FakeSearch())
+
+
+class TestProviderOutages:
+    @pytest.mark.parametrize("failure", [FakeHttpResponse(502, text="bad gateway"), ReadTimeout("read timed out")])
+    def test_perplexity_outage_raises(self, monkeypatch, response_cache, failure):
+        """Test that a Perplexity 5xx or timeout raises instead of reading as "not found" """
+        monkeypatch.setattr(tasks, "get_client", lambda name: FakeClient(failure))
+        with pytest.raises(RequestException):
+            tasks.call_perplexity_api("prompt", cache_ttl=60)
+        assert response_cache.stats().get("perplexity", {}).get("entries", 0) == 0
+
+    @pytest.mark.parametrize("failure", [FakeHttpResponse(503, text="unavailable"), ReadTimeout("read timed out")])
+    def test_sos_check_defers_on_outage(self, monkeypatch, response_cache, task_driver, sos_page, failure):
+        """Test that task_three defers without writing SOS info or flags when Perplexity is down"""
+        monkeypatch.setattr(tasks, "get_client", lambda name: FakeClient(failure))
+        result = run_async(tasks.task_three("v1", context=FakeContext()))
+        assert result["deferred"] is True
+        assert (task_driver.sos, task_driver.flags) == ([], [])
+
+    @pytest.mark.parametrize("failure", [
+        FakeHttpResponse(500),
+        FakeHttpResponse(200, {"status": "UNKNOWN_ERROR"}),
+        ReadTimeout("read timed out")
+    ])
+    def test_maps_outage_raises(self, monkeypatch, response_cache, failure):
+        """Test that a Google 5xx, UNKNOWN_ERROR or timeout raises instead of "Address details could not be found." """
+        monkeypatch.setattr(tasks, "get_client", lambda name: FakeClient(failure))
+        with pytest.raises(RequestException):
+            tasks.google_maps_validation("500 High St, Columbus, OH 43215")
+
+    def test_place_details_outage_raises(self, monkeypatch, response_cache):
+        client = FakeClient(FakeHttpResponse(200, GEOCODE_OK), FakeHttpResponse(502))
+        monkeypatch.setattr(tasks, "get_client", lambda name: client)
+        with pytest.raises(RequestException):
+            tasks.google_maps_validation("500 High St, Columbus, OH 43215")
+        assert len(client.calls) == 2
+
+    @pytest.mark.parametrize("failure", [FakeHttpResponse(504), ReadTimeout("read timed out")])
+    def test_task_five_defers_on_outage(self, monkeypatch, response_cache, task_driver, failure):
+        """Test that task_five defers without writing flags when Google Maps is down"""
+        monkeypatch.setattr(tasks, "google_search_validation", lambda name, address, refresh=False: ["No business website could be found"])
+        monkeypatch.setattr(tasks, "get_client", lambda name: FakeClient(failure))
+        result = tasks.task_five("v1", context=FakeContext())
+        assert (result["deferred"], result["flags"]) == (True, ["No business website could be found"])
+        assert task_driver.flags == []
+
+    def test_task_five_defers_on_perplexity_outage(self, monkeypatch, response_cache, task_driver):
+        monkeypatch.setattr(tasks, "get_client", lambda name: FakeClient(FakeHttpResponse(500, text="error")))
+        result = tasks.task_five("v1", context=FakeContext())
+        assert (result["deferred"], result["flags"]) == (True, [])
+        assert task_driver.flags == []
+
+    def test_task_six_defers_on_perplexity_outage(self, monkeypatch, response_cache, task_driver):
+        monkeypatch.setattr(tasks, "get_client", lambda name: FakeClient(ReadTimeout("read timed out")))
+        result = tasks.task_six("v1", context=FakeContext())
+        assert (result["deferred"], result["flags"]) == (True, [])
+        assert task_driver.flags == []
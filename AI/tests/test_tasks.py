@@ -9,6 +9,7 @@ current_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(current_dir))
 
 from AI.tasks import task_one, task_two, task_seven
+from AI.context import VendorContext, load_vendor_context
 from db import DatabaseDriver
 
 # Load environment variables
@@ -158,17 +159,25 @@ class TestTaskTwo:
         else:
             assert "message" in response
 
-    def test_task_two_missing_country(self, test_vendor_id, monkeypatch):
+    def test_task_two_missing_country(self, test_vendor_id):
         """Test task_two when vendor country cannot be determined"""
-        def mock_get_country(self, vendor_id):
-            return None
-        
-        # Use pytest's monkeypatch to mock the method
-        monkeypatch.setattr(DatabaseDriver, "get_vendor_country", mock_get_country)
-        
-        result = task_two(test_vendor_id)
+        vendor = db_driver.get_vendor_by_id(test_vendor_id)
+        context = VendorContext(test_vendor_id, {**vendor, "Country": None})
+
+        result = task_two(test_vendor_id, context=context)
         assert result is None
 
+    def test_task_two_with_shared_context(self, test_vendor_id):
+        """Test task_two gives the same result when passed a preloaded VendorContext"""
+        context = load_vendor_context(db_driver, test_vendor_id)
+        if context is None or context.country not in ("US", "CA"):
+            pytest.skip("Test vendor is not from US or Canada")
+
+        result = task_two(test_vendor_id, context=context)
+
+        assert result is not None
+        assert isinstance(result["validated"], bool)
+
     def test_task_two_api_failure(self, test_vendor_id):
         """Test task_two when DNB API call fails"""
         result = task_two(test_vendor_id)
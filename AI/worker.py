@@ -0,0 +1,183 @@
+import sys, os
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import signal
+import argparse
+import threading
+
+from AI.job_queue import JobQueue
+from AI.jobs import SCREEN_JOB, json_safe, retryable, retry_delay, merge_outcomes, completed_tasks
+
+
+"""
+WORKER DOCS:
+
+Standalone process that runs vendor screens from the durable job queue (AI/job_queue.py):
+
+    python AI/worker.py --concurrency 8
+
+- Runs `concurrency` screens at once (`worker_concurrency`, default 4); start more processes to add throughput
+- Each thread leases a job, runs `run_vendor_pipeline` for its pair, records per-task progress and acks the result
+- While a screen runs its lease is extended every visibility_timeout / 3 seconds, so slow screens are not
+  handed to a second worker; if the process dies the lease expires and another worker retries the job
+- A screen that raises, or whose results could not be saved, is nacked and retried with backoff until it
+  runs out of attempts
+- A screen with deferred tasks (provider throttled or its circuit breaker open) is re-queued to rerun just
+  those tasks, and the downstream tasks that did not finish, after the provider's retry_after; once out of
+  attempts it is acked with the tasks still deferred
+- The portfolio collision index is built before the first lease, and the OFAC list and Secretary of State
+  link refreshers run in the worker too, so long-lived workers screen against current data
+- SIGINT / SIGTERM stop leasing new jobs; screens already running finish and are acked before the process exits
+"""
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+class Worker:
+    """
+    Pool of threads that lease and run vendor screens.
+
+    Args:
+        queue (JobQueue, optional): Queue to lease from. Defaults to a JobQueue at `job_queue_path`
+        concurrency (int, optional): Screens run at once. Defaults to `worker_concurrency` or 4
+        poll_interval (float, optional): Seconds to wait when the queue is empty. Defaults to `worker_poll_interval` or 2
+        run (callable, optional): Called as run(account_id, vendor_id, refresh=..., on_progress=...).
+            Defaults to run_vendor_pipeline
+    """
+
+    def __init__(self, queue=None, concurrency=None, poll_interval=None, run=None):
+        self.queue = queue or JobQueue()
+        self.concurrency = concurrency or int(os.getenv("worker_concurrency") or DEFAULT_CONCURRENCY)
+        self.poll_interval = poll_interval or float(os.getenv("worker_poll_interval") or DEFAULT_POLL_INTERVAL)
+        self._run = run
+        self._stop = threading.Event()
+        self._threads = []
+
+    def process(self, job):
+        """
+        Runs one leased screen and acks or nacks it.
+
+        Returns:
+            bool: True if the job was acked
+        """
+        run = self._run
+        if run is None:
+            from AI.pipeline import run_vendor_pipeline
+            run = run_vendor_pipeline
+
+        progress = {}
+        finished = threading.Event()
+
+        def on_progress(name, status):
+            progress[name] = status
+            self.queue.set_progress(job.id, job.token, progress)
+
+        def heartbeat():
+            while not finished.wait(self.queue.visibility_timeout / 3):
+                if not self.queue.extend(job.id, job.token):
+                    print(f"Lost the lease on job {job.id}; another worker may run it again")
+                    return
+
+        payload = job.payload
+        # A screen deferred earlier reruns only its deferred tasks, skipping downstream tasks that already finished
+        only = {}
+        previous = {}
+        if payload.get("tasks"):
+            previous = (self.queue.get(job.id) or {}).get("result") or {}
+            only = {"only": payload["tasks"], "completed": completed_tasks(previous)}
+        keeper = threading.Thread(target=heartbeat, name=f"lease-{job.id}", daemon=True)
+        keeper.start()
+        try:
+            outcome = run(payload["account_id"], payload["vendor_id"], refresh=payload.get("refresh", False), on_progress=on_progress, **only)
+        except Exception as e:
+            print(f"Error screening vendor {payload.get('vendor_id')} (job {job.id}, attempt {job.attempts}): {str(e)}")
+            self.queue.nack(job.id, job.token, str(e))
+            return False
+        finally:
+            finished.set()
+
+        outcome = json_safe(outcome)
+        if only:
+            outcome = merge_outcomes(previous, outcome)
+        if retryable(outcome):
+            error = outcome["errors"]["writes"]
+            print(f"Results for vendor {payload.get('vendor_id')} were not saved (job {job.id}, attempt {job.attempts}): {error}")
+            self.queue.nack(job.id, job.token, error)
+            return False
+        if outcome.get("deferred"):
+            delay = retry_delay(outcome, self.queue.backoff(job.attempts))
+            error = f"Deferred {', '.join(outcome['deferred'])}: provider unavailable"
+            if self.queue.defer(job.id, job.token, delay, {**payload, "tasks": outcome["deferred"]}, outcome, error):
+                print(f"{error} for vendor {payload.get('vendor_id')} (job {job.id}); retrying in {delay:.0f} seconds")
+                return False
+            # Out of attempts: keep the results the screen did get; the tasks stay listed as deferred
+        return self.queue.ack(job.id, job.token, outcome)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.lease(kinds=[SCREEN_JOB])
+            except Exception as e:
+                print(f"Error leasing from the job queue: {str(e)}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self.process(job)
+
+    def start(self):
+        """Starts the worker threads."""
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, name=f"screen-worker-{i}")
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stops leasing new jobs; running screens finish."""
+        self._stop.set()
+
+    def join(self):
+        """Waits for the worker threads to exit."""
+        for thread in self._threads:
+            thread.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run vendor screens from the durable job queue")
+    parser.add_argument("--concurrency", type=int, help="Screens run at once (default: worker_concurrency or 4)")
+    parser.add_argument("--queue-path", help="SQLite queue file (default: job_queue_path or .cache/job_queue.sqlite3)")
+    parser.add_argument("--visibility-timeout", type=float, help="Seconds a lease lasts before another worker may retry the job")
+    parser.add_argument("--poll-interval", type=float, help="Seconds to wait when the queue is empty")
+    args = parser.parse_args(argv)
+
+    worker = Worker(
+        queue=JobQueue(args.queue_path, visibility_timeout=args.visibility_timeout),
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval
+    )
+
+    def shutdown(signum, frame):
+        print("Worker stopping: finishing running screens")
+        worker.stop()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    from AI.tasks import start_refreshers, load_collision_index
+    load_collision_index()
+    refreshers = start_refreshers()
+
+    worker.start()
+    print(f"Worker started with {worker.concurrency} threads on {worker.queue.path}")
+    worker.join()
+    for refresher in refreshers:
+        refresher.stop()
+    worker.queue.close()
+
+
+if __name__ == "__main__":
+    main()
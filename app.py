@@ -1,6 +1,15 @@
 import json
-from flask import Flask, request, jsonify
+import re
+import signal
+import argparse
+import threading
+from datetime import date
+from flask import Flask, Response, request, jsonify, stream_with_context, g
 import db
+from AI.state_registry import get_state_registry, resolve_state, STATE_CODES
+from AI.jobs import get_job_manager
+from AI.browser_pool import run_async
+from AI.clients import provider_stats
 # from db import Account, Vendor, Lender, Equipment
 from dotenv import load_dotenv
 import os
@@ -16,7 +25,22 @@ app = Flask(__name__)
 PROJECTURL = os.getenv("projecturl")
 ANONKEY = os.getenv("anonkey")
 
-DB = db.DatabaseDriver()
+DB = db.get_database_driver()
+
+# Load the state -> Secretary of State link map once at startup
+get_state_registry()
+
+DEFAULT_LIST_LIMIT = 100
+MAX_LIST_LIMIT = 1000
+COLUMN_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+MAX_JOB_PAIRS = int(os.getenv("job_max_pairs") or 1000)
+DEFAULT_API_THREADS = 32
+DEFAULT_SHUTDOWN_TIMEOUT = 30
+
+# Requests being handled, so shutdown can wait for them
+_in_flight = 0
+_in_flight_done = threading.Condition()
+_draining = threading.Event()
 
 def success_response(body, code):
     return json.dumps(body), code
@@ -25,17 +49,115 @@ def success_response(body, code):
 def failure_response(message, code=404):
     return json.dumps({"error": message}), code
 
+@app.before_request
+def track_request():
+    global _in_flight
+    if _draining.is_set():
+        return failure_response("Server is shutting down", 503)
+    with _in_flight_done:
+        _in_flight += 1
+    g.tracked = True
+
+
+@app.teardown_request
+def untrack_request(exc):
+    # Runs after the response is sent, including the last line of a streamed response
+    global _in_flight
+    if g.pop("tracked", False):
+        with _in_flight_done:
+            _in_flight -= 1
+            _in_flight_done.notify_all()
+
+
+def drain_requests(timeout):
+    """
+    Rejects new requests with 503 and waits up to `timeout` seconds for in-flight ones to finish.
+    Returns True if none are left.
+    """
+    _draining.set()
+    with _in_flight_done:
+        return _in_flight_done.wait_for(lambda: _in_flight == 0, timeout)
+
+def stream_rows(rows, key, cursor=None):
+    """
+    Yields rows as NDJSON lines. A failure part-way ends the stream with an error line holding
+    the ID of the last row sent, since the 200 status has already gone out.
+    """
+    try:
+        for row in rows:
+            cursor = row["ID"]
+            yield json.dumps(row) + "\n"
+    except Exception as e:
+        print(f"Error streaming {key}: {str(e)}")
+        yield json.dumps({"error": f"Could not fetch {key}", "cursor": cursor}) + "\n"
+
+def list_rows(table, key):
+    """
+    Lists a table. Without limit or cursor every matching row is returned, as before pagination existed
+    (fetched from the database page by page). Query parameters:
+    - limit: rows per page (default 100, max 1000); giving limit or cursor returns one page
+    - cursor: next_cursor from the previous page
+    - fields: comma-separated columns to return (ID is always included)
+    - state: state name or postal code
+    - scanned_since / scanned_before: DateScanned bounds (YYYY-MM-DD)
+    - flagged: "true" for rows with NumFlags > 0 only
+    - format: "ndjson" to stream every matching row, one JSON object per line, from cursor onwards.
+      If the stream fails part-way, the last line is {"error": ..., "cursor": ...}; pass that cursor to resume
+    """
+    try:
+        limit = int(request.args.get("limit", min(DEFAULT_LIST_LIMIT, MAX_LIST_LIMIT)))
+    except ValueError:
+        return failure_response("'limit' must be an integer", 400)
+    if not 1 <= limit <= MAX_LIST_LIMIT:
+        return failure_response(f"'limit' must be between 1 and {MAX_LIST_LIMIT}", 400)
+
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()]
+    invalid = [f for f in fields if not COLUMN_NAME.fullmatch(f)]
+    if invalid:
+        return failure_response(f"Invalid field names: {', '.join(invalid)}", 400)
+
+    filters = {}
+    state = request.args.get("state")
+    if state:
+        name = resolve_state(state)
+        filters["state"] = [name, STATE_CODES[name], name.lower().replace(" ", "")] if name else state
+    for bound in ("scanned_since", "scanned_before"):
+        value = request.args.get(bound)
+        if value:
+            try:
+                filters[bound] = date.fromisoformat(value).isoformat()
+            except ValueError:
+                return failure_response(f"'{bound}' must be a date (YYYY-MM-DD)", 400)
+    if request.args.get("flagged", "").lower() in ("1", "true", "yes"):
+        filters["flagged"] = True
+
+    cursor = request.args.get("cursor")
+    if request.args.get("format") == "ndjson":
+        rows = DB.iter_rows(table, page_size=MAX_LIST_LIMIT, fields=fields, filters=filters, cursor=cursor)
+        return Response(stream_with_context(stream_rows(rows, key, cursor)), mimetype="application/x-ndjson")
+
+    if "limit" not in request.args and cursor is None:
+        try:
+            rows = list(DB.iter_rows(table, page_size=MAX_LIST_LIMIT, fields=fields, filters=filters))
+        except Exception as e:
+            print(f"Error listing {key}: {str(e)}")
+            return failure_response(f"Could not fetch {key}", 500)
+        return success_response({key: rows, "next_cursor": None}, 200)
+
+    rows, next_cursor = DB.get_page(table, limit, cursor, fields, filters)
+    if rows is None:
+        return failure_response(f"Could not fetch {key}", 500)
+    return success_response({key: rows, "next_cursor": next_cursor}, 200)
+
 @app.route("/account/")
 def get_accounts():
-    """Returns all accounts (sample data)"""
-    accounts = DB.get_accounts()
-    return success_response({"accounts": accounts}, 200)
+    """Returns all accounts, one page of them, or streams them as NDJSON (see list_rows)"""
+    return list_rows("Account", "accounts")
 
 @app.route("/vendor/")
 def get_vendors():
-    """Returns all vendors (sample data)"""
-    vendors = DB.get_vendors()
-    return success_response({"vendors": vendors}, 200)
+    """Returns all vendors, one page of them, or streams them as NDJSON (see list_rows)"""
+    return list_rows("Vendor", "vendors")
  
 
 @app.route("/account/<string:account_id>/", methods=["GET"])
@@ -108,15 +230,54 @@ def due_diligence():
     return success_response(res, 200)
 
 
+@app.route("/duediligence/jobs", methods=["POST"])
+def submit_due_diligence_job():
+    """Queues due diligence screens for a batch of vendors and returns the job ID right away.
+    Expected JSON body: {"pairs": [{"account_id": str, "vendor_id": str}], "refresh": boolean (optional)}
+    """
+    try:
+        body = json.loads(request.data)
+    except json.JSONDecodeError:
+        return failure_response("Invalid JSON", 400)
+
+    pairs = body.get("pairs") if isinstance(body, dict) else None
+    if not isinstance(pairs, list) or not pairs:
+        return failure_response("'pairs' must be a non-empty list", 400)
+    if len(pairs) > MAX_JOB_PAIRS:
+        return failure_response(f"At most {MAX_JOB_PAIRS} pairs per job", 400)
+    for pair in pairs:
+        if not isinstance(pair, dict) or "account_id" not in pair or "vendor_id" not in pair:
+            return failure_response("Each pair needs 'account_id' and 'vendor_id'", 400)
+
+    job_id = get_job_manager().submit(pairs, refresh=bool(body.get("refresh", False)))
+    return success_response({"job_id": job_id, "status_url": f"/duediligence/jobs/{job_id}"}, 202)
+
+
+@app.route("/duediligence/jobs/<string:job_id>", methods=["GET"])
+def get_due_diligence_job(job_id):
+    """Returns a job's progress: per-vendor status, per-task status and each finished vendor's results."""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return failure_response("Job not found")
+    return success_response(job, 200)
+
+
+@app.route("/stats/providers/", methods=["GET"])
+def get_provider_stats():
+    """Returns each upstream provider's rate limit, adaptive concurrency limit, queue depth and throttle counts."""
+    return success_response(provider_stats(), 200)
+
+
 @app.route("/secofstate/<string:state_name>/", methods=["GET"])
 def secretary_of_state_link(state_name):
     """
-    Task 2: Enter state name with no spaces. Returns corresponding secretary of state links.
+    Task 2: Enter state name (any case or spacing) or postal code. Returns corresponding secretary of state links.
     """
-    res = DB.get_state_link(state_name.lower())
+    states = get_state_registry()
+    res = states.get_url(state_name)
     if res is None:
         return failure_response("State not found")
-    return success_response({"state": state_name, "url": res}, 200)
+    return success_response({"state": states.resolve(state_name), "url": res}, 200)
 
 
 @app.route("/vendor/<string:vendor_id>/sos/", methods=["PATCH"])
@@ -141,6 +302,26 @@ def update_sos(vendor_id):
     return success_response("SOS info updated successfully", 200)
 
 
+@app.route("/vendor/<string:vendor_id>/sos/check/", methods=["POST"])
+def check_sos(vendor_id):
+    """Task 3: Runs the Secretary of State registry check for a vendor and records the result.
+    Optional JSON body: {"state": str, "refresh": boolean}
+    The Playwright scrape is awaited on the shared browser event loop, so concurrent checks share warm browsers.
+    """
+    body = {}
+    if request.data:
+        try:
+            body = json.loads(request.data)
+        except json.JSONDecodeError:
+            return failure_response("Invalid JSON", 400)
+
+    from AI import tasks
+    res = run_async(tasks.task_three(vendor_id, state=body.get("state"), refresh=bool(body.get("refresh", False))))
+    if res is None:
+        return failure_response("Vendor does not exist")
+    return success_response(res, 200)
+
+
 @app.route("/vendor/<string:vendor_id>/ofac/", methods=["PATCH"])
 def update_ofac(vendor_id):
     """Updates OFAC information for a vendor.
@@ -161,8 +342,74 @@ def update_ofac(vendor_id):
     return success_response("OFAC info updated successfully", 200)
 
 
-def main():
-    app.run(host="0.0.0.0", port=8000, debug=True)
+def serve(host=None, port=None, threads=None, shutdown_timeout=None, stopping=None):
+    """
+    Serves the API with waitress, a multithreaded production WSGI server.
+    Builds the portfolio collision index and starts the configured OFAC list and Secretary of State link refreshers.
+    On SIGTERM or SIGINT new requests get 503 while in-flight requests finish (up to `shutdown_timeout` seconds),
+    then running due diligence jobs are drained before the server stops.
+
+    Args:
+        host (str, optional): Defaults to `api_host` or 0.0.0.0
+        port (int, optional): Defaults to `api_port` or 8000
+        threads (int, optional): Requests handled at once. Defaults to `api_threads` or 32
+        shutdown_timeout (float, optional): Seconds to wait for in-flight requests. Defaults to `api_shutdown_timeout` or 30
+        stopping (threading.Event, optional): Stops the server when set. Defaults to an event set by SIGTERM/SIGINT
+    """
+    from waitress import create_server
+
+    host = host or os.getenv("api_host") or "0.0.0.0"
+    port = int(port or os.getenv("api_port") or 8000)
+    threads = int(threads or os.getenv("api_threads") or DEFAULT_API_THREADS)
+    shutdown_timeout = float(shutdown_timeout or os.getenv("api_shutdown_timeout") or DEFAULT_SHUTDOWN_TIMEOUT)
+
+    from AI.tasks import start_refreshers, load_collision_index
+
+    load_collision_index()
+    server = create_server(app, host=host, port=port, threads=threads)
+    refreshers = start_refreshers()
+    if stopping is None:
+        stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+
+    def run_server():
+        try:
+            server.run()
+        except OSError:
+            # Closing the server's sockets interrupts the select loop it may be waiting in
+            if not stopping.is_set():
+                raise
+
+    server_thread = threading.Thread(target=run_server, name="api-server", daemon=True)
+    server_thread.start()
+    print(f"Serving on http://{host}:{port} with {threads} threads")
+    while not stopping.wait(1):
+        pass
+
+    print("Stopping: finishing in-flight requests")
+    if not drain_requests(shutdown_timeout):
+        print(f"{_in_flight} request(s) still running after {shutdown_timeout} seconds")
+    print("Stopping: waiting for running due diligence jobs")
+    get_job_manager().shutdown(wait=True)
+    for refresher in refreshers:
+        refresher.stop()
+    server.close()
+    server_thread.join(5)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="QuickFi vendor due diligence API")
+    parser.add_argument("--dev", action="store_true", help="Run Flask's development server with the debugger and reloader")
+    parser.add_argument("--host", help="Interface to listen on (default: api_host or 0.0.0.0)")
+    parser.add_argument("--port", type=int, help="Port to listen on (default: api_port or 8000)")
+    parser.add_argument("--threads", type=int, help="Requests handled at once (default: api_threads or 32)")
+    args = parser.parse_args(argv)
+
+    if args.dev:
+        app.run(host=args.host or "0.0.0.0", port=args.port or 8000, debug=True)
+    else:
+        serve(args.host, args.port, args.threads)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
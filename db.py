@@ -1,4 +1,10 @@
 from datetime import date
+from collections import OrderedDict
+import contextlib
+import copy
+import functools
+import threading
+import time
 from supabase import create_client, Client
 from sqlalchemy.dialects.postgresql import ARRAY
 import os
@@ -7,29 +13,403 @@ from flask import Flask, request, jsonify
 from dotenv import load_dotenv
 
 
-# Initialize Supabase client
+# Supabase settings; each DatabaseDriver creates its own client (the SQL backend needs none)
 load_dotenv()
 PROJECTURL = os.getenv("projecturl")
 ANONKEY = os.getenv("anonkey")
-supabase: Client = create_client(PROJECTURL, ANONKEY)
+
+# Rows per keyset page (PostgREST caps a single response at 1000 rows by default)
+DEFAULT_PAGE_SIZE = 1000
+
+# IDs per `in` filter request in the *_by_ids reads
+IDS_PER_REQUEST = 200
+
+# Read cache defaults: disabled unless db_cache_ttl (seconds) is set
+DEFAULT_READ_CACHE_SIZE = 10000
+
+# Write buffer flush thresholds (buffered_writes)
+DEFAULT_BUFFER_MAX_FLAGS = int(os.getenv("write_buffer_max_flags") or 50)
+DEFAULT_BUFFER_MAX_AGE = float(os.getenv("write_buffer_max_age") or 300)
+
+
+class ReadCache:
+    """
+    In-process TTL/LRU cache for single-row reads.
+
+    Keys are (namespace, id) tuples. Each key has a version that invalidate() bumps, and set() is
+    skipped if the version changed while the value was being fetched, so a read that races a write
+    cannot put the old row back in the cache.
+
+    Args:
+        ttl (float): Seconds an entry stays valid
+        max_entries (int): Entries kept before the least recently used is evicted
+    """
+
+    def __init__(self, ttl, max_entries=DEFAULT_READ_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key):
+        """Returns (hit, value, version) for a key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return True, copy.deepcopy(entry[1]), None
+            if entry is not None:
+                del self._entries[key]
+            self._stats["misses"] += 1
+            return False, None, self._versions.get(key, 0)
+
+    def set(self, key, value, version):
+        """Stores a fetched value unless the key was invalidated since `version` was read."""
+        with self._lock:
+            if self._versions.get(key, 0) != version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key):
+        """Drops a key and bumps its version."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._stats["invalidations"] += 1
+
+    def stats(self):
+        """Returns hit/miss/eviction/invalidation counters, hit rate and current size."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries)
+            }
+
+
+# PostgREST's "function not found in the schema cache" and Postgres' undefined_function
+MISSING_FUNCTION_CODES = {"PGRST202", "42883"}
+
+
+def missing_function(error):
+    """Returns True if an RPC failed because the Postgres function is not installed."""
+    return getattr(error, "code", None) in MISSING_FUNCTION_CODES
+
+
+def read_cached(namespace):
+    """
+    Caches a DatabaseDriver read keyed by (namespace, first argument) when the driver has a read cache.
+    None results (missing rows, failed queries) are not cached.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, key, *args, **kwargs):
+            if self.read_cache is None:
+                return method(self, key, *args, **kwargs)
+            hit, value, version = self.read_cache.get((namespace, key))
+            if hit:
+                return value
+            value = method(self, key, *args, **kwargs)
+            if value is not None:
+                self.read_cache.set((namespace, key), value, version)
+            return value
+        return wrapper
+    return decorator
+
+
+def invalidates(*namespaces):
+    """
+    Drops the cached reads for the written vendor (first argument) after a DatabaseDriver write.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, key, *args, **kwargs):
+            try:
+                return method(self, key, *args, **kwargs)
+            finally:
+                if self.read_cache is not None:
+                    for namespace in namespaces:
+                        self.read_cache.invalidate((namespace, key))
+        return wrapper
+    return decorator
+
+
+class VendorWriteBuffer:
+    """
+    Vendor field updates and flag appends collected during one screening run, applied as one write.
+
+    Args:
+        vendor_id: The buffered vendor
+        max_flags (int): Flush once this many flags are pending
+        max_age (float): Flush on the next write once the oldest pending write is this many seconds old
+    """
+
+    def __init__(self, vendor_id, max_flags=DEFAULT_BUFFER_MAX_FLAGS, max_age=DEFAULT_BUFFER_MAX_AGE):
+        self.vendor_id = vendor_id
+        self.max_flags = max_flags
+        self.max_age = max_age
+        self.fields = {}
+        self.flags = []
+        self.writes = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.users = 0
+        self._since = None
+        self.lock = threading.Lock()
+
+    def add(self, fields=None, flags=None):
+        """Queues field updates and flags. Returns True when a threshold says to flush now."""
+        with self.lock:
+            self.fields.update(fields or {})
+            self.flags.extend(flags or [])
+            self.writes += 1
+            if self._since is None:
+                self._since = time.monotonic()
+            return len(self.flags) >= self.max_flags or time.monotonic() - self._since >= self.max_age
+
+    def take(self):
+        """Returns and clears the pending (fields, flags)."""
+        with self.lock:
+            fields, flags = self.fields, self.flags
+            self.fields, self.flags, self._since = {}, [], None
+            return fields, flags
+
+    def overlay(self, row):
+        """Returns a copy of a Vendor (or flags) row with the pending writes applied."""
+        with self.lock:
+            if not self.fields and not self.flags:
+                return row
+            row = dict(row)
+            row.update({k: v for k, v in self.fields.items() if k in row})
+            if "Flags" in row:
+                row["Flags"] = (row.get("Flags") or []) + self.flags
+            if "NumFlags" in row:
+                row["NumFlags"] = (row.get("NumFlags") or 0) + len(self.flags)
+            return row
+
+
+def overlays_pending(method):
+    """
+    Applies a buffered vendor's pending writes to the row a DatabaseDriver read returns,
+    so tasks later in a run see the flags and fields written earlier in it.
+    """
+    @functools.wraps(method)
+    def wrapper(self, vendor_id, *args, **kwargs):
+        return self._overlay_pending(vendor_id, method(self, vendor_id, *args, **kwargs))
+    return wrapper
+
+
+VENDOR_READS = ("vendor", "flags", "vendor_country")
+
+# Columns the portfolio collision index keys rows on (AI/collisions.py)
+COLLISION_COLUMNS = {"Name", "Street", "City", "State", "ZIP", "Country"}
+
+_collision_index = None
+
+
+def track_collisions(index):
+    """
+    Registers the process-wide CollisionIndex (AI/collisions.py) with every driver in the process.
+    Account and Vendor rows the drivers fetch, and vendors whose name or address columns they write,
+    are upserted into it, so the index follows the database without being rebuilt. Pass None to stop.
+    """
+    global _collision_index
+    _collision_index = index
+
+_shared_read_cache = None
+_shared_read_cache_lock = threading.Lock()
+
+
+def get_shared_read_cache():
+    """
+    Returns the process-wide ReadCache configured by `db_cache_ttl` / `db_cache_max_entries`,
+    or None when `db_cache_ttl` is unset or 0. Shared so a write through any driver (tasks, app)
+    invalidates the reads of every driver in the process.
+    """
+    global _shared_read_cache
+    ttl = float(os.getenv("db_cache_ttl") or 0)
+    if ttl <= 0:
+        return None
+    with _shared_read_cache_lock:
+        if _shared_read_cache is None:
+            _shared_read_cache = ReadCache(ttl, int(os.getenv("db_cache_max_entries") or DEFAULT_READ_CACHE_SIZE))
+        return _shared_read_cache
+
 
 class DatabaseDriver:
     """
     Database driver for interacting with Supabase.
     Handles reading and writing information with the Supabase database.
+
+    Queries live in the underscore methods (_fetch_*, _append_flags, _update_vendor_fields,
+    _apply_vendor_updates) and the undecorated readers, so other storage backends (see db_sql.py)
+    subclass the driver and keep its public methods, read cache and write buffering.
+
+    Single-row reads (get_vendor_by_id, get_flags, get_account_by_id, get_vendor_country, get_state_link)
+    go through an optional in-process TTL/LRU cache. Vendor writes made through a driver invalidate
+    that vendor's cached reads; writes made by other processes are seen once the TTL expires.
+    Fetched Account and Vendor rows also keep the collision index registered with track_collisions current.
+
+    Args:
+        cache_ttl (float, optional): Give this driver its own read cache with this TTL in seconds (0 disables it).
+            Defaults to the process-wide cache configured by `db_cache_ttl`, disabled when that is unset
+        cache_max_entries (int, optional): Size of this driver's own read cache
     """
     
-    def __init__(self):
+    def __init__(self, cache_ttl=None, cache_max_entries=None):
+        self._connect()
+
+        if cache_ttl is None:
+            self.read_cache = get_shared_read_cache()
+        elif cache_ttl > 0:
+            self.read_cache = ReadCache(cache_ttl, cache_max_entries or DEFAULT_READ_CACHE_SIZE)
+        else:
+            self.read_cache = None
+
+        self._write_buffers = {}
+        self._write_buffers_lock = threading.Lock()
+
+    def _connect(self):
         self.supabase = create_client(PROJECTURL, ANONKEY)
+        # The client builds its PostgREST client lazily on first use, which races when request and
+        # pipeline threads share the driver; build it now. Its pooled HTTP session is thread-safe.
+        self.supabase.postgrest
+
+    def cache_stats(self):
+        """Returns the read cache counters and hit rate, or None when the cache is disabled."""
+        return self.read_cache.stats() if self.read_cache is not None else None
+
+    def _track(self, kind, row):
+        """Upserts a freshly fetched Account or Vendor row into the tracked collision index. Returns the row."""
+        index = _collision_index
+        if index is not None and row:
+            index.upsert(kind, row)
+        return row
+
+    def _track_vendor_write(self, vendor_id, fields):
+        # Re-index a vendor after a write that changed a column the collision index keys on
+        if _collision_index is not None and COLLISION_COLUMNS & set(fields):
+            self._track("vendor", self._fetch_vendor(vendor_id))
+
+    @contextlib.contextmanager
+    def buffered_writes(self, vendor_id, max_flags=None, max_age=None):
+        """
+        Buffers update_flags / update_flags_many / update_sos_info / update_ofac_info for a vendor
+        and applies them in one write when the block exits (or earlier, when a flush threshold is hit).
+        Reads of the vendor through get_vendor_by_id and get_flags include the pending writes.
+        Nested or concurrent blocks for the same vendor share one buffer, applied when the last one exits.
+
+        Args:
+            vendor_id: The vendor to buffer writes for
+            max_flags (int, optional): Flush once this many flags are pending. Defaults to `write_buffer_max_flags` or 50
+            max_age (float, optional): Flush on the next write after this many seconds. Defaults to `write_buffer_max_age` or 300
+
+        Yields:
+            VendorWriteBuffer: The buffer (its `writes` and `flushes` counters show how many writes were coalesced,
+                `failed_flushes` how many of those database writes failed)
+        """
+        with self._write_buffers_lock:
+            buffer = self._write_buffers.get(vendor_id)
+            if buffer is None:
+                buffer = VendorWriteBuffer(vendor_id, max_flags or DEFAULT_BUFFER_MAX_FLAGS, max_age or DEFAULT_BUFFER_MAX_AGE)
+                self._write_buffers[vendor_id] = buffer
+            # Concurrent runs for the same vendor (e.g. against two accounts in one batch) share the buffer
+            buffer.users += 1
+        try:
+            yield buffer
+        finally:
+            with self._write_buffers_lock:
+                buffer.users -= 1
+                last = buffer.users == 0
+                if last:
+                    del self._write_buffers[vendor_id]
+            if last:
+                self._flush_buffer(buffer)
+
+    def flush_writes(self, vendor_id):
+        """
+        Applies a buffered vendor's pending writes now.
+        Returns True if there was nothing to write or the write succeeded.
+        """
+        buffer = self._write_buffers.get(vendor_id)
+        return self._flush_buffer(buffer) if buffer is not None else True
+
+    def _buffer_writes(self, vendor_id, fields=None, flags=None):
+        """
+        Queues writes if the vendor is buffered. Returns False when the caller should write directly.
+        """
+        buffer = self._write_buffers.get(vendor_id)
+        if buffer is None:
+            return False
+        if buffer.add(fields, flags):
+            self._flush_buffer(buffer)
+        return True
+
+    def _apply_vendor_updates(self, vendor_id, fields, flags):
+        """
+        Writes field updates and flag appends in one statement with the apply_vendor_updates
+        Postgres function (sql/apply_vendor_updates.sql).
+        """
+        response = self.supabase.rpc("apply_vendor_updates", {
+            "p_vendor_id": vendor_id,
+            "p_fields": fields,
+            "p_flags": flags
+        }).execute()
+        return bool(response.data)
+
+    def _flush_buffer(self, buffer):
+        fields, flags = buffer.take()
+        if not fields and not flags:
+            return True
+        buffer.flushes += 1
+        try:
+            try:
+                applied = self._apply_vendor_updates(buffer.vendor_id, fields, flags)
+            except Exception as e:
+                print(f"Error applying buffered writes for vendor {buffer.vendor_id}, writing them one by one: {str(e)}")
+                fields_ok = self._update_vendor_fields(buffer.vendor_id, fields) if fields else True
+                flags_ok = self._append_flags(buffer.vendor_id, flags) if flags else True
+                applied = bool(fields_ok and flags_ok)
+        finally:
+            self._invalidate_vendor(buffer.vendor_id)
+        if applied:
+            self._track_vendor_write(buffer.vendor_id, fields)
+        else:
+            # Recorded on the buffer so the run reports the lost writes even when a threshold flush failed
+            buffer.failed_flushes += 1
+        return applied
+
+    def _invalidate_vendor(self, vendor_id):
+        if self.read_cache is not None:
+            for namespace in VENDOR_READS:
+                self.read_cache.invalidate((namespace, vendor_id))
 
 
+    @read_cached("account")
     def get_account_by_id(self, account_id=None):
         """
-        Fetches account information by account ID from Supabase.
+        Fetches account information by account ID, with its Equipment rows under "Equipment".
         """
+        return self._track("account", self._fetch_account(account_id))
+
+    def _fetch_account(self, account_id):
+        # Embed the Equipment rows through the Equipment.AccountID foreign key: one request
+        try:
+            response = self.supabase.table("Account").select("*, Equipment(*)").eq("ID", account_id).execute()
+            return response.data[0] if response.data else None
+        except Exception as e:
+            print(f"Error fetching account with embedded equipment, fetching separately: {str(e)}")
+
         try:
             response = self.supabase.table("Account").select("*").eq("ID", account_id).execute()
-            print(f"Response: {response}")
                 
             if not response.data:
                 return None
@@ -47,14 +427,96 @@ class DatabaseDriver:
         except Exception as e:
             print(f"Unexpected error in get_account_by_id: {str(e)}")
             return None
+
+    def get_account_and_vendor(self, account_id, vendor_id):
+        """
+        Fetches an account (with its Equipment rows) and a vendor in one round trip.
+        Served from the read cache when both rows are cached.
+
+        Returns:
+            tuple: (account, vendor); either is None if the row does not exist or the query failed
+        """
+        if self.read_cache is None:
+            account, vendor = self._fetch_account_and_vendor(account_id, vendor_id)
+            self._track("account", account)
+            return account, self._overlay_pending(vendor_id, self._track("vendor", vendor))
+
+        account_hit, account, account_version = self.read_cache.get(("account", account_id))
+        vendor_hit, vendor, vendor_version = self.read_cache.get(("vendor", vendor_id))
+        if not (account_hit and vendor_hit):
+            fetched_account, fetched_vendor = self._fetch_account_and_vendor(account_id, vendor_id)
+            self._track("account", fetched_account)
+            self._track("vendor", fetched_vendor)
+            if not account_hit:
+                account = fetched_account
+                if account is not None:
+                    self.read_cache.set(("account", account_id), account, account_version)
+            if not vendor_hit:
+                vendor = fetched_vendor
+                if vendor is not None:
+                    self.read_cache.set(("vendor", vendor_id), vendor, vendor_version)
+        return account, self._overlay_pending(vendor_id, vendor)
+
+    def _fetch_account_and_vendor(self, account_id, vendor_id):
+        try:
+            response = self.supabase.rpc("get_account_and_vendor", {
+                "p_account_id": account_id,
+                "p_vendor_id": vendor_id
+            }).execute()
+            return response.data["account"], response.data["vendor"]
+        except Exception as e:
+            print(f"Error calling get_account_and_vendor, fetching separately: {str(e)}")
+            return self._fetch_account(account_id), self._fetch_vendor(vendor_id)
+
+    def _overlay_pending(self, vendor_id, row):
+        buffer = self._write_buffers.get(vendor_id)
+        return buffer.overlay(row) if buffer is not None and row else row
+
+    def get_accounts_by_ids(self, account_ids):
+        """
+        Fetches many accounts, each with its Equipment rows, with `in` filters.
+
+        Returns:
+            dict: {ID: account row} for the accounts that exist
+        """
+        return {account_id: self._track("account", row)
+                for account_id, row in self._fetch_by_ids("Account", account_ids).items()}
+
+    def get_vendors_by_ids(self, vendor_ids):
+        """
+        Fetches many vendors with `in` filters.
+
+        Returns:
+            dict: {ID: vendor row} for the vendors that exist
+        """
+        return {vendor_id: self._overlay_pending(vendor_id, self._track("vendor", row))
+                for vendor_id, row in self._fetch_by_ids("Vendor", vendor_ids).items()}
+
+    def _fetch_by_ids(self, table, ids):
+        columns = "*, Equipment(*)" if table == "Account" else "*"
+        ids = list(dict.fromkeys(ids))
+        rows = {}
+        # Chunked so the id list stays within URL length limits
+        for start in range(0, len(ids), IDS_PER_REQUEST):
+            chunk = ids[start:start + IDS_PER_REQUEST]
+            try:
+                response = self.supabase.table(table).select(columns).in_("ID", chunk).execute()
+                rows.update({row["ID"]: row for row in response.data or []})
+            except Exception as e:
+                print(f"Error fetching {len(chunk)} rows from {table}: {str(e)}")
+        return rows
         
 
     def get_equipment_by_account_id(self, account_id):
         """
         Fetches equipment information by account ID from Supabase.
         """
-        response = self.supabase.table("Equipment").select("*").eq("AccountID", account_id).execute()
-        return response.data if response.data else []
+        try:
+            response = self.supabase.table("Equipment").select("*").eq("AccountID", account_id).execute()
+            return response.data if response.data else []
+        except Exception as e:
+            print(f"Error in get_equipment_by_account_id: {str(e)}")
+            return []
 
 
     def due_diligence_check(self, account_id, vendor_id):
@@ -66,14 +528,9 @@ class DatabaseDriver:
         - Vendor's flags and flags added
         """
         try:
-            # Get account information
-            account = self.get_account_by_id(account_id)
-            if not account:
-                return None
-
-            # Get vendor information
-            vendor = self.get_vendor_by_id(vendor_id)
-            if not vendor:
+            # Get account and vendor information in one round trip
+            account, vendor = self.get_account_and_vendor(account_id, vendor_id)
+            if not account or not vendor:
                 return None
 
             result = {
@@ -92,20 +549,55 @@ class DatabaseDriver:
         """
         Updates the number of flags for a vendor and the date the vendor was scanned.
         """
+        return self.update_flags_many(vendor_id, [flag])
+
+    @invalidates(*VENDOR_READS)
+    def update_flags_many(self, vendor_id, flags):
+        """
+        Appends a list of flags to a vendor in one atomic write and updates NumFlags and DateScanned.
+        Uses the append_vendor_flags Postgres function (sql/append_vendor_flags.sql) so flags written
+        by tasks running at the same time are never lost.
+        Returns True if the vendor was updated, False if it does not exist or the write failed.
+        """
+        flags = list(flags)
+        if not flags:
+            return True
+        if self._buffer_writes(vendor_id, flags=flags):
+            return True
+        return self._append_flags(vendor_id, flags)
+
+    def _append_flags(self, vendor_id, flags):
+        try:
+            response = self.supabase.rpc("append_vendor_flags", {
+                "p_vendor_id": vendor_id,
+                "p_flags": flags
+            }).execute()
+            return bool(response.data)
+        except Exception as e:
+            if not missing_function(e):
+                # The function exists, so a read-modify-write could race it and lose flags
+                print(f"Error appending flags with append_vendor_flags: {str(e)}")
+                return False
+            print(f"append_vendor_flags is not installed, falling back to read-modify-write: {str(e)}")
+            return self._append_flags_read_modify_write(vendor_id, flags)
+
+    def _append_flags_read_modify_write(self, vendor_id, flags):
+        """
+        Fallback for databases without append_vendor_flags. Not safe against concurrent writers.
+        """
         try:
             # First check if vendor exists
-            vendor_response = self.supabase.table("Vendor").select("*").eq("ID", vendor_id).execute()
+            vendor_response = self.supabase.table("Vendor").select("Flags, NumFlags").eq("ID", vendor_id).execute()
             if not vendor_response.data:
                 return False
 
             vendor = vendor_response.data[0]
-            flags_added = vendor.get("Flags", [])
-            flags_added.append(flag)
+            flags_added = (vendor.get("Flags") or []) + flags
 
             # Update the vendor
             update_response = self.supabase.table("Vendor").update({
                 "Flags": flags_added,
-                "NumFlags": vendor.get("NumFlags", 0) + 1,
+                "NumFlags": (vendor.get("NumFlags") or 0) + len(flags),
                 "DateScanned": str(date.today())
             }).eq("ID", vendor_id).execute()
 
@@ -115,10 +607,15 @@ class DatabaseDriver:
             print(f"Error updating flags: {str(e)}")
             return False
 
+    @overlays_pending
+    @read_cached("flags")
     def get_flags(self, vendor_id):
         """
         Fetches flags for a vendor.
         """
+        return self._fetch_flags(vendor_id)
+
+    def _fetch_flags(self, vendor_id):
         try:
             response = self.supabase.table("Vendor").select("NumFlags, Flags").eq("ID", vendor_id).execute()
             
@@ -129,10 +626,14 @@ class DatabaseDriver:
             print(f"Error in get_flags: {str(e)}")
             return None
 
+    @read_cached("state_link")
     def get_state_link(self, state_name):
         """
         Fetches the Secretary of State link for a given state.
         """
+        return self._fetch_state_link(state_name)
+
+    def _fetch_state_link(self, state_name):
         try:
             response = self.supabase.table("States").select("Link").eq("State", state_name).execute()
             if response.data:
@@ -142,10 +643,26 @@ class DatabaseDriver:
             print(f"Error fetching state link for {state_name}: {str(e)}")
             return None
 
+    def get_state_links(self):
+        """
+        Fetches every Secretary of State link as {State: Link}.
+        """
+        try:
+            response = self.supabase.table("States").select("State, Link").execute()
+            return {row["State"]: row["Link"] for row in response.data if row.get("Link")}
+        except Exception as e:
+            print(f"Error fetching state links: {str(e)}")
+            return None
+
+    @overlays_pending
+    @read_cached("vendor")
     def get_vendor_by_id(self, vendor_id):
         """
         Fetches vendor information by vendor ID.
         """
+        return self._track("vendor", self._fetch_vendor(vendor_id))
+
+    def _fetch_vendor(self, vendor_id):
         try:
             response = self.supabase.table("Vendor").select("*").eq("ID", vendor_id).execute()
             
@@ -163,41 +680,141 @@ class DatabaseDriver:
         response = self.supabase.table("Vendor").select("*").eq("Name", vendor_name).execute()
         return response.data[0] if response.data else None
     
+    @invalidates(*VENDOR_READS)
     def update_sos_info(self, vendor_id, years, active): 
         """
         Updates Vendor.SosYearsInBusiness (float) and Vendor.SosActive (boolean)
         """
-        try:    
-            response = self.supabase.table("Vendor").update({
-                "SosYearsInBusiness": years,
-                "SosActive": active
-            }).eq("ID", vendor_id).execute()
-            return bool(response.data)
-        except Exception as e:
-            print(f"Error updating sos info: {str(e)}")
+        return self._write_fields(vendor_id, {"SosYearsInBusiness": years, "SosActive": active})
 
+    @invalidates(*VENDOR_READS)
     def update_ofac_info(self, vendor_id, hit_found):
         """Updates Vendor.OfacHitFound (boolean)"""
+        return self._write_fields(vendor_id, {"OfacHitFound": hit_found})
+
+    def _write_fields(self, vendor_id, fields):
+        # Buffered when a run is buffering this vendor, otherwise written now
+        if self._buffer_writes(vendor_id, fields=fields):
+            return True
+        updated = self._update_vendor_fields(vendor_id, fields)
+        if updated:
+            self._track_vendor_write(vendor_id, fields)
+        return updated
+
+    def _update_vendor_fields(self, vendor_id, fields):
         try:
-            response = self.supabase.table("Vendor").update({
-                "OfacHitFound": hit_found
-            }).eq("ID", vendor_id).execute()
+            response = self.supabase.table("Vendor").update(fields).eq("ID", vendor_id).execute()
             return bool(response.data)
         except Exception as e:
-            print(f"Error updating ofac info: {str(e)}")
+            print(f"Error updating vendor fields {', '.join(fields)}: {str(e)}")
+            return False
+
+    def update_ofac_info_many(self, hits):
+        """
+        Updates Vendor.OfacHitFound for many vendors at once.
+
+        Args:
+            hits (dict): {vendor_id: hit_found}
+
+        Returns:
+            int: Number of vendors updated
+        """
+        try:
+            return self._update_ofac_info_many(hits)
+        finally:
+            for vendor_id in hits:
+                self._invalidate_vendor(vendor_id)
+
+    def _update_ofac_info_many(self, hits):
+        # One request per value: every hit in one update, every clear in another
+        updated = 0
+        for hit_found in (True, False):
+            ids = [vendor_id for vendor_id, hit in hits.items() if bool(hit) == hit_found]
+            if not ids:
+                continue
+            try:
+                response = self.supabase.table("Vendor").update({"OfacHitFound": hit_found}).in_("ID", ids).execute()
+                updated += len(response.data or [])
+            except Exception as e:
+                print(f"Error updating ofac info for {len(ids)} vendors: {str(e)}")
+        return updated
 
     def get_accounts(self):
-        """Returns all accounts (sample data)"""
-        response = self.supabase.table("Account").select("*").execute()
-        return response.data if response.data else []
+        """Returns all accounts, fetched page by page"""
+        return list(self.iter_rows("Account"))
     
     def get_vendors(self):  
-        """Returns all vendors (sample data)"""
-        response = self.supabase.table("Vendor").select("*").execute()
-        return response.data if response.data else []
+        """Returns all vendors, fetched page by page"""
+        return list(self.iter_rows("Vendor"))
+
+    def get_page(self, table, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None, filters=None):
+        """
+        Fetches one page of a table in ID order using keyset pagination.
+
+        Args:
+            table (str): "Account" or "Vendor"
+            limit (int): Maximum rows to return
+            cursor: Return rows with ID greater than this (the previous page's next_cursor)
+            fields (list of str, optional): Columns to select. ID is always included. Defaults to all columns
+            filters (dict, optional):
+                "state": State value, or list of accepted spellings
+                "scanned_since" / "scanned_before": Inclusive DateScanned bounds (YYYY-MM-DD)
+                "flagged": True for NumFlags > 0 only
+
+        Returns:
+            tuple: (rows, next_cursor), next_cursor None on the last page; or (None, None) if the query failed
+        """
+        columns = "*" if not fields else ", ".join(dict.fromkeys(["ID", *fields]))
+        filters = filters or {}
+        try:
+            query = self.supabase.table(table).select(columns)
+            if cursor is not None:
+                query = query.gt("ID", cursor)
+            state = filters.get("state")
+            if isinstance(state, (list, tuple)):
+                query = query.in_("State", list(state))
+            elif state:
+                query = query.eq("State", state)
+            if filters.get("scanned_since"):
+                query = query.gte("DateScanned", filters["scanned_since"])
+            if filters.get("scanned_before"):
+                query = query.lte("DateScanned", filters["scanned_before"])
+            if filters.get("flagged"):
+                query = query.gt("NumFlags", 0)
+            response = query.order("ID").limit(limit).execute()
+        except Exception as e:
+            print(f"Error fetching page of {table}: {str(e)}")
+            return None, None
+
+        rows = response.data or []
+        next_cursor = rows[-1]["ID"] if len(rows) == limit else None
+        return rows, next_cursor
+
+    def iter_rows(self, table, page_size=DEFAULT_PAGE_SIZE, fields=None, filters=None, cursor=None):
+        """
+        Yields every matching row of a table, fetching one keyset page at a time.
+        Takes the same fields and filters as get_page.
+
+        Raises:
+            RuntimeError: If a page query fails, so a caller never mistakes a partial stream for a complete one
+        """
+        while True:
+            after = cursor
+            rows, cursor = self.get_page(table, page_size, cursor, fields, filters)
+            if rows is None:
+                raise RuntimeError(f"Could not fetch {table} rows after ID {after}")
+            if not rows:
+                return
+            yield from rows
+            if cursor is None:
+                return
     
+    @read_cached("vendor_country")
     def get_vendor_country(self, vendor_id):
         """Returns the country of a vendor by id"""
+        return self._fetch_vendor_country(vendor_id)
+
+    def _fetch_vendor_country(self, vendor_id):
         try:
             response = self.supabase.table("Vendor").select("Country").eq("ID", vendor_id).execute()
             if response.data and len(response.data) > 0:
@@ -207,4 +824,18 @@ class DatabaseDriver:
             print(f"Error getting vendor country: {str(e)}")
             return None
 
-            
\ No newline at end of file
+            
+
+
+def get_database_driver(**kwargs):
+    """
+    Returns a driver for the backend named by `db_backend`:
+    "supabase" (default, PostgREST over HTTP) or "sql" (SQLAlchemy with a connection pool, see db_sql.py).
+    """
+    backend = (os.getenv("db_backend") or "supabase").lower()
+    if backend == "sql":
+        from db_sql import SqlDatabaseDriver
+        return SqlDatabaseDriver(**kwargs)
+    if backend != "supabase":
+        raise ValueError(f"Unknown db_backend '{backend}'; use 'supabase' or 'sql'")
+    return DatabaseDriver(**kwargs)
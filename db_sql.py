@@ -0,0 +1,363 @@
+import os
+import json
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import LABEL_STYLE_TABLENAME_PLUS_COL, MetaData, Table, bindparam, create_engine, select, update
+from sqlalchemy.engine import make_url
+
+from db import DatabaseDriver, DEFAULT_PAGE_SIZE
+
+
+"""
+SQL BACKEND DOCS:
+
+DatabaseDriver backend that talks to the database directly through SQLAlchemy instead of PostgREST over HTTP.
+Select it with `db_backend=sql`; `get_database_driver()` in db.py then returns a SqlDatabaseDriver.
+
+**Connection**: `database_url` if set (e.g. `sqlite:///local.db` for local runs), otherwise the Postgres
+URL built from `user`, `password`, `host`, `port` and `dbname` (the same variables tasks.py reads).
+Postgres connections come from a pool of `db_pool_size` (default 10) plus `db_pool_overflow` (default 10).
+
+**Differences from the Supabase backend** (same public methods and results):
+
+- get_account_by_id, get_account_and_vendor and get_accounts_by_ids load accounts with their equipment
+  (and the vendor) in one LEFT JOIN query
+- iter_rows streams a single query through a server-side cursor instead of fetching keyset pages
+- update_ofac_info_many sends one executemany UPDATE
+- Flag appends and buffered run writes lock the vendor row (SELECT ... FOR UPDATE) inside one transaction,
+  so they are atomic without the Postgres functions in sql/
+- On SQLite, the Flags array is stored as JSON text
+"""
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_POOL_OVERFLOW = 10
+
+
+def database_url():
+    """
+    Returns `database_url`, or the Postgres URL built from the Supabase connection variables, or None.
+    """
+    url = os.getenv("database_url")
+    if url:
+        return url
+    if not os.getenv("host"):
+        return None
+    return (f"postgresql+psycopg2://{os.getenv('user')}:{os.getenv('password')}@{os.getenv('host')}:"
+            f"{os.getenv('port')}/{os.getenv('dbname')}?sslmode=require")
+
+
+def _json_value(value):
+    # Match the JSON types PostgREST returns so callers see the same rows from either backend
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+class SqlDatabaseDriver(DatabaseDriver):
+    """
+    DatabaseDriver backed by a pooled SQLAlchemy engine (Postgres, or SQLite for local runs).
+
+    Args:
+        url (str, optional): SQLAlchemy database URL. Defaults to database_url()
+        cache_ttl, cache_max_entries: Read cache settings, as for DatabaseDriver
+    """
+
+    def __init__(self, url=None, cache_ttl=None, cache_max_entries=None):
+        self.url = url or database_url()
+        if not self.url:
+            raise ValueError("No database URL; set database_url or the user/password/host/port/dbname variables")
+        super().__init__(cache_ttl, cache_max_entries)
+
+    def _connect(self):
+        options = {"pool_pre_ping": True}
+        if make_url(self.url).get_backend_name() != "sqlite":
+            options.update(
+                pool_size=int(os.getenv("db_pool_size") or DEFAULT_POOL_SIZE),
+                max_overflow=int(os.getenv("db_pool_overflow") or DEFAULT_POOL_OVERFLOW),
+                pool_recycle=1800
+            )
+        self.engine = create_engine(self.url, **options)
+        self.is_sqlite = self.engine.dialect.name == "sqlite"
+        self._metadata = MetaData()
+        self._tables = {}
+        self._tables_lock = threading.Lock()
+
+    def _table(self, name):
+        with self._tables_lock:
+            if name not in self._tables:
+                self._tables[name] = Table(name, self._metadata, autoload_with=self.engine)
+            return self._tables[name]
+
+    def _row(self, mapping):
+        row = {key: _json_value(value) for key, value in dict(mapping).items()}
+        if self.is_sqlite and isinstance(row.get("Flags"), str):
+            row["Flags"] = json.loads(row["Flags"])
+        return row
+
+    def _flags_value(self, flags):
+        return json.dumps(flags) if self.is_sqlite else flags
+
+    def _id_value(self, table, value):
+        # Cursors and IDs arrive as strings from URLs; compare them as the column's type
+        try:
+            python_type = table.c.ID.type.python_type
+        except NotImplementedError:
+            return value
+        if value is None or isinstance(value, python_type):
+            return value
+        try:
+            return python_type(value)
+        except (TypeError, ValueError):
+            return value
+
+    def _accounts_with_equipment(self, conn, condition, vendor_id=None):
+        """
+        Loads the accounts matching `condition` with their Equipment rows in one LEFT JOIN query,
+        and the vendor too when vendor_id is given.
+
+        Returns:
+            tuple: ({account ID: account row with "Equipment"}, vendor row or None)
+        """
+        account, equipment, vendor = self._table("Account"), self._table("Equipment"), self._table("Vendor")
+        joined = account.outerjoin(equipment, equipment.c.AccountID == account.c.ID)
+        tables = [account, equipment]
+        if vendor_id is not None:
+            # The vendor rides along on every row: LEFT JOIN on a constant condition
+            joined = joined.outerjoin(vendor, vendor.c.ID == self._id_value(vendor, vendor_id))
+            tables.append(vendor)
+        query = select(*tables).select_from(joined).where(condition).set_label_style(LABEL_STYLE_TABLENAME_PLUS_COL)
+
+        accounts = {}
+        vendor_row = None
+        for row in conn.execute(query):
+            values = row._mapping
+            account_id = values[account.c.ID]
+            if account_id not in accounts:
+                accounts[account_id] = self._row({c.name: values[c] for c in account.c})
+                accounts[account_id]["Equipment"] = []
+            if values[equipment.c.AccountID] is not None:
+                accounts[account_id]["Equipment"].append(self._row({c.name: values[c] for c in equipment.c}))
+            if vendor_id is not None and vendor_row is None and values[vendor.c.ID] is not None:
+                vendor_row = self._row({c.name: values[c] for c in vendor.c})
+        return accounts, vendor_row
+
+    def _fetch_account(self, account_id):
+        try:
+            account = self._table("Account")
+            with self.engine.connect() as conn:
+                accounts, _ = self._accounts_with_equipment(conn, account.c.ID == self._id_value(account, account_id))
+            return next(iter(accounts.values()), None)
+        except Exception as e:
+            print(f"Unexpected error in get_account_by_id: {str(e)}")
+            return None
+
+    def _fetch_account_and_vendor(self, account_id, vendor_id):
+        try:
+            account = self._table("Account")
+            with self.engine.connect() as conn:
+                accounts, vendor = self._accounts_with_equipment(
+                    conn, account.c.ID == self._id_value(account, account_id), vendor_id
+                )
+            if not accounts:
+                # No account row to carry the vendor on the join
+                return None, self._fetch_vendor(vendor_id)
+            return next(iter(accounts.values())), vendor
+        except Exception as e:
+            print(f"Error fetching account and vendor: {str(e)}")
+            return None, None
+
+    def _fetch_by_ids(self, table_name, ids):
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        try:
+            table = self._table(table_name)
+            condition = table.c.ID.in_([self._id_value(table, i) for i in ids])
+            with self.engine.connect() as conn:
+                if table_name == "Account":
+                    return self._accounts_with_equipment(conn, condition)[0]
+                rows = conn.execute(select(table).where(condition)).mappings().all()
+            return {row["ID"]: self._row(row) for row in rows}
+        except Exception as e:
+            print(f"Error fetching {len(ids)} rows from {table_name}: {str(e)}")
+            return {}
+
+    def get_equipment_by_account_id(self, account_id):
+        """
+        Fetches equipment information by account ID.
+        """
+        try:
+            equipment = self._table("Equipment")
+            with self.engine.connect() as conn:
+                rows = conn.execute(select(equipment).where(equipment.c.AccountID == account_id)).mappings().all()
+            return [self._row(row) for row in rows]
+        except Exception as e:
+            print(f"Error in get_equipment_by_account_id: {str(e)}")
+            return []
+
+    def _select_one(self, table_name, columns, column, value, description):
+        try:
+            table = self._table(table_name)
+            selected = [table.c[name] for name in columns] if columns else [table]
+            query = select(*selected).where(table.c[column] == value).limit(1)
+            with self.engine.connect() as conn:
+                row = conn.execute(query).mappings().first()
+            return self._row(row) if row else None
+        except Exception as e:
+            print(f"Error in {description}: {str(e)}")
+            return None
+
+    def _fetch_flags(self, vendor_id):
+        return self._select_one("Vendor", ("NumFlags", "Flags"), "ID", vendor_id, "get_flags")
+
+    def _fetch_vendor(self, vendor_id):
+        return self._select_one("Vendor", None, "ID", vendor_id, "get_vendor_by_id")
+
+    def get_vendor_by_name(self, vendor_name):
+        """
+        Fetches vendor information by vendor name.
+        """
+        return self._select_one("Vendor", None, "Name", vendor_name, "get_vendor_by_name")
+
+    def _fetch_vendor_country(self, vendor_id):
+        row = self._select_one("Vendor", ("Country",), "ID", vendor_id, "get_vendor_country")
+        return row["Country"].strip() if row and row["Country"] else None
+
+    def _fetch_state_link(self, state_name):
+        row = self._select_one("States", ("Link",), "State", state_name, f"get_state_link for {state_name}")
+        return row["Link"] if row else None
+
+    def get_state_links(self):
+        """
+        Fetches every Secretary of State link as {State: Link}.
+        """
+        try:
+            states = self._table("States")
+            with self.engine.connect() as conn:
+                rows = conn.execute(select(states.c.State, states.c.Link)).all()
+            return {state: link for state, link in rows if link}
+        except Exception as e:
+            print(f"Error fetching state links: {str(e)}")
+            return None
+
+    def _list_query(self, table_name, fields=None, filters=None, cursor=None):
+        table = self._table(table_name)
+        columns = [table.c[name] for name in dict.fromkeys(["ID", *fields])] if fields else [table]
+        query = select(*columns)
+        filters = filters or {}
+        if cursor is not None:
+            query = query.where(table.c.ID > self._id_value(table, cursor))
+        state = filters.get("state")
+        if isinstance(state, (list, tuple)):
+            query = query.where(table.c.State.in_(list(state)))
+        elif state:
+            query = query.where(table.c.State == state)
+        if filters.get("scanned_since"):
+            query = query.where(table.c.DateScanned >= date.fromisoformat(filters["scanned_since"]))
+        if filters.get("scanned_before"):
+            query = query.where(table.c.DateScanned <= date.fromisoformat(filters["scanned_before"]))
+        if filters.get("flagged"):
+            query = query.where(table.c.NumFlags > 0)
+        return query.order_by(table.c.ID)
+
+    def get_page(self, table, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None, filters=None):
+        """
+        Fetches one page of a table in ID order using keyset pagination (see DatabaseDriver.get_page).
+        """
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(self._list_query(table, fields, filters, cursor).limit(limit)).mappings().all()
+        except Exception as e:
+            print(f"Error fetching page of {table}: {str(e)}")
+            return None, None
+
+        rows = [self._row(row) for row in rows]
+        next_cursor = rows[-1]["ID"] if len(rows) == limit else None
+        return rows, next_cursor
+
+    def iter_rows(self, table, page_size=DEFAULT_PAGE_SIZE, fields=None, filters=None, cursor=None):
+        """
+        Yields every matching row of a table from one query, streamed through a server-side cursor
+        `page_size` rows at a time. Takes the same fields and filters as get_page.
+
+        Raises:
+            Exception: If the query fails part-way, so a caller never mistakes a partial stream for a complete one
+        """
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execution_options(stream_results=True, yield_per=page_size).execute(
+                    self._list_query(table, fields, filters, cursor)
+                )
+                for row in result.mappings():
+                    yield self._row(row)
+        except Exception as e:
+            print(f"Error streaming {table}: {str(e)}")
+            raise
+
+    def _lock_vendor(self, conn, vendor_id):
+        vendor = self._table("Vendor")
+        query = select(vendor.c.Flags, vendor.c.NumFlags).where(vendor.c.ID == vendor_id).with_for_update()
+        return conn.execute(query).mappings().first()
+
+    def _write_vendor(self, vendor_id, fields, flags):
+        """
+        Applies field updates and flag appends to a locked vendor row in one transaction.
+        Returns False if the vendor does not exist.
+        """
+        vendor = self._table("Vendor")
+        with self.engine.begin() as conn:
+            current = self._lock_vendor(conn, vendor_id)
+            if current is None:
+                return False
+            values = {**fields, "DateScanned": date.today()}
+            if flags:
+                existing = current["Flags"] or []
+                if isinstance(existing, str):
+                    existing = json.loads(existing)
+                values["Flags"] = self._flags_value(list(existing) + flags)
+                values["NumFlags"] = (current["NumFlags"] or 0) + len(flags)
+            conn.execute(update(vendor).where(vendor.c.ID == vendor_id).values(**values))
+            return True
+
+    def _append_flags(self, vendor_id, flags):
+        try:
+            return self._write_vendor(vendor_id, {}, flags)
+        except Exception as e:
+            print(f"Error updating flags: {str(e)}")
+            return False
+
+    def _update_vendor_fields(self, vendor_id, fields):
+        try:
+            vendor = self._table("Vendor")
+            with self.engine.begin() as conn:
+                result = conn.execute(update(vendor).where(vendor.c.ID == vendor_id).values(**fields))
+            return result.rowcount > 0
+        except Exception as e:
+            print(f"Error updating vendor fields {', '.join(fields)}: {str(e)}")
+            return False
+
+    def _apply_vendor_updates(self, vendor_id, fields, flags):
+        # Exceptions propagate so DatabaseDriver._flush_buffer falls back to individual writes
+        return self._write_vendor(vendor_id, fields, flags)
+
+    def _update_ofac_info_many(self, hits):
+        if not hits:
+            return 0
+        try:
+            vendor = self._table("Vendor")
+            query = update(vendor).where(vendor.c.ID == bindparam("vendor_id")).values(OfacHitFound=bindparam("hit_found"))
+            with self.engine.begin() as conn:
+                result = conn.execute(query, [
+                    {"vendor_id": vendor_id, "hit_found": bool(hit)} for vendor_id, hit in hits.items()
+                ])
+            return result.rowcount
+        except Exception as e:
+            print(f"Error updating ofac info for {len(hits)} vendors: {str(e)}")
+            return 0
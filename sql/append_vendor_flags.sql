@@ -0,0 +1,13 @@
+-- Appends a list of flags to a vendor in a single atomic statement.
+-- Used by DatabaseDriver.update_flags_many so concurrent tasks never overwrite each other's flags.
+create or replace function append_vendor_flags(p_vendor_id "Vendor"."ID"%TYPE, p_flags text[])
+returns setof "Vendor"
+language sql
+as $$
+    update "Vendor"
+       set "Flags" = coalesce("Flags", '{}') || p_flags,
+           "NumFlags" = coalesce("NumFlags", 0) + cardinality(p_flags),
+           "DateScanned" = current_date
+     where "ID" = p_vendor_id
+    returning *;
+$$;
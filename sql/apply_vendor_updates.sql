@@ -0,0 +1,18 @@
+-- Applies every buffered write from one screening run to a vendor in a single statement:
+-- field updates (SosYearsInBusiness, SosActive, OfacHitFound) and flag appends.
+-- Used by DatabaseDriver.flush_writes. Keys missing from p_fields keep their current values.
+create or replace function apply_vendor_updates(p_vendor_id "Vendor"."ID"%TYPE, p_fields jsonb, p_flags text[])
+returns setof "Vendor"
+language sql
+as $$
+    update "Vendor" v
+       set ("SosYearsInBusiness", "SosActive", "OfacHitFound") = (
+               select r."SosYearsInBusiness", r."SosActive", r."OfacHitFound"
+                 from jsonb_populate_record(v, coalesce(p_fields, '{}')) r
+           ),
+           "Flags" = coalesce(v."Flags", '{}') || coalesce(p_flags, '{}'),
+           "NumFlags" = coalesce(v."NumFlags", 0) + coalesce(cardinality(p_flags), 0),
+           "DateScanned" = current_date
+     where v."ID" = p_vendor_id
+    returning *;
+$$;
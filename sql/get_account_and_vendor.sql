@@ -0,0 +1,19 @@
+-- Returns an account (with its Equipment rows) and a vendor in one round trip:
+-- {"account": {..., "Equipment": [...]}, "vendor": {...}}; either is null when the row does not exist.
+-- Used by DatabaseDriver.get_account_and_vendor for due_diligence_check and load_vendor_context.
+create or replace function get_account_and_vendor(p_account_id "Account"."ID"%TYPE, p_vendor_id "Vendor"."ID"%TYPE)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'account', (
+            select to_jsonb(a) || jsonb_build_object(
+                       'Equipment', coalesce((select jsonb_agg(to_jsonb(e)) from "Equipment" e where e."AccountID" = a."ID"), '[]'::jsonb)
+                   )
+              from "Account" a
+             where a."ID" = p_account_id
+        ),
+        'vendor', (select to_jsonb(v) from "Vendor" v where v."ID" = p_vendor_id)
+    );
+$$;